@@ -0,0 +1,242 @@
+"""boundaries.py
+
+This module writes and reads the syllable boundaries of words without
+building the syllabified words.  The boundaries of a word are given as
+the list of their indices (index i lies between letter i - 1 and letter
+i) or as an integer bitmask in which bit i is set for a boundary at
+index i.  Instead of the syllabified words, the syllabifier.py scripts
+can write the boundaries (--format binary) to a compact binary file,
+which is memory-mapped by the reader (BoundaryFile).
+
+Binary file layout (all integers little-endian):
+
+    header        magic, number of words, number of bits, block size
+    blocks        uint64[ceil(words / block size)]  bit offset of the
+                                                    first word of every
+                                                    block of words
+    lengths       uint16[words]   number of letters of every word
+    bits          uint8[ceil(bits / 8)]   one bit per letter, set when
+                                          there is a boundary before
+                                          the letter (bit j of the
+                                          stream is bit j % 8 of byte
+                                          j // 8)
+
+The bits of a word start at the offset of its block plus the lengths of
+the words before it in the block, so a word is found without reading
+the whole file.
+"""
+
+import array
+import itertools
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+
+MAGIC = b"SESBND01"
+HEADER = struct.Struct("<8sQQI4x")
+# Number of words per entry of the blocks array
+BLOCK_SIZE = 64
+# Largest number of letters of a word in the binary format
+MAX_LENGTH = 0xffff
+# Output formats: the syllabified words or the binary format
+FORMATS = ("text", "binary")
+
+
+def add_arguments(parser):
+    """Add the commandline argument that selects the output format to
+    parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--format",
+        help = "write the syllabified words (text) or only the syllable boundaries to a compact binary file (binary) (default: text)",
+        action = "store",
+        choices = FORMATS,
+        default = "text")
+
+
+def check_arguments(parser, args):
+    """Report an error through parser if the output format requested by
+    args cannot be used.
+    """
+    if args.format == "text":
+        return
+    if args.text:
+        parser.error("Running text can only be written as text.")
+    if args.types or args.type_counts:
+        parser.error("The type modes can only be written as text.")
+    if args.stats != None:
+        parser.error("Statistics are only available when writing text.")
+
+
+def to_mask(boundaries):
+    """Return the bitmask of a list of boundary indices."""
+    mask = 0
+    for index in boundaries:
+        mask |= 1 << index
+    return mask
+
+
+def from_mask(mask):
+    """Return the list of boundary indices of a bitmask."""
+    boundaries = []
+    index = 0
+    while mask:
+        if mask & 1:
+            boundaries.append(index)
+        mask >>= 1
+        index += 1
+    return boundaries
+
+
+def pack(lengths, boundaries):
+    """Return the bits (bytes, as in the binary format) of the boundaries
+    (lists of indices) of a chunk of words with the given lengths
+    (numbers of letters).
+    """
+    packed = bytearray((sum(lengths) + 7) // 8)
+    offset = 0
+    for length, word_boundaries in zip(lengths, boundaries):
+        for index in word_boundaries:
+            position = offset + index
+            packed[position >> 3] |= 1 << (position & 7)
+        offset += length
+    return bytes(packed)
+
+
+class BoundaryWriter:
+    """Writes the boundaries of the words in the binary format to fp (a
+    binary file).  As the sizes of the arrays are only known at the end,
+    the lengths and bits are collected in temporary files, and the file
+    is written when it is closed.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.words = 0
+        self.bits = 0
+        self.blocks = array.array("Q")
+        self.lengths = tempfile.TemporaryFile()
+        self.packed = tempfile.TemporaryFile()
+        # The bits at the end that do not fill a byte yet
+        self.partial = 0
+
+    def write(self, lengths, packed):
+        """Add a chunk of words with the given lengths (numbers of
+        letters) and the bits of their boundaries (see pack).
+        """
+        if lengths and max(lengths) > MAX_LENGTH:
+            raise ValueError("Word of %d letters is too long for the binary format" % max(lengths))
+        word_lengths = array.array("H", lengths)
+        # The bit offsets of the words that start a block
+        offsets = list(itertools.accumulate(word_lengths, initial = self.bits))
+        self.blocks.extend(offsets[-self.words % BLOCK_SIZE:len(word_lengths):BLOCK_SIZE])
+        self.words += len(word_lengths)
+        chunk_bits = offsets[-1] - self.bits
+        partial_bits = self.bits % 8
+        self.bits = offsets[-1]
+        # Shift the bits of the chunk behind the partial byte, in one
+        # operation on a (long) integer
+        data = (int.from_bytes(packed, "little") << partial_bits | self.partial).to_bytes(
+            (partial_bits + chunk_bits + 7) // 8, "little")
+        full = (partial_bits + chunk_bits) // 8
+        self.packed.write(data[:full])
+        self.partial = data[full] if full < len(data) else 0
+        if sys.byteorder != "little":
+            word_lengths.byteswap()
+        self.lengths.write(word_lengths.tobytes())
+
+    def close(self):
+        """Write the file (and close the temporary files)."""
+        if self.bits % 8:
+            self.packed.write(bytes([self.partial]))
+        self.fp.write(HEADER.pack(MAGIC, self.words, self.bits, BLOCK_SIZE))
+        blocks = self.blocks
+        if sys.byteorder != "little":
+            blocks = array.array("Q", blocks)
+            blocks.byteswap()
+        self.fp.write(blocks.tobytes())
+        for temporary in (self.lengths, self.packed):
+            temporary.seek(0)
+            shutil.copyfileobj(temporary, self.fp)
+            temporary.close()
+        self.fp.flush()
+
+
+def open_output(filename, buffer_size = -1):
+    """Return a BoundaryWriter on the named file (or standard output for
+    "-").
+    """
+    if filename == "-":
+        return BoundaryWriter(open(sys.stdout.fileno(), "wb",
+            buffering = buffer_size, closefd = False))
+    return BoundaryWriter(open(filename, "wb", buffering = buffer_size))
+
+
+def write_chunk(writer, result):
+    """Write a chunk of results, the lengths of the words and the bits of
+    their boundaries, with writer (a BoundaryWriter).
+    """
+    writer.write(*result)
+
+
+class BoundaryFile:
+    """A file in the binary format, memory-mapped for reading.  The
+    arrays are views on the mapped pages; nothing is parsed or copied.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as fp:
+            self.mmap = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+        if len(self.mmap) < HEADER.size:
+            raise ValueError("%s is not a boundary file" % filename)
+        magic, self.words, self.bits, self.block_size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError("%s is not a boundary file" % filename)
+        blocks = (self.words + self.block_size - 1) // self.block_size
+        if len(self.mmap) != HEADER.size + 8 * blocks + 2 * self.words + (self.bits + 7) // 8:
+            raise ValueError("%s is truncated" % filename)
+        view = memoryview(self.mmap)
+        offset = HEADER.size
+        self.blocks = view[offset:offset + 8 * blocks].cast("Q")
+        offset += 8 * blocks
+        self.lengths = view[offset:offset + 2 * self.words].cast("H")
+        offset += 2 * self.words
+        if sys.byteorder != "little":
+            self.blocks = array.array("Q", self.blocks)
+            self.blocks.byteswap()
+            self.lengths = array.array("H", self.lengths)
+            self.lengths.byteswap()
+        self.packed = view[offset:]
+
+    def __len__(self):
+        return self.words
+
+    def offset(self, index):
+        """Return the offset of the first bit of the word with the given
+        index.
+        """
+        block_start = index - index % self.block_size
+        return self.blocks[index // self.block_size] + sum(self.lengths[block_start:index])
+
+    def mask(self, index):
+        """Return the bitmask of the boundaries of the word with the given
+        index.
+        """
+        start = self.offset(index)
+        length = self.lengths[index]
+        value = int.from_bytes(self.packed[start >> 3:(start + length + 7) >> 3], "little")
+        return (value >> (start & 7)) & ((1 << length) - 1)
+
+    def boundaries(self, index):
+        """Return the list of boundary indices of the word with the given
+        index.
+        """
+        return from_mask(self.mask(index))
+
+    def close(self):
+        """Unmap the file."""
+        for view in (self.blocks, self.lengths, self.packed):
+            if isinstance(view, memoryview):
+                view.release()
+        self.mmap.close()
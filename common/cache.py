@@ -0,0 +1,148 @@
+"""cache.py
+
+This module contains a bounded least recently used (LRU) cache, which
+is used to remember syllabifications of frequent words.  The cache
+keeps count of its hits, misses and evictions and it can be saved to
+and loaded from a file, so that a restarted process starts with the
+frequent words already in the cache.
+"""
+
+import collections
+import json
+import logging
+import os
+import sys
+
+# Rough estimate of the memory used by the cache for each entry on top
+# of the key and value themselves.
+ENTRY_OVERHEAD = 100
+# Number of entries of a cache when no capacity is given
+DEFAULT_CAPACITY = 100000
+
+
+def entry_size(key, value):
+    """Return an estimate of the number of bytes used by an entry."""
+    return ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUCache:
+    """A cache that holds at most capacity entries and (optionally) at
+    most max_bytes bytes (estimated).  When the cache is full, the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, capacity = DEFAULT_CAPACITY, max_bytes = None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the value stored for key, or None if key is not in
+        the cache.
+        """
+        value = self.entries.get(key)
+        if value == None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store value for key, evicting the least recently used
+        entries if the cache becomes too large.
+        """
+        old = self.entries.pop(key, None)
+        if old != None:
+            self.size -= entry_size(key, old)
+        self.entries[key] = value
+        self.size += entry_size(key, value)
+        while self.entries and (len(self.entries) > self.capacity or
+                (self.max_bytes != None and self.size > self.max_bytes)):
+            old_key, old_value = self.entries.popitem(last = False)
+            self.size -= entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def stats(self):
+        """Return the counters of the cache as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, filename):
+        """Write the entries to filename, one JSON [key, value] pair per
+        line, from least to most recently used.
+        """
+        with open(filename, "w") as fp:
+            for key, value in self.entries.items():
+                fp.write(json.dumps([key, value]) + "\n")
+
+    def load(self, filename):
+        """Add the entries stored in filename (see save) to the cache.
+        Values are read back as lists.
+        """
+        with open(filename, "r") as fp:
+            for line in fp:
+                key, value = json.loads(line)
+                self.put(key, value)
+
+
+# Commandline handling, shared by the syllabifier.py scripts
+
+def add_arguments(parser):
+    """Add the commandline arguments that configure the cache to parser
+    (an argparse.ArgumentParser).
+    """
+    parser.add_argument("-c", "--cache",
+        help = "cache the syllabifications of up to N distinct words",
+        action = "store",
+        type = int,
+        metavar = "N")
+    parser.add_argument("--cache-memory",
+        help = "limit the memory used by the cache to about MB megabytes",
+        action = "store",
+        type = float,
+        metavar = "MB")
+    parser.add_argument("--cache-file",
+        help = "name of file from which the cache is preloaded (if it exists) and to which it is saved afterwards",
+        action = "store",
+        metavar = "FILE")
+
+
+def from_arguments(args):
+    """Return the LRUCache described by the commandline arguments,
+    preloaded from the cache file if that exists, or None if no cache
+    is requested.
+    """
+    if args.cache == None and args.cache_memory == None and args.cache_file == None:
+        return None
+    max_bytes = None
+    if args.cache_memory != None:
+        max_bytes = int(args.cache_memory * 1024 * 1024)
+    capacity = args.cache
+    if capacity == None:
+        capacity = DEFAULT_CAPACITY
+    cache = LRUCache(capacity, max_bytes)
+    if args.cache_file != None and os.path.exists(args.cache_file):
+        cache.load(args.cache_file)
+    return cache
+
+
+def close(cache, args):
+    """Save the cache to the cache file (if any) and log its counters."""
+    if args.cache_file != None:
+        cache.save(args.cache_file)
+    logging.info("Cache: %s", cache.stats())
@@ -0,0 +1,114 @@
+"""corpus.py
+
+This module generates synthetic Sesotho word lists, which are used by
+the benchmarks.  The words are built from Sesotho-like syllables (with
+CV, CCV, V and N templates), so that they exercise the same letter
+combinations as real words.  The generated lists are deterministic for
+a given seed.
+"""
+
+import random
+
+# Single consonants and consonant clusters (including the digraphs and
+# trigraphs) that start the CV and CCV syllables.
+CONSONANTS = ["b", "d", "f", "h", "j", "k", "l", "m", "n", "p", "r", "s",
+              "t", "y", "w"]
+CLUSTERS = ["bj", "ch", "fsh", "hl", "kh", "kg", "kw", "ng", "ngw", "ny",
+            "nyw", "ph", "psh", "sh", "th", "tl", "tlh", "ts", "tsh", "tsw"]
+VOWELS = "aeiou"
+# Syllabic nasals and /l/, these form a syllable on their own.
+SYLLABIC = ["m", "n", "l", "ng"]
+
+# The syllable templates with their relative frequencies: a vowel on
+# its own, a consonant and a vowel, a consonant cluster and a vowel, and
+# a syllabic nasal (N, which never starts a word here).
+TEMPLATES = [("V", 5), ("CV", 60), ("CCV", 30), ("N", 5)]
+
+
+def parse_lengths(description):
+    """Parse a distribution of word lengths in syllables given as
+    "LENGTH:WEIGHT,..." (e.g., "1:5,2:30,3:40,4:25") and return it as a
+    dictionary from lengths to weights.
+    """
+    lengths = {}
+    for item in description.split(","):
+        length, weight = item.split(":")
+        if int(length) < 1 or float(weight) < 0:
+            raise ValueError("Wrong word length distribution: " + description)
+        lengths[int(length)] = float(weight)
+    return lengths
+
+
+def generate_syllable(rnd, initial):
+    """Return a random syllable following one of the TEMPLATES; initial
+    indicates whether it is the first syllable of the word.
+    """
+    while True:
+        template = rnd.choices([name for name, weight in TEMPLATES],
+                               [weight for name, weight in TEMPLATES])[0]
+        if template == "V":
+            return rnd.choice(VOWELS)
+        if template == "CV":
+            return rnd.choice(CONSONANTS) + rnd.choice(VOWELS)
+        if template == "CCV":
+            return rnd.choice(CLUSTERS) + rnd.choice(VOWELS)
+        if not initial:
+            return rnd.choice(SYLLABIC)
+
+
+def generate_syllabified(count, seed = 0, max_syllables = 5, lengths = None):
+    """Return a list of count synthetic Sesotho words, each given as the
+    list of its syllables.  The number of syllables of a word is drawn
+    from lengths (a dictionary from numbers of syllables to weights, see
+    parse_lengths) or uniformly from one to max_syllables.
+    """
+    rnd = random.Random(seed)
+    if lengths == None:
+        lengths = dict((length, 1) for length in range(1, max_syllables + 1))
+    choices = sorted(lengths)
+    weights = [lengths[length] for length in choices]
+    words = []
+    for _ in range(count):
+        size = rnd.choices(choices, weights)[0]
+        words.append([generate_syllable(rnd, index == 0) for index in range(size)])
+    return words
+
+
+def generate_words(count, seed = 0, max_syllables = 5, lengths = None):
+    """Return a list of count synthetic Sesotho words (see
+    generate_syllabified).
+    """
+    return ["".join(syllables) for syllables in
+            generate_syllabified(count, seed, max_syllables, lengths)]
+
+
+def generate_text(paragraphs, seed = 0, words_per_paragraph = 100):
+    """Return a list of paragraphs (each one line ending in a newline)
+    of synthetic Sesotho running text, with capitalised sentences and
+    punctuation.
+    """
+    rnd = random.Random(seed)
+    words = generate_words(paragraphs * words_per_paragraph, seed)
+    lines = []
+    for start in range(0, len(words), words_per_paragraph):
+        tokens = []
+        capitalise = True
+        for word in words[start:start + words_per_paragraph]:
+            if capitalise:
+                word = word.capitalize()
+            capitalise = False
+            punctuation = rnd.random()
+            if punctuation < 0.08:
+                word += "."
+                capitalise = True
+            elif punctuation < 0.15:
+                word += ","
+            tokens.append(word)
+        lines.append(" ".join(tokens).rstrip(".,") + ".\n")
+    return lines
+
+
+def read_words(filename):
+    """Return the words (one per line) found in filename."""
+    with open(filename, "r") as fp:
+        return [word.rstrip() for word in fp]
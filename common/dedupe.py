@@ -0,0 +1,206 @@
+"""dedupe.py
+
+This module syllabifies every distinct word (type) of the input only
+once, which pays off on tokenized corpora (one token per line) in which
+the same words occur over and over.  In a first pass, the input is read
+and the number of occurrences of every type is counted.  When there are
+more types than fit in memory (--max-types), the counts are written to
+sorted temporary files, which are merged afterwards.  Next, the types
+are syllabified in chunks, and in a second pass the input is read again
+and the syllabifications are written in the original order of the
+tokens.  Instead, a summary with the type, its number of occurrences and
+its syllabification (separated by tabs) can be written per type.
+"""
+
+import collections
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+import tempfile
+
+import streams
+
+# Default number of types kept in memory before they are written to
+# temporary files
+MAX_TYPES = 1000000
+# Maximum number of words looked up in the temporary database at once
+LOOKUP_SIZE = 500
+
+
+def add_arguments(parser):
+    """Add the commandline arguments that configure the type mode to
+    parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--types",
+        help = "syllabify every distinct word only once; the input (which cannot be standard input) is read twice",
+        action = "store_true")
+    parser.add_argument("--type-counts",
+        help = "write every distinct word, its number of occurrences and its syllabification (separated by tabs) instead of the syllabified input",
+        action = "store_true")
+    parser.add_argument("--max-types",
+        help = "number of distinct words kept in memory in the type modes, more are stored in temporary files (default: %d)" % MAX_TYPES,
+        action = "store",
+        type = int,
+        default = MAX_TYPES,
+        metavar = "N")
+    parser.add_argument("--temp-dir",
+        help = "directory for the temporary files of the type modes (default: system default)",
+        action = "store",
+        metavar = "DIR")
+
+
+def check_arguments(parser, args):
+    """Report an error through parser if the type mode requested by
+    args (if any) cannot be used.
+    """
+    if not args.types and not args.type_counts:
+        return
+    if args.text:
+        parser.error("The type modes are not possible on running text.")
+    if args.types and args.input == "-":
+        parser.error("The input is read twice with --types, so it cannot be standard input.")
+    if args.max_types < 1:
+        parser.error("The maximum number of types should be at least 1.")
+
+
+def spill(counts, directory):
+    """Write the counts (a collections.Counter) sorted by word to a new
+    file in directory, one "word<TAB>count" line per type, and return
+    the name of the file.
+    """
+    fd, filename = tempfile.mkstemp(suffix = ".types", dir = directory)
+    with open(fd, "w") as fp:
+        for word in sorted(counts):
+            fp.write("%s\t%d\n" % (word, counts[word]))
+    return filename
+
+
+def count_types(fp, chunk_size, max_types = MAX_TYPES, directory = None):
+    """Count the occurrences of the words of fp (one per line, with the
+    whitespace at the right removed).  Return the counts that are still
+    in memory (a collections.Counter) and the list of files (see spill)
+    that the other counts were written to.
+    """
+    counts = collections.Counter()
+    runs = []
+    for words in streams.read_chunks(fp, chunk_size):
+        counts.update(words)
+        if len(counts) > max_types:
+            runs.append(spill(counts, directory))
+            counts = collections.Counter()
+    if runs and counts:
+        runs.append(spill(counts, directory))
+        counts = collections.Counter()
+    logging.debug("Counted %d types in memory and %d temporary files",
+        len(counts), len(runs))
+    return counts, runs
+
+
+def read_run(filename):
+    """Yield the (word, count) pairs of a file written by spill."""
+    with open(filename, "r") as fp:
+        for line in fp:
+            word, count = line[:-1].rsplit("\t", 1)
+            yield word, int(count)
+
+
+def sorted_types(counts, runs):
+    """Yield the (word, count) pairs of all types sorted by word, merging
+    the files of runs (the counts of a word may be spread over several
+    files).
+    """
+    if not runs:
+        for word in sorted(counts):
+            yield word, counts[word]
+        return
+    merged = heapq.merge(*[read_run(filename) for filename in runs])
+    for word, pairs in itertools.groupby(merged, lambda pair: pair[0]):
+        yield word, sum(count for word, count in pairs)
+
+
+def syllabify_types(types, syllabify_chunks, chunk_size):
+    """Syllabify the words of types (an iterable of (word, count) pairs)
+    in chunks and yield (word, count, syllabified word) triples in the
+    same order.  syllabify_chunks is a function that takes an iterable
+    of chunks (lists of words) and returns an iterable of the lists of
+    syllabified words.
+    """
+    pending = collections.deque()
+    def word_chunks():
+        iterator = iter(types)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            pending.append(chunk)
+            yield [word for word, count in chunk]
+    for syl_words in syllabify_chunks(word_chunks()):
+        for (word, count), syl_word in zip(pending.popleft(), syl_words):
+            yield word, count, syl_word
+
+
+class SyllabifiedTypes:
+    """The syllabifications of the types, kept in a dictionary or (when
+    there are too many types for memory) in a temporary SQLite database
+    in directory.
+    """
+
+    def __init__(self, triples, in_memory = True, directory = None):
+        self.connection = None
+        if in_memory:
+            self.syllabified = dict((word, syl_word)
+                for word, count, syl_word in triples)
+            return
+        self.connection = sqlite3.connect(os.path.join(directory, "types.db"))
+        self.connection.execute("CREATE TABLE types (word TEXT PRIMARY KEY, syllabified TEXT) WITHOUT ROWID")
+        # The triples are sorted, so the rows are appended to the index
+        self.connection.executemany("INSERT INTO types VALUES (?, ?)",
+            ((word, syl_word) for word, count, syl_word in triples))
+        self.connection.commit()
+
+    def lookup(self, words):
+        """Return the list of syllabifications of the words."""
+        if self.connection == None:
+            syllabified = self.syllabified
+            return [syllabified[word] for word in words]
+        distinct = list(set(words))
+        syllabified = {}
+        for start in range(0, len(distinct), LOOKUP_SIZE):
+            batch = distinct[start:start + LOOKUP_SIZE]
+            syllabified.update(self.connection.execute(
+                "SELECT word, syllabified FROM types WHERE word IN (%s)" %
+                ",".join("?" * len(batch)), batch))
+        return [syllabified[word] for word in words]
+
+    def close(self):
+        """Close the temporary database (if any)."""
+        if self.connection != None:
+            self.connection.close()
+
+
+def run(fp_input, fp_output, syllabify_chunks, args):
+    """Handle the input in the type mode requested by the commandline
+    arguments: count the types of fp_input, syllabify them with
+    syllabify_chunks (see syllabify_types) and write either the type
+    counts or (after reading fp_input again) the syllabified tokens to
+    fp_output.
+    """
+    with tempfile.TemporaryDirectory(dir = args.temp_dir) as directory:
+        counts, runs = count_types(fp_input, args.chunk_size,
+            args.max_types, directory)
+        triples = syllabify_types(sorted_types(counts, runs),
+            syllabify_chunks, args.chunk_size)
+        if args.type_counts:
+            for chunk in iter(lambda: list(itertools.islice(triples, args.chunk_size)), []):
+                streams.write_chunk(fp_output, ["%s\t%d\t%s" % triple
+                                                for triple in chunk])
+            return
+        syllabified = SyllabifiedTypes(triples, not runs, directory)
+        try:
+            fp_input.seek(0)
+            for words in streams.read_chunks(fp_input, args.chunk_size):
+                streams.write_chunk(fp_output, syllabified.lookup(words))
+        finally:
+            syllabified.close()
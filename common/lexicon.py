@@ -0,0 +1,84 @@
+"""lexicon.py
+
+This module reads exception lexicons: words whose syllabification is
+known (such as loanwords and names that the systems get wrong) and is
+used instead of running the system.  A lexicon file uses the format of
+the annotated data, one word per line followed by its syllables
+separated by dashes, for instance "Lesotho Le-so-tho".  The lexicon is
+kept in a dictionary indexed by the lowercased word, so looking a word
+up takes the same time however large the lexicon is.
+"""
+
+
+def add_arguments(parser):
+    """Add the commandline argument that gives the exception lexicon to
+    parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--exceptions",
+        help = "name of file containing words with their syllabification (word syl-la-ble, one per line), which is used instead of the system",
+        action = "store",
+        metavar = "FILE")
+
+
+def parse_entry(line):
+    """Return the lowercased word and the indices of its syllable
+    boundaries (index i lies between letter i - 1 and letter i) from a
+    line of a lexicon file.  The word may be left out, in which case
+    only the syllabified word is given.
+    """
+    fields = line.split()
+    if len(fields) not in (1, 2):
+        raise ValueError("Malformed exception %r" % line.strip())
+    syllables = fields[-1].lower().split("-")
+    word = "".join(syllables)
+    if len(fields) == 2 and fields[0].lower() != word:
+        raise ValueError("Exception %r does not match its syllables" % line.strip())
+    if "" in syllables:
+        raise ValueError("Exception %r has an empty syllable" % line.strip())
+    boundaries = []
+    index = 0
+    for syllable in syllables[:-1]:
+        index += len(syllable)
+        boundaries.append(index)
+    return word, boundaries
+
+
+def read_lexicon(fp):
+    """Read a lexicon file (an iterable of lines, empty lines are
+    skipped) and return a dictionary mapping every lowercased word to
+    the list of its syllable boundaries.  Later entries replace earlier
+    ones.
+    """
+    lexicon = {}
+    for line in fp:
+        if line.strip():
+            word, boundaries = parse_entry(line)
+            lexicon[word] = boundaries
+    return lexicon
+
+
+def load(filename):
+    """Return the lexicon (see read_lexicon) stored in filename, or an
+    empty lexicon if filename is None.
+    """
+    if filename == None:
+        return {}
+    with open(filename, "r") as fp:
+        return read_lexicon(fp)
+
+
+def hyphenated(lexicon):
+    """Return the words of the lexicon with dashes at the syllable
+    boundaries, separated by spaces (the format of the exceptions of a
+    Hyphenator).
+    """
+    words = []
+    for word, boundaries in lexicon.items():
+        pieces = []
+        start = 0
+        for index in boundaries:
+            pieces.append(word[start:index])
+            start = index
+        pieces.append(word[start:])
+        words.append("-".join(pieces))
+    return " ".join(words)
@@ -0,0 +1,186 @@
+"""mapped.py
+
+This module reads a word list (one word per line) by memory-mapping the
+input file instead of reading it through a text-mode file object, which
+decodes every line separately.  The lines are found by searching the
+raw bytes for newlines, and the input is handed out as byte ranges of
+whole lines.  Only the ranges that are syllabified are decoded, each
+with one call, after which the words are split off the decoded text at
+once.  Worker processes map the file themselves, so a chunk is passed
+to them as a (start, end) pair instead of a list of words.  The pages
+of the file are released from the memory of the process once their
+words have been read, so the memory use does not grow with the size of
+the file.
+
+The words are the same as with streams.read_chunks: "\\r\\n" and "\\r"
+count as newlines (like in text mode) and the whitespace at the right
+of every line is removed.
+"""
+
+import locale
+import mmap
+import re
+
+# Whitespace at the right of a line (re and str.rstrip agree on what is
+# whitespace)
+TRAILING_SPACE = re.compile(r"[^\S\n]+(?=\n|\Z)")
+# A newline after whitespace, which is searched for much faster than
+# TRAILING_SPACE, since the search only stops at the newlines
+SPACE_NEWLINE = re.compile(r"\n(?<=[^\S\n]\n)")
+
+# The newlines of text mode: "\r\n", "\r" or "\n"
+NEWLINE = re.compile(rb"\r\n?|\n")
+# A "\r" that is a newline of its own
+LONE_CR = re.compile(rb"\r(?!\n)")
+# "\n" (which also ends "\r\n"), counted separately from LONE_CR since
+# the search for a single byte is much faster
+LINE_FEED = re.compile(rb"\n")
+
+
+def add_arguments(parser):
+    """Add the commandline argument that selects the memory-mapped input
+    to parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--mmap",
+        help = "memory-map the input file and split it into lines on the raw bytes, which is faster on large word lists",
+        action = "store_true")
+
+
+def check_arguments(parser, args):
+    """Report an error through parser if the memory-mapped input is
+    requested by args but cannot be used.
+    """
+    if not args.mmap:
+        return
+    if args.input == "-":
+        parser.error("Standard input cannot be memory-mapped.")
+    if args.text:
+        parser.error("Running text cannot be memory-mapped.")
+    if args.types or args.type_counts:
+        parser.error("The input cannot be memory-mapped in the type modes.")
+
+
+class MappedFile:
+    """A memory-mapped word list.  The bytes are decoded with the same
+    encoding as a file opened in text mode, which should be
+    ASCII-compatible (such as UTF-8) for the newlines to be found in the
+    raw bytes.
+    """
+
+    def __init__(self, filename, encoding = None):
+        if encoding == None:
+            encoding = locale.getpreferredencoding(False)
+        self.encoding = encoding
+        self.mmap = None
+        with open(filename, "rb") as fp:
+            # An empty file cannot be mapped
+            if fp.seek(0, 2) == 0:
+                self.data = b""
+            else:
+                self.mmap = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+                self.data = self.mmap
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    self.mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self.view = memoryview(self.data)
+
+    def ranges(self, size):
+        """Yield the (start, end) byte ranges of consecutive chunks of
+        at most size whole lines (including their newlines).  A range
+        is cut at the number of bytes that size lines took in the range
+        before it, so the newlines do not have to be searched for one
+        by one; the newlines in the range are counted (which is much
+        faster) and the range is shortened if it holds too many lines.
+        """
+        length = len(self.data)
+        start = 0
+        # Estimated number of bytes of size lines
+        chunk_bytes = None
+        while start < length:
+            if chunk_bytes == None:
+                end = self.skip_lines(start, size)
+                lines = self.count_lines(start, end)
+            else:
+                newline = NEWLINE.search(self.data, start + chunk_bytes - 1)
+                end = length if newline == None else newline.end()
+                lines = self.count_lines(start, end)
+                if lines > size:
+                    end = self.skip_lines(start, size)
+                    lines = size
+            yield start, end
+            self.release(start, end)
+            chunk_bytes = max(1, (end - start) * size // lines)
+            start = end
+
+    def count_lines(self, start, end):
+        """Return the number of lines in the byte range from start to
+        end, which ends at the end of a line.
+        """
+        # The mapped bytes are searched in place; mmap has no count
+        # method, and a slice would copy the range
+        lines = len(LINE_FEED.findall(self.data, start, end))
+        lines += len(LONE_CR.findall(self.data, start, end))
+        if self.data[end - 1:end] not in (b"\n", b"\r"):
+            # The last line of the file has no newline
+            lines += 1
+        return lines
+
+    def skip_lines(self, start, size):
+        """Return the end of the byte range of (at most) size lines from
+        start.
+        """
+        end = start
+        for _ in range(size):
+            end = self.data.find(b"\n", end) + 1
+            if end == 0:
+                end = len(self.data)
+                break
+        if LONE_CR.search(self.data, start, end) == None:
+            return end
+        # Lines that end with "\r" only are searched for more slowly
+        end = start
+        for _ in range(size):
+            newline = NEWLINE.search(self.data, end)
+            if newline == None:
+                return len(self.data)
+            end = newline.end()
+        return end
+
+    def words(self, start, end):
+        """Return the list of words on the lines in the byte range from
+        start to end (as yielded by ranges).
+        """
+        text = str(self.view[start:end], self.encoding)
+        self.release(start, end)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        # The newline at the end of the last line does not start a word
+        terminated = text.endswith("\n")
+        if SPACE_NEWLINE.search(text) != None or (not terminated and text[-1:].isspace()):
+            text = TRAILING_SPACE.sub("", text)
+        words = text.split("\n")
+        if terminated:
+            words.pop()
+        return words
+
+    def chunks(self, size):
+        """Yield the words of the file in chunks (lists) of at most size
+        lines.
+        """
+        for start, end in self.ranges(size):
+            yield self.words(start, end)
+
+    def release(self, start, end):
+        """Drop the pages of the byte range from start to end from the
+        memory of this process; they are read from the page cache again
+        if they are needed later.
+        """
+        if self.mmap == None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start -= start % mmap.PAGESIZE
+        self.mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        """Unmap the file."""
+        self.view.release()
+        if self.mmap != None:
+            self.mmap.close()
@@ -0,0 +1,41 @@
+"""parallel.py
+
+This module runs syllabification on chunks of words in a pool of
+worker processes, while keeping the results in the original order.
+"""
+
+import collections
+import multiprocessing
+
+
+def add_arguments(parser):
+    """Add the commandline argument that sets the number of worker
+    processes to parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("-j", "--jobs",
+        help = "number of worker processes (default: 1, no worker processes)",
+        action = "store",
+        type = int,
+        default = 1,
+        metavar = "N")
+
+
+def map_chunks(function, chunks, jobs, initializer = None, initargs = (),
+        window = None):
+    """Apply function to every chunk (from an iterable) in a pool of
+    jobs worker processes and yield the results in the order of the
+    chunks.  Each worker process calls initializer(*initargs) once when
+    it starts.  At most window chunks (default: twice the number of
+    jobs) are handed out at a time, so memory use stays bounded however
+    many chunks there are.
+    """
+    if window == None:
+        window = 2 * jobs
+    with multiprocessing.Pool(jobs, initializer, initargs) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(function, (chunk,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
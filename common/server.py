@@ -0,0 +1,302 @@
+"""server.py
+
+This module lets the syllabifier.py scripts run as a long-running
+server, so the patterns (TeX-based system) are only loaded once instead
+of on every call.  The server listens on a local TCP port or Unix
+socket.  A client sends one word per line and receives the syllabified
+word on a line of its own, in the same order; a client may send many
+lines before reading the answers.  The words of all clients that arrive
+within a short delay are collected into a micro-batch, which is
+syllabified by one call of the batch function (syllabify_many).  The
+line "#stats" is answered with the latency metrics of the server as
+JSON (including the words the client sent before it), which are also
+logged when the server stops.
+"""
+
+import array
+import json
+import logging
+import os
+import sys
+import time
+
+# asyncio and signal are imported (see import_asyncio) when the server or
+# the client is used, so the syllabifier.py scripts do not pay for the
+# import on every run
+asyncio = None
+signal = None
+
+# Default maximum number of words in a batch
+BATCH_SIZE = 256
+# Default time (in milliseconds) a batch waits for more words
+BATCH_DELAY = 1.0
+# Number of most recent latencies the percentiles are computed from
+WINDOW = 10000
+# Request for the metrics of the server
+STATS_REQUEST = "#stats"
+
+
+def add_arguments(parser):
+    """Add the commandline arguments that configure the server to parser
+    (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--serve",
+        help = "run as a server on ADDRESS, either HOST:PORT (TCP, port 0 picks a free port) or the name of a Unix socket, instead of reading an input file",
+        action = "store",
+        metavar = "ADDRESS")
+    parser.add_argument("--batch-size",
+        help = "maximum number of words the server syllabifies at once (default: %d)" % BATCH_SIZE,
+        action = "store",
+        type = int,
+        default = BATCH_SIZE,
+        metavar = "N")
+    parser.add_argument("--batch-delay",
+        help = "time in milliseconds the server waits for more words before syllabifying a batch (default: %g)" % BATCH_DELAY,
+        action = "store",
+        type = float,
+        default = BATCH_DELAY,
+        metavar = "MS")
+
+
+def parse_address(address):
+    """Return the (host, port) pair of a TCP address HOST:PORT, or None
+    for the name of a Unix socket.  A ValueError is raised if the port is
+    not a number from 0 to 65535.
+    """
+    if os.sep in address or ":" not in address:
+        return None
+    host, port = address.rsplit(":", 1)
+    if not (port.isascii() and port.isdigit()) or int(port) > 65535:
+        raise ValueError("Invalid port in address %s" % address)
+    return host, int(port)
+
+
+def import_asyncio():
+    """Import the modules the server and the client need."""
+    global asyncio, signal
+    import asyncio
+    import signal
+
+
+class Metrics:
+    """Latency metrics of the requests (the time between receiving a
+    word and its syllabification being ready) and the sizes of the
+    batches.  The percentiles are computed over the most recent WINDOW
+    requests.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.recent = array.array("d", [0.0]) * WINDOW
+
+    def add_batch(self, latencies):
+        """Add the latencies (in seconds) of the requests of a batch."""
+        self.batches += 1
+        for latency in latencies:
+            self.recent[self.requests % WINDOW] = latency
+            self.requests += 1
+            self.total += latency
+            if latency > self.maximum:
+                self.maximum = latency
+
+    def summary(self):
+        """Return the metrics as a dictionary (latencies in
+        milliseconds).
+        """
+        recent = sorted(self.recent[:min(self.requests, WINDOW)])
+        def percentile(fraction):
+            if not recent:
+                return 0.0
+            return 1000 * recent[min(len(recent) - 1, int(fraction * len(recent)))]
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "mean_ms": 1000 * self.total / self.requests if self.requests else 0.0,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": 1000 * self.maximum,
+        }
+
+
+class Batcher:
+    """Collects words from all connections into batches of at most
+    batch_size words and syllabifies every batch with one call of
+    syllabify_many (a function from a list of words to the list of
+    syllabified words).  A batch is started by the first word that
+    arrives and waits at most delay seconds for more words.
+    """
+
+    def __init__(self, syllabify_many, batch_size = BATCH_SIZE,
+            delay = BATCH_DELAY / 1000):
+        self.syllabify_many = syllabify_many
+        self.batch_size = batch_size
+        self.delay = delay
+        self.queue = asyncio.Queue()
+        self.metrics = Metrics()
+
+    def submit(self, word):
+        """Add word to the next batch and return a future for its
+        syllabification.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((word, future, time.perf_counter()))
+        return future
+
+    async def run(self):
+        """Syllabify the batches until cancelled."""
+        while True:
+            batch = [await self.queue.get()]
+            # Give the other clients (and the rest of a pipelined
+            # request) the chance to add words, unless the batch is full
+            if self.delay > 0 and self.queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.delay)
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.finish(batch)
+
+    def finish(self, batch):
+        """Syllabify a batch of (word, future, arrival time) triples and
+        set the results of the futures.
+        """
+        try:
+            results = self.syllabify_many([word for word, future, start in batch])
+        except Exception as error:
+            logging.exception("Syllabifying a batch failed")
+            for word, future, start in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        end = time.perf_counter()
+        for (word, future, start), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        self.metrics.add_batch([end - start for word, future, start in batch])
+
+
+async def handle_client(batcher, reader, writer):
+    """Answer the lines sent by a client in order.  The words are
+    submitted to the batcher as soon as they are read, while the answers
+    are written as they become ready.  A metrics request is answered
+    after the words sent before it, so the metrics include them.
+    """
+    answers = asyncio.Queue()
+
+    async def stats_answer(previous):
+        if previous != None:
+            try:
+                await previous
+            except Exception:
+                pass
+        return json.dumps(batcher.metrics.summary())
+
+    async def write_answers():
+        while True:
+            answer = await answers.get()
+            if answer == None:
+                return
+            try:
+                line = await answer
+            except Exception:
+                line = ""
+            writer.write((line + "\n").encode("utf-8"))
+            if answers.empty():
+                await writer.drain()
+
+    writer_task = asyncio.create_task(write_answers())
+    answer = None
+    try:
+        async for line in reader:
+            # A line that is not valid UTF-8 is answered like the others
+            # instead of dropping the connection
+            word = line.decode("utf-8", "replace").strip()
+            if word == STATS_REQUEST:
+                # The answers before it are ready in order, so waiting
+                # for the last one is enough
+                answer = asyncio.ensure_future(stats_answer(answer))
+            else:
+                answer = batcher.submit(word)
+            answers.put_nowait(answer)
+    finally:
+        answers.put_nowait(None)
+        await writer_task
+        writer.close()
+
+
+async def run_server(address, syllabify_many, batch_size = BATCH_SIZE,
+        batch_delay = BATCH_DELAY, ready = None, stop = None):
+    """Serve syllabify_many on address (see parse_address) until stop (an
+    asyncio.Event) is set, or until SIGINT or SIGTERM is received when no
+    stop event is given.  ready (if given) is called with the address
+    the server listens on (with the actual port for port 0).  The
+    metrics are returned at the end.
+    """
+    import_asyncio()
+    batcher = Batcher(syllabify_many, batch_size, batch_delay / 1000)
+    batch_task = asyncio.create_task(batcher.run())
+
+    def client(reader, writer):
+        return handle_client(batcher, reader, writer)
+
+    tcp = parse_address(address)
+    if tcp != None:
+        server = await asyncio.start_server(client, tcp[0], tcp[1])
+        host, port = server.sockets[0].getsockname()[:2]
+        address = "%s:%d" % (host, port)
+    else:
+        server = await asyncio.start_unix_server(client, address)
+    if stop == None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+    logging.info("Listening on %s", address)
+    if ready != None:
+        ready(address)
+    async with server:
+        await stop.wait()
+    batch_task.cancel()
+    if tcp == None and os.path.exists(address):
+        os.remove(address)
+    metrics = batcher.metrics.summary()
+    return metrics
+
+
+def serve(args, syllabify_many):
+    """Run the server described by the commandline arguments, printing
+    the address it listens on and, when it stops, its metrics to
+    standard error.
+    """
+    def ready(address):
+        sys.stderr.write("Listening on %s\n" % address)
+        sys.stderr.flush()
+    import_asyncio()
+    metrics = asyncio.run(run_server(args.serve, syllabify_many,
+        args.batch_size, args.batch_delay, ready))
+    sys.stderr.write("Metrics: %s\n" % json.dumps(metrics))
+
+
+async def request(address, words):
+    """Send words to the server on address and return the list of
+    answers (a small client, for instance for testing).  Bytes that
+    are not valid UTF-8 can be sent as lone surrogates (as decoded with
+    the surrogateescape error handler).
+    """
+    import_asyncio()
+    tcp = parse_address(address)
+    if tcp != None:
+        reader, writer = await asyncio.open_connection(tcp[0], tcp[1])
+    else:
+        reader, writer = await asyncio.open_unix_connection(address)
+    writer.write("".join(word + "\n" for word in words).encode("utf-8",
+        "surrogateescape"))
+    await writer.drain()
+    answers = []
+    for _ in words:
+        answers.append((await reader.readline()).decode("utf-8").rstrip("\n"))
+    writer.close()
+    await writer.wait_closed()
+    return answers
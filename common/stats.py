@@ -0,0 +1,144 @@
+"""stats.py
+
+This module collects the statistics that the syllabifier.py scripts
+report with --stats: the counters of the syllabification engine (such
+as the number of times each rule matched), the time spent reading,
+syllabifying and writing, the counters of the cache and a histogram of
+the word lengths.  Nothing is collected without --stats; the scripts
+then do not even call the counting versions of their functions.
+"""
+
+import collections
+import json
+import sys
+import time
+
+import text
+
+# Phases between which the time of a run is divided
+PHASES = ("read", "syllabify", "write", "stats", "other")
+
+
+def add_arguments(parser):
+    """Add the commandline argument that requests the statistics to
+    parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--stats",
+        help = "collect statistics of the run and print a summary to standard error at the end, or write them as JSON to FILE",
+        action = "store",
+        nargs = "?",
+        const = "-",
+        metavar = "FILE")
+
+
+class Statistics:
+    """The statistics of one run.  The time is divided between the
+    phases in PHASES: at any moment exactly one phase is running, so
+    nested phases (such as reading the input while the syllabified
+    chunks are produced) are not counted twice.
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.lengths = collections.Counter()
+        self.times = dict((phase, 0.0) for phase in PHASES)
+        self.cache = None
+        self.phase = "other"
+        self.clock = time.perf_counter()
+
+    def switch(self, phase):
+        """Make phase the running phase and return the phase that was
+        running before.
+        """
+        now = time.perf_counter()
+        self.times[self.phase] += now - self.clock
+        self.clock = now
+        previous = self.phase
+        self.phase = phase
+        return previous
+
+    def timed(self, phase, iterable):
+        """Yield the items of iterable, counting the time taken to
+        produce them as phase.
+        """
+        iterator = iter(iterable)
+        while True:
+            previous = self.switch(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.switch(previous)
+            yield item
+
+    def call(self, phase, function, *args):
+        """Call function with args, counting its time as phase, and
+        return its result.
+        """
+        previous = self.switch(phase)
+        try:
+            return function(*args)
+        finally:
+            self.switch(previous)
+
+    def count_words(self, chunks, running_text = False):
+        """Yield the chunks (lists of words, or lines of running text)
+        after adding the lengths of their words to the histogram.
+        """
+        for chunk in chunks:
+            if running_text:
+                for line in chunk:
+                    self.lengths.update(map(len, text.WORD.findall(line)))
+            else:
+                self.lengths.update(map(len, chunk))
+            yield chunk
+
+    def summary(self):
+        """Return the statistics as a dictionary."""
+        self.switch(self.phase)
+        words = sum(self.lengths.values())
+        summary = {
+            "words": words,
+            "counts": dict(sorted(self.counts.items())),
+            "times": dict(self.times),
+            "words_per_second": words / self.times["syllabify"] if self.times["syllabify"] else 0.0,
+            "lengths": dict((str(length), count)
+                for length, count in sorted(self.lengths.items())),
+        }
+        if self.cache != None:
+            summary["cache"] = self.cache.stats()
+        return summary
+
+
+def format_summary(summary):
+    """Return the summary (as returned by Statistics.summary) as lines
+    of text.
+    """
+    lines = ["words: %d" % summary["words"]]
+    lines.append("time: " + ", ".join("%s %.3f s" % (phase, seconds)
+        for phase, seconds in summary["times"].items()))
+    lines.append("words per second (syllabify): %.0f" % summary["words_per_second"])
+    if summary["counts"]:
+        lines.append("counts: " + ", ".join("%s %d" % (name, count)
+            for name, count in summary["counts"].items()))
+    if "cache" in summary:
+        lines.append("cache: " + ", ".join("%s %s" % (name, value)
+            for name, value in summary["cache"].items()))
+    lines.append("word lengths:")
+    for length, count in summary["lengths"].items():
+        lines.append("%6s %d" % (length, count))
+    return "".join(line + "\n" for line in lines)
+
+
+def report(statistics, filename):
+    """Print the summary of statistics to standard error (filename -)
+    or write it as JSON to filename.
+    """
+    summary = statistics.summary()
+    if filename == "-":
+        sys.stderr.write(format_summary(summary))
+        return
+    with open(filename, "w") as fp:
+        json.dump(summary, fp, indent = 2)
+        fp.write("\n")
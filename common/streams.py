@@ -0,0 +1,95 @@
+"""streams.py
+
+This module contains the input and output handling shared by the
+syllabifier.py scripts.  The input is read in chunks of lines, so the
+memory use is bounded by the chunk size, and the output is flushed
+after every chunk.  The filename "-" stands for standard input or
+standard output, so the scripts can be used in a pipeline.
+"""
+
+import itertools
+import sys
+
+# Number of words that are read, syllabified and written at once
+CHUNK_SIZE = 10000
+
+
+def add_arguments(parser):
+    """Add the commandline arguments that configure reading and writing
+    to parser (an argparse.ArgumentParser).
+    """
+    parser.add_argument("--chunk-size",
+        help = "number of lines that are read, syllabified and written at once (default: %d)" % CHUNK_SIZE,
+        action = "store",
+        type = int,
+        default = CHUNK_SIZE,
+        metavar = "N")
+    parser.add_argument("--buffer-size",
+        help = "size of the input and output buffers in bytes, at least 2 (default: system default)",
+        action = "store",
+        type = int,
+        default = -1,
+        metavar = "BYTES")
+
+
+def check_arguments(parser, args):
+    """Report an error through parser if the chunk size or buffer size
+    requested by args cannot be used.
+    """
+    if args.chunk_size < 1:
+        parser.error("The chunk size should be at least 1.")
+    # Buffering 0 is not possible in text mode and 1 means line buffering
+    if args.buffer_size != -1 and args.buffer_size < 2:
+        parser.error("The buffer size should be -1 (system default) or at least 2.")
+
+
+def open_input(filename, buffer_size = -1):
+    """Open the named file (or standard input for "-") for reading."""
+    if filename == "-":
+        return open(sys.stdin.fileno(), "r", buffering = buffer_size,
+            closefd = False)
+    return open(filename, "r", buffering = buffer_size)
+
+
+def open_output(filename, buffer_size = -1):
+    """Open the named file (or standard output for "-") for writing."""
+    if filename == "-":
+        return open(sys.stdout.fileno(), "w", buffering = buffer_size,
+            closefd = False)
+    return open(filename, "w", buffering = buffer_size)
+
+
+def read_chunks(fp, size):
+    """Read fp in chunks of at most size lines and yield each chunk as
+    a list of words (with the whitespace at the right removed).
+    """
+    while True:
+        chunk = [word.rstrip() for word in itertools.islice(fp, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_line_chunks(fp, size):
+    """Read fp in chunks of at most size lines and yield each chunk as
+    a list of lines, which are kept exactly as they are (including the
+    newlines).
+    """
+    while True:
+        chunk = list(itertools.islice(fp, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_text(fp, text):
+    """Write text to fp and flush it, so the output of every chunk is
+    passed on straight away.
+    """
+    fp.write(text)
+    fp.flush()
+
+
+def write_chunk(fp, lines):
+    """Write the lines (without newlines) to fp and flush it."""
+    write_text(fp, "".join(line + "\n" for line in lines))
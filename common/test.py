@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""test.py
+
+This program tests the modules shared by the syllabification systems.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+import boundaries
+import cache
+import corpus
+import dedupe
+import lexicon
+import mapped
+import server
+import stats
+import streams
+import text
+
+
+class TestLRUCache(unittest.TestCase):
+    """
+    This class tests the LRU cache.
+    """
+
+    def test_counters(self):
+        """
+        Test whether hits, misses and evictions are counted.
+        """
+        lru = cache.LRUCache(2)
+        self.assertEqual(lru.get("a"), None)
+        lru.put("a", [1])
+        lru.put("b", [2])
+        self.assertEqual(lru.get("a"), [1])
+        lru.put("c", [3])  # evicts "b", the least recently used entry
+        self.assertEqual(lru.get("b"), None)
+        self.assertEqual(lru.get("c"), [3])
+        stats = lru.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]),
+                         (2, 2, 1))
+        self.assertEqual(len(lru), 2)
+
+    def test_max_bytes(self):
+        """
+        Test whether the cache stays within its memory limit.
+        """
+        lru = cache.LRUCache(1000, max_bytes = 10 * cache.entry_size("aaaa", [1]))
+        for index in range(100):
+            lru.put("%04d" % index, [index])
+        self.assertLessEqual(lru.size, lru.max_bytes)
+        self.assertEqual(len(lru), 10)
+
+    def test_save_load(self):
+        """
+        Test whether a saved cache is loaded with the same entries.
+        """
+        lru = cache.LRUCache(10)
+        lru.put("mme", [1])
+        lru.put("ngwana", [4])
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            lru.save(filename)
+            loaded = cache.LRUCache(10)
+            loaded.load(filename)
+        finally:
+            os.remove(filename)
+        self.assertEqual(list(loaded.entries.items()),
+                         [("mme", [1]), ("ngwana", [4])])
+
+
+class TestStreams(unittest.TestCase):
+    """
+    This class tests reading and writing in chunks.
+    """
+
+    def test_read_chunks(self):
+        """
+        Test whether the input is split into chunks of stripped words.
+        """
+        lines = ["mme \n", "ntate\n", "ngwana\n", "o\n", "a"]
+        self.assertEqual(list(streams.read_chunks(iter(lines), 2)),
+                         [["mme", "ntate"], ["ngwana", "o"], ["a"]])
+        self.assertEqual(list(streams.read_chunks(iter([]), 2)), [])
+
+    def test_write_chunk(self):
+        """
+        Test whether every line of a chunk is written with a newline.
+        """
+        fp = io.StringIO()
+        streams.write_chunk(fp, ["mme", "n ta te"])
+        self.assertEqual(fp.getvalue(), "mme\nn ta te\n")
+
+
+class TestText(unittest.TestCase):
+    """
+    This class tests the handling of running text.
+    """
+
+    def test_syllabify_lines(self):
+        """
+        Test whether only the words are changed and everything else is
+        kept.
+        """
+        lines = ["Ntate, o kae?\n", "\n", "  Ke mona...\n", "1999"]
+        self.assertEqual(text.syllabify_lines(lines,
+                             lambda words: ["<" + word + ">" for word in words]),
+                         "<Ntate>, <o> <kae>?\n\n  <Ke> <mona>...\n1999")
+        self.assertEqual(text.syllabify_lines(["\n"], lambda words: words), "\n")
+
+
+class TestLexicon(unittest.TestCase):
+    """
+    This class tests reading exception lexicons.
+    """
+
+    def test_read_lexicon(self):
+        """
+        Test whether the words are indexed lowercased with their
+        syllable boundaries.
+        """
+        lines = ["Lesotho Le-so-tho\n", "\n", "ma-ng\n", "yon yon\n"]
+        self.assertEqual(lexicon.read_lexicon(lines),
+                         {"lesotho": [2, 4], "mang": [2], "yon": []})
+        self.assertEqual(lexicon.hyphenated(lexicon.read_lexicon(lines)),
+                         "le-so-tho ma-ng yon")
+        self.assertEqual(lexicon.load(None), {})
+        for line in ["mang ma-n", "ma--ng", "mang ma-ng x"]:
+            with self.assertRaises(ValueError):
+                lexicon.parse_entry(line)
+
+
+class TestDedupe(unittest.TestCase):
+    """
+    This class tests syllabifying every distinct word once.
+    """
+
+    TOKENS = ["mme", "ntate", "mme", "o", "ntate", "mme", "kae", "o"]
+
+    def run_types(self, max_types, type_counts = False):
+        """
+        Run the type mode on TOKENS and return the output and the words
+        that were syllabified.
+        """
+        syllabified = []
+        def syllabify_chunks(chunks):
+            for words in chunks:
+                syllabified.extend(words)
+                yield [word.upper() for word in words]
+        args = argparse.Namespace(chunk_size = 3, max_types = max_types,
+            temp_dir = None, type_counts = type_counts)
+        fp_output = io.StringIO()
+        dedupe.run(io.StringIO("".join(word + "\n" for word in self.TOKENS)),
+                   fp_output, syllabify_chunks, args)
+        return fp_output.getvalue(), syllabified
+
+    def test_tokens(self):
+        """
+        Test whether the tokens are written in their original order, in
+        memory and through temporary files, syllabifying every type once.
+        """
+        expected = "".join(word.upper() + "\n" for word in self.TOKENS)
+        for max_types in (1, 2, 100):
+            output, syllabified = self.run_types(max_types)
+            self.assertEqual(output, expected)
+            self.assertEqual(syllabified, ["kae", "mme", "ntate", "o"])
+
+    def test_type_counts(self):
+        """
+        Test whether the types are written with their counts.
+        """
+        for max_types in (1, 100):
+            output, syllabified = self.run_types(max_types, True)
+            self.assertEqual(output, "kae\t1\tKAE\nmme\t3\tMME\n"
+                                     "ntate\t2\tNTATE\no\t2\tO\n")
+
+
+class TestMapped(unittest.TestCase):
+    """
+    This class tests reading a memory-mapped word list.
+    """
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix = ".txt")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def read(self, content, size):
+        """
+        Write content to the file and return the chunks read from the
+        memory-mapped file and from the file in text mode.
+        """
+        with open(self.filename, "w", newline = "") as fp:
+            fp.write(content)
+        mapped_file = mapped.MappedFile(self.filename)
+        try:
+            chunks = list(mapped_file.chunks(size))
+        finally:
+            mapped_file.close()
+        with open(self.filename, "r") as fp:
+            return chunks, list(streams.read_chunks(fp, size))
+
+    def test_chunks(self):
+        """
+        Test whether the same words are read as in text mode, also with
+        other newlines and whitespace at the right of the lines.
+        """
+        contents = ["mme \nntate\nngwana\no\na", "mme\r\nntate\rngwana\t\n\n",
+                    "  \n\u2028\n o \u00e9\u3000", "\n", "a"]
+        for content in contents:
+            for size in (1, 2, 100):
+                chunks, expected = self.read(content, size)
+                self.assertEqual(sum(chunks, []), sum(expected, []))
+        chunks, expected = self.read("mme\nkae\nbua\nnna\nmme\n", 2)
+        self.assertEqual(chunks, [["mme", "kae"], ["bua", "nna"], ["mme"]])
+        self.assertEqual(self.read("", 2), ([], []))
+
+    def test_ranges(self):
+        """
+        Test whether the byte ranges consist of whole lines and cover
+        the file, the later ranges about as long as the first.
+        """
+        with open(self.filename, "w") as fp:
+            fp.write("mme\nntate\nngwana\no\nkae\nbua")
+        mapped_file = mapped.MappedFile(self.filename)
+        ranges = list(mapped_file.ranges(2))
+        self.assertEqual(ranges, [(0, 10), (10, 19), (19, 26)])
+        self.assertEqual(mapped_file.words(10, 19), ["ngwana", "o"])
+        mapped_file.close()
+
+    def test_chunk_size(self):
+        """
+        Test whether no chunk holds more than size lines when long lines
+        are followed by short ones.
+        """
+        with open(self.filename, "w") as fp:
+            fp.write(("mookotaba" * 20 + "\n") * 100 + "o\n" * 1000 + "a")
+        mapped_file = mapped.MappedFile(self.filename)
+        chunks = list(mapped_file.chunks(100))
+        mapped_file.close()
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 1101)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 100)
+        # Lines that end with "\r" only
+        for newline in ("\r", "\r\n"):
+            chunks, expected = self.read(("mookotaba" + newline) * 10 + ("o" + newline) * 1000, 100)
+            self.assertEqual(sum(chunks, []), sum(expected, []))
+            self.assertLessEqual(max(len(chunk) for chunk in chunks), 100)
+
+
+class TestBoundaries(unittest.TestCase):
+    """
+    This class tests writing and reading the syllable boundaries.
+    """
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix = ".bnd")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_mask(self):
+        """
+        Test the conversion between boundary indices and bitmasks.
+        """
+        self.assertEqual(boundaries.to_mask([1, 3, 70]), 2 + 8 + 2 ** 70)
+        self.assertEqual(boundaries.from_mask(2 + 8 + 2 ** 70), [1, 3, 70])
+        self.assertEqual(boundaries.to_mask([]), 0)
+        self.assertEqual(boundaries.from_mask(0), [])
+
+    def test_pack(self):
+        """
+        Test whether the boundaries of a chunk of words are packed into
+        one bit per letter.
+        """
+        self.assertEqual(boundaries.pack([6, 1, 5], [[2, 4], [], [1, 2, 4]]),
+                         bytes([0b00010100, 0b00001011]))
+        self.assertEqual(boundaries.pack([], []), b"")
+
+    def test_binary(self):
+        """
+        Test whether the boundaries written in chunks to a binary file
+        are read back, also across the bytes and blocks of the file.
+        """
+        words = ["ntate", "", "a", "mme", "ngwana" * 20] * 30
+        found = [[1, 3], [], [], [1, 2], list(range(2, 120, 2))] * 30
+        with open(self.filename, "wb") as fp:
+            writer = boundaries.BoundaryWriter(fp)
+            for start in range(0, len(words), 7):
+                lengths = [len(word) for word in words[start:start + 7]]
+                writer.write(lengths, boundaries.pack(lengths, found[start:start + 7]))
+            writer.close()
+        self.assertEqual(os.path.getsize(self.filename),
+                         boundaries.HEADER.size + 8 * 3 + 2 * 150 +
+                         (30 * 129 + 7) // 8)
+        boundary_file = boundaries.BoundaryFile(self.filename)
+        self.assertEqual(len(boundary_file), len(words))
+        for index, word in enumerate(words):
+            self.assertEqual(boundary_file.lengths[index], len(word))
+            self.assertEqual(boundary_file.boundaries(index), found[index])
+            self.assertEqual(boundary_file.mask(index),
+                             boundaries.to_mask(found[index]))
+        boundary_file.close()
+
+    def test_empty(self):
+        """
+        Test whether a file without words can be written and read, and
+        whether other files are rejected.
+        """
+        with open(self.filename, "wb") as fp:
+            boundaries.BoundaryWriter(fp).close()
+        boundary_file = boundaries.BoundaryFile(self.filename)
+        self.assertEqual(len(boundary_file), 0)
+        boundary_file.close()
+        with open(self.filename, "wb") as fp:
+            fp.write(b"mme\nntate\nngwana\no\nkae\nbua\nmme\n")
+        self.assertRaises(ValueError, boundaries.BoundaryFile, self.filename)
+
+
+class TestServer(unittest.TestCase):
+    """
+    This class tests the syllabification server with a local client.
+    """
+
+    def run_clients(self, address, requests):
+        """
+        Start a server on address that puts brackets around words, send
+        the requests (lists of words) from concurrent clients and return
+        their answers, the sizes of the batches and the metrics.
+        """
+        batches = []
+        def syllabify_many(words):
+            batches.append(len(words))
+            return ["<" + word + ">" for word in words]
+        async def run():
+            stop = asyncio.Event()
+            ready = asyncio.get_running_loop().create_future()
+            task = asyncio.create_task(server.run_server(address,
+                syllabify_many, batch_size = 4, batch_delay = 5,
+                ready = ready.set_result, stop = stop))
+            actual = await ready
+            answers = await asyncio.gather(*[server.request(actual, words)
+                                             for words in requests])
+            stop.set()
+            return answers, await task
+        answers, metrics = asyncio.run(run())
+        return answers, batches, metrics
+
+    def test_tcp(self):
+        """
+        Test whether concurrent clients get their answers in order and
+        their words are batched together.
+        """
+        requests = [["mme", "ntate", "ngwana"], ["o", "a"], ["kae"]]
+        answers, batches, metrics = self.run_clients("127.0.0.1:0", requests)
+        self.assertEqual(answers, [["<" + word + ">" for word in words]
+                                   for words in requests])
+        self.assertEqual(sum(batches), 6)
+        self.assertLessEqual(max(batches), 4)
+        self.assertLess(len(batches), 6)
+        self.assertEqual(metrics["requests"], 6)
+        self.assertGreater(metrics["p99_ms"], 0)
+
+    def test_invalid_utf8(self):
+        """
+        Test whether a line that is not valid UTF-8 is answered and the
+        connection is kept.
+        """
+        answers, batches, metrics = self.run_clients("127.0.0.1:0",
+            [["abc", "\udcff\udcfe", "def"]])
+        self.assertEqual(answers, [["<abc>", "<\ufffd\ufffd>", "<def>"]])
+
+    def test_unix(self):
+        """
+        Test a server on a Unix socket and the metrics request.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "syllabifier.sock")
+            answers, batches, metrics = self.run_clients(address, [["mme"]])
+            self.assertEqual(answers, [["<mme>"]])
+            self.assertFalse(os.path.exists(address))
+            answers, batches, metrics = self.run_clients(address,
+                [["mme", "Lesotho", server.STATS_REQUEST, "o", server.STATS_REQUEST]])
+            # The metrics include (at least) the words sent before the
+            # request, later words may have been in the same batch
+            self.assertGreaterEqual(json.loads(answers[0][2])["requests"], 2)
+            self.assertEqual(json.loads(answers[0][4])["requests"], 3)
+            self.assertEqual(answers[0][3], "<o>")
+        self.assertEqual(server.parse_address("localhost:8080"), ("localhost", 8080))
+        self.assertEqual(server.parse_address("/tmp/a:b"), None)
+        for address in ("localhost:abc", "localhost:", "localhost:65536",
+                        "localhost:\u00b2"):
+            self.assertRaises(ValueError, server.parse_address, address)
+
+
+class TestStats(unittest.TestCase):
+    """
+    This class tests the statistics of a run.
+    """
+
+    def test_phases(self):
+        """
+        Test whether nested phases are timed separately and the word
+        lengths are counted.
+        """
+        statistics = stats.Statistics()
+        chunks = statistics.timed("stats", statistics.count_words(
+            statistics.timed("read", [["mme", "ntate"], ["o"]])))
+        results = list(statistics.timed("syllabify", chunks))
+        self.assertEqual(results, [["mme", "ntate"], ["o"]])
+        self.assertEqual(statistics.call("write", len, results), 2)
+        summary = statistics.summary()
+        self.assertEqual(summary["words"], 3)
+        self.assertEqual(summary["lengths"], {"1": 1, "3": 1, "5": 1})
+        self.assertEqual(set(summary["times"]), set(stats.PHASES))
+        self.assertEqual(statistics.phase, "other")
+        lines = list(statistics.count_words([["Ntate, o kae?\n"]], True))
+        self.assertEqual(statistics.lengths[5], 2)
+        self.assertIn("words: 6\n", stats.format_summary(statistics.summary()))
+
+
+class TestCorpus(unittest.TestCase):
+    """
+    This class tests the synthetic corpus.
+    """
+
+    def test_deterministic(self):
+        """
+        Test whether the same seed gives the same words.
+        """
+        self.assertEqual(corpus.generate_words(100, seed = 1),
+                         corpus.generate_words(100, seed = 1))
+        self.assertEqual(len(corpus.generate_words(100)), 100)
+
+    def test_lengths(self):
+        """
+        Test whether the word lengths follow the distribution.
+        """
+        lengths = corpus.parse_lengths("2:1,4:0")
+        self.assertEqual(lengths, {2: 1.0, 4: 0.0})
+        words = corpus.generate_syllabified(50, lengths = lengths)
+        self.assertEqual(set(len(syllables) for syllables in words), {2})
+        self.assertNotIn(words[0][0], corpus.SYLLABIC)
+        with self.assertRaises(ValueError):
+            corpus.parse_lengths("0:1")
+
+
+
+def main():
+    """
+    This main function starts the unit test main function.
+    """
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
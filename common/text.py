@@ -0,0 +1,37 @@
+"""text.py
+
+This module handles running text (as opposed to one word per line).
+Each line is split into words and the text in between in one pass.
+Only the words are syllabified; punctuation, whitespace and the case
+of the letters are kept exactly as they are.
+"""
+
+import re
+
+# The letters of the words, which are the letters for which is_vowel and
+# is_consonant of the rule-based system return true.  Next to the ASCII
+# letters, this is only the Kelvin sign, which lowercases to k.
+VOWEL_LETTERS = "aeiouAEIOU"
+CONSONANT_LETTERS = "bcdfghjklmnpqrstvwxyzBCDFGHJKLMNPQRSTVWXYZ\u212a"
+LETTERS = VOWEL_LETTERS + CONSONANT_LETTERS
+
+# Splitting on this expression gives the text in between the words at
+# the even positions and the words at the odd positions.
+WORD = re.compile("([" + LETTERS + "]+)")
+
+
+def syllabify_lines(lines, syllabify_many):
+    """Syllabify the words in lines (a list of lines of text, including
+    their newlines) and return the resulting text as one string.
+    syllabify_many is called once with the list of all words in the
+    lines and should return the list of syllabified words.
+    """
+    pieces = [""]
+    for line in lines:
+        split = WORD.split(line)
+        # Keep the words at the odd positions by joining the text at the
+        # end of the previous line with the text at the start of this one
+        pieces[-1] += split[0]
+        pieces.extend(split[1:])
+    pieces[1::2] = syllabify_many(pieces[1::2])
+    return "".join(pieces)
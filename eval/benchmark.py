@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""benchmark.py
+
+This program benchmarks both syllabification systems on a reproducible
+synthetic Sesotho corpus (see common/corpus.py).  It times the rule
+functions of the rule-based system, Hyphenator.hyphenate_word of the
+TeX-based system (with patterns created from the corpus by
+train_patterns.py using sesotho.tr) and complete runs of both
+syllabifier.py scripts.  For every benchmark it reports the words per
+second, the median (p50) and 99th percentile (p99) latency per word and
+the peak memory use (resident set size).  The results can be saved as
+JSON and compared to earlier results, so regressions between commits
+are easy to spot.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import cross_validate
+import hyphenate
+import train_patterns as trainer
+
+EVAL_DIR = cross_validate.EVAL_DIR
+sys.path.insert(0, os.path.join(EVAL_DIR, os.pardir, "common"))
+import corpus
+
+# Benchmarks that run within a (fresh) Python process
+IN_PROCESS = ["rule syllabify", "rule syllabify_compiled", "tex hyphenate_word"]
+# Benchmarks that run the syllabifier.py scripts (with the given
+# arguments)
+CLI = ["rule syllabifier.py", "rule syllabifier.py --mmap",
+       "rule syllabifier.py --format binary",
+       "tex syllabifier.py", "tex syllabifier.py --mmap",
+       "tex syllabifier.py --format binary"]
+
+
+def peak_rss(usage):
+    """Return the peak resident set size in megabytes from usage (as
+    returned by resource.getrusage or os.wait4).
+    """
+    if sys.platform == "darwin":
+        return usage.ru_maxrss / (1024 * 1024) # bytes
+    return usage.ru_maxrss / 1024 # kilobytes
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (between 0 and 1) of the sorted
+    values (nearest rank).
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def word_function(name, patterns):
+    """Return the function that is applied to every word by the named
+    in-process benchmark.
+    """
+    if name == "rule syllabify":
+        return cross_validate.rule_syllabifier.syllabify
+    if name == "rule syllabify_compiled":
+        return cross_validate.rule_syllabifier.syllabify_compiled
+    return hyphenate.Hyphenator(patterns).hyphenate_word
+
+
+def run_in_process(task):
+    """Run the named in-process benchmark on words (in a worker process
+    of its own, so its peak memory use can be measured) and return its
+    results.  The throughput is the best of repeat runs; the latency of
+    every word is measured in a separate run.
+    """
+    name, words, patterns, repeat = task
+    function = word_function(name, patterns)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in words:
+            function(word)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    clock = time.perf_counter_ns
+    latencies = []
+    for word in words:
+        start = clock()
+        function(word)
+        latencies.append(clock() - start)
+    latencies.sort()
+    return {
+        "name": name,
+        "words": len(words),
+        "seconds": best,
+        "words_per_second": len(words) / best,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "peak_rss_mb": peak_rss(resource.getrusage(resource.RUSAGE_SELF)),
+    }
+
+
+def run_cli(name, words_file, patterns_file, output_file, count, repeat):
+    """Run the named syllabifier.py script repeat times on words_file and
+    return its results (the best wall clock time and the largest peak
+    memory use).  There is no latency per word for these runs.
+    """
+    system = name.split()[0]
+    command = [sys.executable, os.path.join(EVAL_DIR, os.pardir, system, "syllabifier.py"),
+               "-i", words_file, "-o", output_file] + name.split()[2:]
+    if system == "tex":
+        command += ["-p", patterns_file]
+    best = None
+    rss = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen(command)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command)
+        rss = max(rss, peak_rss(usage))
+        if best == None or elapsed < best:
+            best = elapsed
+    return {
+        "name": name,
+        "words": count,
+        "seconds": best,
+        "words_per_second": count / best,
+        "p50_us": None,
+        "p99_us": None,
+        "peak_rss_mb": rss,
+    }
+
+
+def train(syllabified, translate):
+    """Create patterns from the syllabified words (lists of syllables)
+    with train_patterns.py and return them as a string, and the time
+    the training took.
+    """
+    start = time.perf_counter()
+    left_min, right_min, forms, alphabet = trainer.read_translate(translate)
+    words = trainer.read_dictionary(["*".join(syllables) for syllables in syllabified], forms)
+    patterns = cross_validate.format_patterns(trainer.train(words,
+        trainer.SCHEDULE, left_min + 1, right_min + 1))
+    return patterns, time.perf_counter() - start
+
+
+def git_commit():
+    """Return the current git commit of the repository (or None)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd = EVAL_DIR,
+            check = True, capture_output = True, text = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline = None):
+    """Print the results (and the change in words per second compared
+    to the results with the same name in baseline).
+    """
+    previous = {}
+    if baseline != None:
+        previous = dict((result["name"], result) for result in baseline["results"])
+    print("%-34s %12s %10s %10s %10s %8s" % ("benchmark", "words/s",
+        "p50 us", "p99 us", "RSS MB", "change"))
+    for result in results:
+        latency = ["%10s" % "-"] * 2
+        if result["p50_us"] != None:
+            latency = ["%10.2f" % result["p50_us"], "%10.2f" % result["p99_us"]]
+        change = ""
+        if result["name"] in previous:
+            change = "%+7.1f%%" % (100 * (result["words_per_second"] /
+                previous[result["name"]]["words_per_second"] - 1))
+        print("%-34s %12.0f %s %s %10.1f %8s" % (result["name"],
+            result["words_per_second"], latency[0], latency[1],
+            result["peak_rss_mb"], change))
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the corpus
+    is generated, the patterns are created, the benchmarks are run and
+    the results are printed and saved.
+    """
+
+    parser = argparse.ArgumentParser(description="This program benchmarks both syllabification systems on a synthetic Sesotho corpus and reports the words per second, latency per word and peak memory use.")
+    parser.add_argument("-n", "--count",
+        help = "number of words in the corpus (default: 100000)",
+        action = "store",
+        type = int,
+        default = 100000,
+        metavar = "N")
+    parser.add_argument("-l", "--lengths",
+        help = "distribution of the word lengths in syllables as LENGTH:WEIGHT,... (default: 1:10,2:25,3:30,4:20,5:10,6:5)",
+        action = "store",
+        default = "1:10,2:25,3:30,4:20,5:10,6:5",
+        metavar = "DIST")
+    parser.add_argument("-s", "--seed",
+        help = "seed of the corpus (default: 0)",
+        action = "store",
+        type = int,
+        default = 0,
+        metavar = "N")
+    parser.add_argument("--train-count",
+        help = "number of words (from a corpus with another seed) used to create the patterns (default: 10000)",
+        action = "store",
+        type = int,
+        default = 10000,
+        metavar = "N")
+    parser.add_argument("--translate",
+        help = "name of patgen translate file (default: tex/sesotho.tr)",
+        action = "store",
+        default = os.path.join(cross_validate.TEX_DIR, "sesotho.tr"),
+        metavar = "FILE")
+    parser.add_argument("-r", "--repeat",
+        help = "number of times every benchmark is run, the best run counts (default: 3)",
+        action = "store",
+        type = int,
+        default = 3,
+        metavar = "N")
+    parser.add_argument("--no-cli",
+        help = "do not run the syllabifier.py scripts",
+        action = "store_true")
+    parser.add_argument("--cli-only",
+        help = "only run the syllabifier.py scripts, for instance on a large corpus",
+        action = "store_true")
+    parser.add_argument("-o", "--output",
+        help = "name of JSON file to save the results to",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-c", "--compare",
+        help = "name of JSON file with earlier results to compare to",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.count < 1 or args.train_count < 1:
+        parser.error("The number of words should be at least 1.")
+    if args.repeat < 1:
+        parser.error("The number of repeats should be at least 1.")
+    if args.cli_only and args.no_cli:
+        parser.error("Nothing to run with both --cli-only and --no-cli.")
+    try:
+        lengths = corpus.parse_lengths(args.lengths)
+    except ValueError as error:
+        parser.error(str(error))
+    baseline = None
+    if args.compare != None:
+        with open(args.compare, "r") as fp:
+            baseline = json.load(fp)
+
+    words = corpus.generate_words(args.count, args.seed, lengths = lengths)
+    patterns, training = train(corpus.generate_syllabified(args.train_count,
+        args.seed + 1, lengths = lengths), args.translate)
+    logging.debug("Created %d patterns in %.1f s", len(patterns.split()), training)
+
+    in_process = IN_PROCESS
+    if args.cli_only:
+        in_process = []
+    results = []
+    for name in in_process:
+        logging.debug("Running %s", name)
+        with multiprocessing.Pool(1) as pool:
+            results.append(pool.apply(run_in_process,
+                ((name, words, patterns, args.repeat),)))
+
+    if not args.no_cli:
+        with tempfile.TemporaryDirectory() as directory:
+            words_file = os.path.join(directory, "words.txt")
+            patterns_file = os.path.join(directory, "train.pat")
+            with open(words_file, "w") as fp:
+                fp.write("".join(word + "\n" for word in words))
+            with open(patterns_file, "w") as fp:
+                fp.write("\\patterns{" + "\n".join(patterns.split()) + "\n}\n")
+            # The scripts are started from a fresh interpreter, as a child
+            # process inherits the peak memory use of the process it is
+            # forked from
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                for name in CLI:
+                    logging.debug("Running %s", name)
+                    results.append(pool.apply(run_cli, (name, words_file,
+                        patterns_file, os.path.join(directory, "output.txt"),
+                        len(words), args.repeat)))
+
+    report(results, baseline)
+    if args.output != None:
+        with open(args.output, "w") as fp:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "count": args.count,
+                "lengths": args.lengths,
+                "seed": args.seed,
+                "train_count": args.train_count,
+                "training_seconds": training,
+                "repeat": args.repeat,
+                "results": results,
+            }, fp, indent = 2)
+            fp.write("\n")
+
+
+if __name__ == '__main__':
+    main()
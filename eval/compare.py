@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""compare.py
+
+This program syllabifies a list of words (one per line) with both the
+rule-based and the TeX-based system in one pass.  The input is read
+once and every chunk of words is handed to both systems (in worker
+processes if requested).  For every word, the output contains the word,
+the syllabification of both systems and whether they agree, separated
+by tabs.  At the end, a summary of the disagreements is printed (or
+written as JSON), so no separate diff of two output files is needed.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import sys
+import cross_validate
+import hyphenate
+import lexicon
+import parallel
+import streams
+
+rule_syllabifier = cross_validate.rule_syllabifier
+tex_syllabifier = cross_validate.tex_syllabifier
+
+# Flags in the last column of the output
+AGREE = "agree"
+DISAGREE = "disagree"
+
+# Number of most frequent disagreements listed in the summary
+TOP = 20
+
+
+def boundaries(syl_word):
+    """Return the set of letter indices at which the syllabified word
+    (syllables separated by spaces) has a syllable boundary.
+    """
+    result = set()
+    index = 0
+    for syllable in syl_word.split(" ")[:-1]:
+        index += len(syllable)
+        result.add(index)
+    return result
+
+
+def compare_many(words, engine, syllabifier, exceptions = None):
+    """Syllabify the words with the named engine of the rule-based
+    system (using the exception lexicon, if any) and with syllabifier
+    (a Hyphenator) and return the two lists of syllabified words.
+    """
+    return (rule_syllabifier.syllabify_many(words, engine, exceptions = exceptions),
+            tex_syllabifier.syllabify_many(words, syllabifier))
+
+
+# Engine, exceptions and syllabifier used in a worker process (see
+# init_worker)
+worker_engine = None
+worker_exceptions = None
+worker_syllabifier = None
+
+def init_worker(args):
+    """Set up a worker process: remember the engine of the rule-based
+    system, read the exception lexicon and create the syllabifier of the
+    TeX-based system (once per worker).
+    """
+    global worker_engine, worker_exceptions, worker_syllabifier
+    worker_engine = args.engine
+    worker_exceptions = lexicon.load(args.exceptions)
+    worker_syllabifier = tex_syllabifier.make_syllabifier(args, None)
+
+def compare_chunk(words):
+    """Apply compare_many to a chunk of words in a worker process."""
+    return words, compare_many(words, worker_engine, worker_syllabifier,
+        worker_exceptions)
+
+
+def new_summary():
+    """Return an empty summary of the disagreements."""
+    return {
+        "counts": collections.Counter(),
+        "disagreements": collections.Counter(),
+    }
+
+
+def add_to_summary(summary, words, rule, tex):
+    """Add the words and their syllabifications by both systems to the
+    summary and return the list of agreement flags of the words.
+    """
+    counts = summary["counts"]
+    flags = []
+    for word, rule_word, tex_word in zip(words, rule, tex):
+        counts["words"] += 1
+        if rule_word == tex_word:
+            flags.append(AGREE)
+            continue
+        flags.append(DISAGREE)
+        counts["disagree"] += 1
+        rule_boundaries = boundaries(rule_word)
+        tex_boundaries = boundaries(tex_word)
+        counts["rule_only_boundaries"] += len(rule_boundaries - tex_boundaries)
+        counts["tex_only_boundaries"] += len(tex_boundaries - rule_boundaries)
+        summary["disagreements"][word, rule_word, tex_word] += 1
+    return flags
+
+
+def format_summary(summary):
+    """Return the summary as a dictionary that can be written as JSON."""
+    counts = summary["counts"]
+    words = counts["words"]
+    return {
+        "words": words,
+        "agree": words - counts["disagree"],
+        "disagree": counts["disagree"],
+        "agreement": (words - counts["disagree"]) / words if words else 0.0,
+        "distinct_disagreements": len(summary["disagreements"]),
+        "rule_only_boundaries": counts["rule_only_boundaries"],
+        "tex_only_boundaries": counts["tex_only_boundaries"],
+        "most_frequent": [{"word": word, "rule": rule_word, "tex": tex_word,
+            "count": count} for (word, rule_word, tex_word), count
+            in summary["disagreements"].most_common(TOP)],
+    }
+
+
+def report(summary, filename):
+    """Print the summary to standard error (filename -) or write it as
+    JSON to filename.
+    """
+    summary = format_summary(summary)
+    if filename != "-":
+        with open(filename, "w") as fp:
+            json.dump(summary, fp, indent = 2)
+            fp.write("\n")
+        return
+    lines = ["words: %d" % summary["words"],
+        "agree: %d (%.4f)" % (summary["agree"], summary["agreement"]),
+        "disagree: %d (%d distinct)" % (summary["disagree"],
+            summary["distinct_disagreements"]),
+        "boundaries only placed by rule: %d" % summary["rule_only_boundaries"],
+        "boundaries only placed by tex: %d" % summary["tex_only_boundaries"]]
+    for entry in summary["most_frequent"]:
+        lines.append("%6d %s\t%s\t%s" % (entry["count"], entry["word"],
+            entry["rule"], entry["tex"]))
+    sys.stderr.write("".join(line + "\n" for line in lines))
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the input
+    is read in chunks, every chunk is syllabified by both systems and
+    the results are written to output, followed by the summary.
+    """
+
+    parser = argparse.ArgumentParser(description="This program reads in a list of words, one per line, syllabifies them with both the rule-based and the TeX-based system and writes the word, both syllabifications and whether they agree to the output file.")
+    parser.add_argument("-i", "--input",
+        help = "name of text file containing input words (- for standard input)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-o", "--output",
+        help = "name of output file (- for standard output)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-e", "--engine",
+        help = "syllabification engine of the rule-based system (default: compiled)",
+        action = "store",
+        choices = sorted(rule_syllabifier.ENGINES),
+        default = "compiled")
+    parser.add_argument("-p", "--patterns",
+        help = "name of patterns file of the TeX-based system",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-t", "--trie",
+        help = "name of compiled patterns file (see compile_patterns.py), used instead of --patterns",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-b", "--backend",
+        help = "pattern trie backend to use, not with --trie (default: dict)",
+        action = "store",
+        choices = hyphenate.BACKENDS)
+    parser.add_argument("-a", "--alphabet",
+        help = "name of patgen translate file (e.g., sesotho.tr) defining the letter codes of the array backend, not with --trie",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("--disagreements",
+        help = "only write the words on which the systems disagree",
+        action = "store_true")
+    parser.add_argument("-s", "--summary",
+        help = "name of JSON file to write the summary of the disagreements to (default: print it to standard error)",
+        action = "store",
+        default = "-",
+        metavar = "FILE")
+    lexicon.add_arguments(parser)
+    parallel.add_arguments(parser)
+    streams.add_arguments(parser)
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.input == None:
+        parser.error("An input filename is required.")
+    streams.check_arguments(parser, args)
+    fp_input = streams.open_input(args.input, args.buffer_size)
+
+    if args.output == None:
+        parser.error("An output filename is required.")
+    fp_output = streams.open_output(args.output, args.buffer_size)
+
+    tex_syllabifier.check_patterns_arguments(parser, args)
+    if args.jobs < 1:
+        parser.error("The number of jobs should be at least 1.")
+    try:
+        exceptions = lexicon.load(args.exceptions)
+    except ValueError as error:
+        parser.error(str(error))
+
+    chunks = streams.read_chunks(fp_input, args.chunk_size)
+    if args.jobs > 1:
+        results = parallel.map_chunks(compare_chunk, chunks, args.jobs,
+            init_worker, (args,))
+    else:
+        syllabifier = tex_syllabifier.make_syllabifier(args, None)
+        results = ((words, compare_many(words, args.engine, syllabifier,
+                    exceptions))
+                   for words in chunks)
+
+    summary = new_summary()
+    for words, (rule, tex) in results:
+        flags = add_to_summary(summary, words, rule, tex)
+        streams.write_chunk(fp_output, ["\t".join(fields) for fields
+            in zip(words, rule, tex, flags)
+            if not args.disagreements or fields[3] == DISAGREE])
+
+    report(summary, args.summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""cross_validate.py
+
+This program performs k-fold cross validation of the rule-based and
+TeX-based syllabification systems, like do_all.sh, but within one
+Python process.  The annotated data is shuffled and split into folds
+in memory, both systems are run in-process (the patterns of the
+TeX-based system are created by patgen, through make_full_patterns.sh,
+or by train_patterns.py) and the folds are handled in parallel by a
+pool of worker processes.  The results are written to the same CSV
+(with the scores of scoring.py) and .errors files as do_all.sh.
+"""
+
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+EVAL_DIR = os.path.dirname(os.path.abspath(__file__))
+RULE_DIR = os.path.join(EVAL_DIR, os.pardir, "rule")
+TEX_DIR = os.path.join(EVAL_DIR, os.pardir, "tex")
+
+
+def load_module(name, filename):
+    """Load the Python file filename as a module called name.  This is
+    needed because both systems are called syllabifier.py.
+    """
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+sys.path.insert(0, TEX_DIR) # for the hyphenate module
+rule_syllabifier = load_module("rule_syllabifier", os.path.join(RULE_DIR, "syllabifier.py"))
+tex_syllabifier = load_module("tex_syllabifier", os.path.join(TEX_DIR, "syllabifier.py"))
+import hyphenate
+import train_patterns as trainer
+import scoring
+
+SYSTEMS = ("tex", "rule")
+TRAINERS = ("patgen", "python", "shared")
+
+
+def read_annotated(filename):
+    """Read the annotated data (lines containing a word, a space and
+    the word with syllables separated by dashes) and return the list of
+    annotated words in patgen format (syllables separated by *).
+    """
+    annotated = []
+    with open(filename, "r") as fp:
+        for line in fp:
+            line = line.rstrip() # also removes DOS line endings
+            if line:
+                annotated.append(line.split(" ")[-1].replace("-", "*"))
+    return annotated
+
+
+def split_folds(annotated, folds):
+    """Split the annotated words round robin into folds lists, like
+    split -n r/folds does.
+    """
+    return [annotated[fold::folds] for fold in range(folds)]
+
+
+def format_patterns(patterns):
+    """Return patterns created by train_patterns.py as a string."""
+    return " ".join(trainer.format_pattern(letters, values)
+                    for letters, values in patterns.items() if values)
+
+
+def train_patterns(train, translate, method = "patgen"):
+    """Create TeX patterns from the training words (in patgen format)
+    using make_full_patterns.sh (method patgen) or train_patterns.py
+    (method python) and return them as a string.
+    """
+    if method == "python":
+        left_min, right_min, forms, alphabet = trainer.read_translate(translate)
+        return format_patterns(trainer.train(trainer.read_dictionary(train, forms),
+            trainer.SCHEDULE, left_min + 1, right_min + 1))
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "train.dict"), "w") as fp:
+            fp.write("".join(word + "\n" for word in train))
+        subprocess.run([os.path.join(TEX_DIR, "make_full_patterns.sh"),
+            "train", translate], cwd = directory, check = True,
+            stdout = subprocess.DEVNULL)
+        with open(os.path.join(directory, "train.pat"), "r") as fp:
+            return tex_syllabifier.read_patterns(fp)
+
+
+def train_shared(folds, translate):
+    """Create the TeX patterns of all folds at once with train_folds of
+    train_patterns.py (method shared) and return them as a list of
+    strings.
+    """
+    left_min, right_min, forms, alphabet = trainer.read_translate(translate)
+    segments = [trainer.read_dictionary(fold, forms) for fold in folds]
+    return [format_patterns(patterns) for patterns in trainer.train_folds(
+        segments, trainer.SCHEDULE, left_min + 1, right_min + 1)]
+
+
+def run_fold(task):
+    """Train and test the systems on one fold and return a dictionary
+    containing the gold syllabifications and those of each system.
+    """
+    fold, train, test, systems, translate, method, patterns = task
+    gold = [word.replace("*", " ") for word in test]
+    plain = [word.replace(" ", "") for word in gold]
+    result = {"fold": fold, "gold": gold}
+    if "tex" in systems:
+        if patterns == None:
+            patterns = train_patterns(train, translate, method)
+        syllabifier = hyphenate.Hyphenator(patterns)
+        result["tex"] = tex_syllabifier.syllabify_many(plain, syllabifier)
+    if "rule" in systems:
+        result["rule"] = rule_syllabifier.syllabify_many(plain)
+    logging.debug("Finished fold %d", fold)
+    return result
+
+
+def diff_lines(gold, predicted):
+    """Return the differences between the gold and predicted lines (of
+    equal length) in the normal format of diff.
+    """
+    output = []
+    index = 0
+    while index < len(gold):
+        if gold[index] == predicted[index]:
+            index += 1
+            continue
+        end = index
+        while end < len(gold) and gold[end] != predicted[end]:
+            end += 1
+        lines = str(index + 1) if end == index + 1 else "%d,%d" % (index + 1, end)
+        output.append("%sc%s\n" % (lines, lines))
+        output.extend("< " + line + "\n" for line in gold[index:end])
+        output.append("---\n")
+        output.extend("> " + line + "\n" for line in predicted[index:end])
+        index = end
+    return output
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the folds
+    are created, the systems are trained and tested on every fold and
+    the results are written.
+    """
+
+    parser = argparse.ArgumentParser(description="This program performs cross validation of the syllabification systems on annotated data and writes the accuracy per system and fold to a CSV file.")
+    parser.add_argument("-i", "--input",
+        help = "name of text file containing annotated data",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-o", "--output",
+        help = "name of CSV output file (default: input basename with .accuracy.csv)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-b", "--breakdown",
+        help = "name of CSV file to write the scores per word length, position and context to (default: none)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-k", "--folds",
+        help = "number of folds (default: 10)",
+        action = "store",
+        type = int,
+        default = 10,
+        metavar = "N")
+    parser.add_argument("-j", "--jobs",
+        help = "number of folds handled in parallel (default: 8)",
+        action = "store",
+        type = int,
+        default = 8,
+        metavar = "N")
+    parser.add_argument("-s", "--seed",
+        help = "seed for shuffling the data (default: random)",
+        action = "store",
+        type = int,
+        metavar = "N")
+    parser.add_argument("--systems",
+        help = "systems to evaluate (default: tex,rule)",
+        action = "store",
+        default = ",".join(SYSTEMS),
+        metavar = "LIST")
+    parser.add_argument("--translate",
+        help = "name of patgen translate file (default: tex/sesotho.tr)",
+        action = "store",
+        default = os.path.join(TEX_DIR, "sesotho.tr"),
+        metavar = "FILE")
+    parser.add_argument("--trainer",
+        help = "program creating the TeX patterns: patgen (through make_full_patterns.sh), python (train_patterns.py, no patgen needed) or shared (train_patterns.py, all folds at once) (default: patgen)",
+        action = "store",
+        choices = TRAINERS,
+        default = "patgen")
+    parser.add_argument("--errors-dir",
+        help = "directory in which the .errors files are written (default: current directory)",
+        action = "store",
+        default = ".",
+        metavar = "DIR")
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.input == None:
+        parser.error("An input filename is required.")
+    if args.output == None:
+        args.output = os.path.basename(args.input)
+        if args.output.endswith(".txt"):
+            args.output = args.output[:-len(".txt")]
+        args.output += ".accuracy.csv"
+    systems = args.systems.split(",")
+    for system in systems:
+        if system not in SYSTEMS:
+            parser.error("Unknown system " + system)
+    if args.folds < 2:
+        parser.error("At least two folds are required.")
+    if args.jobs < 1:
+        parser.error("The number of jobs should be at least 1.")
+
+    annotated = read_annotated(args.input)
+    random.Random(args.seed).shuffle(annotated)
+    folds = split_folds(annotated, args.folds)
+    translate = os.path.abspath(args.translate)
+    patterns = [None] * args.folds
+    if "tex" in systems and args.trainer == "shared":
+        patterns = train_shared(folds, translate)
+    tasks = []
+    for fold in range(args.folds):
+        train = [word for other in range(args.folds) if other != fold
+                 for word in folds[other]]
+        tasks.append((fold, train, folds[fold], systems, translate,
+            args.trainer, patterns[fold]))
+
+    with multiprocessing.Pool(min(args.jobs, args.folds)) as pool:
+        results = pool.map(run_fold, tasks)
+
+    zeros = max(3, len(str(args.folds - 1)))
+    scores = {}
+    for result in results:
+        for system in systems:
+            scores[result["fold"], system] = scoring.score(result["gold"], result[system])
+
+    with open(args.output, "w") as fp:
+        fp.write(",".join(["system", "fold"] + scoring.COLUMNS) + "\n")
+        for result in results:
+            fold = "%0*d" % (zeros, result["fold"])
+            for system in SYSTEMS:
+                if system in result:
+                    fp.write(",".join([system, fold] +
+                        scoring.csv_fields(scores[result["fold"], system])) + "\n")
+
+    if args.breakdown != None:
+        with open(args.breakdown, "w") as fp:
+            fp.write(",".join(["system", "fold"] + scoring.BREAKDOWN_COLUMNS) + "\n")
+            for result in results:
+                fold = "%0*d" % (zeros, result["fold"])
+                for system in SYSTEMS:
+                    if system in result:
+                        for row in scoring.breakdown_rows(scores[result["fold"], system]):
+                            fp.write(",".join([system, fold] + row) + "\n")
+
+    for system in systems:
+        with open(os.path.join(args.errors_dir, system + "syll.errors"), "w") as fp:
+            fp.write("\n")
+            for result in results:
+                fp.write("fold %0*d\n" % (zeros, result["fold"]))
+                fp.writelines(diff_lines(result["gold"], result[system]))
+
+
+if __name__ == '__main__':
+    main()
@@ -35,19 +35,21 @@ let seq_end=${bins}-1;
     #    `seq -f "%0${zeros}g" 0 ${seq_end}`
 
 # Clean output file and add header
-echo "system,fold,error,total,accuracy" > ${output}
+echo "system,fold,`./scoring.py --header`" > ${output}
 for fold in `seq -f "%0${zeros}g" 0 ${seq_end}`; do
     # Handle texsyll
-    let error=`diff ${splitdir}/data${fold}/test.gold ${splitdir}/data${fold}/test.texsyll | grep -c "^<"`
-    let total=`cat ${splitdir}/data${fold}/test.texsyll | wc -l`
-    echo -n "tex,${fold},${error},${total}," >> ${output}
-    echo "(${total} - ${error}) / ${total}" | bc -l >> ${output}
+    echo -n "tex,${fold}," >> ${output}
+    ./scoring.py \
+        -g ${splitdir}/data${fold}/test.gold \
+        -p ${splitdir}/data${fold}/test.texsyll \
+        >> ${output}
 
     # Handle rules
-    let error=`diff ${splitdir}/data${fold}/test.gold ${splitdir}/data${fold}/test.rulesyll | grep -c "^<"`
-    let total=`cat ${splitdir}/data${fold}/test.rulesyll | wc -l`
-    echo -n "rule,${fold},${error},${total}," >> ${output}
-    echo "(${total} - ${error}) / ${total}" | bc -l >> ${output}
+    echo -n "rule,${fold}," >> ${output}
+    ./scoring.py \
+        -g ${splitdir}/data${fold}/test.gold \
+        -p ${splitdir}/data${fold}/test.rulesyll \
+        >> ${output}
 done
 
 # Extract errors
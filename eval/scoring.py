@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""scoring.py
+
+This program (and module) scores syllabified words against the gold
+standard syllabifications.  Besides the word accuracy, it computes the
+precision, recall and F1 score of the syllable boundaries, also broken
+down by word length, by position in the word and by the letter context
+of the boundary (the cases handled by C_rule of the rule-based system).
+The syllable boundaries of all words (of a fold) are packed into NumPy
+bit arrays with one row per word, so all scores are computed by a few
+vectorized operations at once.
+"""
+
+import argparse
+import logging
+import numpy as np
+
+# Letter contexts of the syllable boundaries: the name, the letters
+# before and the letters after the boundary position.
+CONTEXTS = [
+    ("mm", "m", "m"),
+    ("nn", "n", "n"),
+    ("ll", "l", "l"),
+    ("ng", "ng", ""),
+    ("ny", "ny", ""),
+]
+
+# Columns of the accuracy CSV file after the system and fold
+COLUMNS = (["error", "total", "accuracy", "precision", "recall", "f1"] +
+           [name + "_f1" for name, before, after in CONTEXTS])
+
+# Number of bits set in every byte value
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype = np.int64)
+
+
+def encode(words):
+    """Encode the syllabified words (syllable boundaries indicated by
+    spaces) and return the letters (lowercased ASCII codes, one row per
+    word, padded with zeros), the number of letters of every word and
+    the boundaries (bit p of a row is set when there is a boundary
+    before letter p) packed into bytes.
+    """
+    text = "".join(word + "\n" for word in words).lower()
+    data = np.frombuffer(text.encode("ascii", "replace"), dtype = np.uint8)
+    newline = data == ord("\n")
+    space = data == ord(" ")
+    letter = ~(newline | space)
+    # The row of every byte, the newline belongs to the word before it
+    row = (np.cumsum(newline) - newline)[letter]
+    lengths = np.bincount(row, minlength = len(words))
+    starts = np.cumsum(lengths) - lengths
+    column = np.arange(len(row)) - starts[row]
+    width = max(1, int(lengths.max()) if len(words) else 1)
+    letters = np.zeros((len(words), width), dtype = np.uint8)
+    letters[row, column] = data[letter]
+    boundaries = np.zeros((len(words), width), dtype = bool)
+    after_space = np.concatenate(([False], space[:-1]))[letter]
+    boundaries[row, column] = after_space & (column > 0)
+    return letters, lengths, np.packbits(boundaries, axis = 1)
+
+
+def popcount(packed):
+    """Return the number of bits set in every row of packed."""
+    return POPCOUNT[packed].sum(axis = 1)
+
+
+def context_masks(letters, lengths):
+    """Return a dictionary mapping the name of every context in CONTEXTS
+    to the (packed) positions within the words (not before the first or
+    after the last letter) where it occurs.
+    """
+    positions = np.arange(letters.shape[1])
+    inside = (positions > 0) & (positions[np.newaxis, :] < lengths[:, np.newaxis])
+    masks = {}
+    for name, before, after in CONTEXTS:
+        mask = inside.copy()
+        for offset, char in enumerate(before[::-1]):
+            # Letter offset + 1 positions to the left of the boundary
+            shifted = np.zeros(letters.shape, dtype = bool)
+            shifted[:, offset + 1:] = letters[:, :letters.shape[1] - offset - 1] == ord(char)
+            mask &= shifted
+        for offset, char in enumerate(after):
+            shifted = np.zeros(letters.shape, dtype = bool)
+            shifted[:, :letters.shape[1] - offset] = letters[:, offset:] == ord(char)
+            mask &= shifted
+        masks[name] = np.packbits(mask, axis = 1)
+    return masks
+
+
+def pad(packed, width):
+    """Return packed with zero columns added up to width columns."""
+    return np.pad(packed, ((0, 0), (0, width - packed.shape[1])))
+
+
+def score(gold, predicted):
+    """Score the predicted syllabifications against the gold ones (two
+    lists of syllabified words in the same order) and return a
+    dictionary with the total numbers of words, correct words, correct
+    boundaries (tp), gold boundaries and predicted boundaries, and the
+    same numbers per word length ("lengths", arrays indexed by length),
+    per position ("positions", arrays indexed by the letter after the
+    boundary) and per context ("contexts", a dictionary from context
+    names to (tp, gold, predicted) triples).  "errors" holds the false
+    negatives and false positives per word length and position as two
+    matrices.
+    """
+    if len(gold) != len(predicted):
+        raise ValueError("The number of gold and predicted words differ")
+    gold_letters, lengths, gold_boundaries = encode(gold)
+    predicted_letters, predicted_lengths, predicted_boundaries = encode(predicted)
+    width = max(gold_letters.shape[1], predicted_letters.shape[1])
+    same_letters = ((pad(gold_letters, width) == pad(predicted_letters, width)).all(axis = 1) &
+                    (lengths == predicted_lengths))
+    packed_width = max(gold_boundaries.shape[1], predicted_boundaries.shape[1])
+    gold_boundaries = pad(gold_boundaries, packed_width)
+    predicted_boundaries = pad(predicted_boundaries, packed_width)
+    found = gold_boundaries & predicted_boundaries
+    correct = same_letters & (gold_boundaries == predicted_boundaries).all(axis = 1)
+    tp = popcount(found)
+    gold_count = popcount(gold_boundaries)
+    predicted_count = popcount(predicted_boundaries)
+
+    size = int(lengths.max()) + 1 if len(gold) else 1
+    def by_length(values):
+        return np.bincount(lengths, weights = values, minlength = size).astype(np.int64)
+
+    bits = packed_width * 8
+    found_bits = np.unpackbits(found, axis = 1, count = bits)
+    gold_bits = np.unpackbits(gold_boundaries, axis = 1, count = bits)
+    predicted_bits = np.unpackbits(predicted_boundaries, axis = 1, count = bits)
+    # Index of every bit in a (word length, position) matrix
+    cells = (lengths[:, np.newaxis] * bits + np.arange(bits)).ravel()
+    def by_length_position(values):
+        return np.bincount(cells, weights = values.ravel(),
+            minlength = size * bits).astype(np.int64).reshape(size, bits)
+    false_negatives = by_length_position(gold_bits & ~found_bits)
+    false_positives = by_length_position(predicted_bits & ~found_bits)
+
+    contexts = {}
+    for name, mask in context_masks(gold_letters, lengths).items():
+        mask = pad(mask, packed_width)
+        contexts[name] = (int(popcount(found & mask).sum()),
+                          int(popcount(gold_boundaries & mask).sum()),
+                          int(popcount(predicted_boundaries & mask).sum()))
+
+    return {
+        "words": len(gold),
+        "correct": int(correct.sum()),
+        "tp": int(tp.sum()),
+        "gold": int(gold_count.sum()),
+        "predicted": int(predicted_count.sum()),
+        "lengths": {
+            "words": by_length(None),
+            "correct": by_length(correct),
+            "tp": by_length(tp),
+            "gold": by_length(gold_count),
+            "predicted": by_length(predicted_count),
+        },
+        "positions": {
+            "tp": found_bits.sum(axis = 0, dtype = np.int64),
+            "gold": gold_bits.sum(axis = 0, dtype = np.int64),
+            "predicted": predicted_bits.sum(axis = 0, dtype = np.int64),
+        },
+        "contexts": contexts,
+        "errors": (false_negatives, false_positives),
+    }
+
+
+def format_accuracy(correct, total):
+    """Format correct / total the way bc -l does (20 decimals, no
+    leading zero).
+    """
+    if total == 0:
+        return "0"
+    scaled = correct * 10 ** 20 // total # bc truncates
+    if scaled == 0:
+        return "0"
+    accuracy = "%d.%020d" % (scaled // 10 ** 20, scaled % 10 ** 20)
+    if accuracy.startswith("0."):
+        accuracy = accuracy[1:]
+    return accuracy
+
+
+def prf(tp, gold, predicted):
+    """Return the precision, recall and F1 score (formatted) of tp
+    correct out of gold and predicted boundaries.
+    """
+    return [format_accuracy(tp, predicted), format_accuracy(tp, gold),
+            format_accuracy(2 * tp, gold + predicted)]
+
+
+def csv_fields(scores):
+    """Return the values of COLUMNS for scores (as returned by score)."""
+    fields = [str(scores["words"] - scores["correct"]), str(scores["words"]),
+              format_accuracy(scores["correct"], scores["words"])]
+    fields += prf(scores["tp"], scores["gold"], scores["predicted"])
+    for name, before, after in CONTEXTS:
+        fields.append(prf(*scores["contexts"][name])[2])
+    return fields
+
+
+def breakdown_rows(scores):
+    """Return the rows (lists of fields) of the breakdown of scores by
+    word length, position and context: the breakdown, its value, the
+    numbers of words, correct words, correct, gold and predicted
+    boundaries and the precision, recall and F1 score.  The numbers of
+    words are empty for positions and contexts.
+    """
+    rows = []
+    lengths = scores["lengths"]
+    for length in np.flatnonzero(lengths["words"]):
+        counts = [int(lengths[key][length]) for key in ("tp", "gold", "predicted")]
+        rows.append(["length", str(length), str(lengths["words"][length]),
+                     str(lengths["correct"][length])] +
+                    [str(count) for count in counts] + prf(*counts))
+    positions = scores["positions"]
+    for position in np.flatnonzero(positions["gold"] + positions["predicted"]):
+        counts = [int(positions[key][position]) for key in ("tp", "gold", "predicted")]
+        rows.append(["position", str(position), "", ""] +
+                    [str(count) for count in counts] + prf(*counts))
+    for name, before, after in CONTEXTS:
+        counts = scores["contexts"][name]
+        rows.append(["context", name, "", ""] +
+                    [str(count) for count in counts] + prf(*counts))
+    return rows
+
+
+BREAKDOWN_COLUMNS = ["breakdown", "value", "words", "correct", "tp", "gold",
+                     "predicted", "precision", "recall", "f1"]
+
+
+def read_lines(filename):
+    """Return the lines of filename without their line endings."""
+    with open(filename, "r") as fp:
+        return [line.rstrip("\r\n") for line in fp]
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the gold
+    and predicted syllabifications are read and scored, and the scores
+    are written as the fields of the accuracy CSV file.
+    """
+
+    parser = argparse.ArgumentParser(description="This program scores syllabified words against gold standard syllabifications and writes the error, total, accuracy, boundary precision, recall and F1 score (also per letter context) separated by commas.")
+    parser.add_argument("-g", "--gold",
+        help = "name of file containing the gold standard syllabifications",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-p", "--predicted",
+        help = "name of file containing the predicted syllabifications",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-b", "--breakdown",
+        help = "name of CSV file to write the scores per word length, position and context to",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("--header",
+        help = "only write the names of the fields",
+        action = "store_true")
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.header:
+        print(",".join(COLUMNS))
+        return
+    if args.gold == None:
+        parser.error("A gold filename is required.")
+    if args.predicted == None:
+        parser.error("A predicted filename is required.")
+
+    scores = score(read_lines(args.gold), read_lines(args.predicted))
+    print(",".join(csv_fields(scores)))
+    if args.breakdown != None:
+        with open(args.breakdown, "w") as fp:
+            fp.write(",".join(BREAKDOWN_COLUMNS) + "\n")
+            for row in breakdown_rows(scores):
+                fp.write(",".join(row) + "\n")
+
+
+if __name__ == '__main__':
+    main()
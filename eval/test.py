@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""test.py
+
+This program tests the evaluation of the syllabification systems.
+"""
+
+import unittest
+import benchmark
+import compare
+import cross_validate
+import scoring
+
+
+class TestScoring(unittest.TestCase):
+    """
+    This class tests the scoring of syllabifications.
+    """
+
+    GOLD = ["n ta te", "mo sa di", "ngwa na", "mme", "l la", "a"]
+    PREDICTED = ["n ta te", "mos a di", "ng wa na", "m me", "lla", "a"]
+
+    def test_encode(self):
+        """
+        Test whether the letters and boundaries are encoded per word.
+        """
+        letters, lengths, boundaries = scoring.encode(["n ta te", "Mme"])
+        self.assertEqual(list(lengths), [5, 3])
+        self.assertEqual(bytes(letters[1][:3]), b"mme")
+        self.assertEqual(list(boundaries[:, 0]), [0b01010000, 0])
+
+    def test_score(self):
+        """
+        Test whether the word and boundary counts are correct.
+        """
+        scores = scoring.score(self.GOLD, self.PREDICTED)
+        self.assertEqual((scores["words"], scores["correct"]), (6, 2))
+        self.assertEqual((scores["tp"], scores["gold"], scores["predicted"]),
+                         (4, 6, 7))
+        self.assertEqual(list(scores["lengths"]["words"][3:7]), [2, 0, 1, 2])
+        self.assertEqual(list(scores["lengths"]["correct"][3:7]), [0, 0, 1, 0])
+        self.assertEqual(scores["contexts"]["mm"], (0, 0, 1))
+        self.assertEqual(scores["contexts"]["ll"], (0, 1, 0))
+        self.assertEqual(scores["contexts"]["ng"], (0, 0, 1))
+        false_negatives, false_positives = scores["errors"]
+        self.assertEqual(false_negatives[6, 2], 1) # mo sa di
+        self.assertEqual(false_positives[6, 3], 1) # mos a di
+        self.assertEqual(false_negatives.sum(), scores["gold"] - scores["tp"])
+        self.assertEqual(false_positives.sum(), scores["predicted"] - scores["tp"])
+
+    def test_different_letters(self):
+        """
+        Test whether words with different letters are counted as errors.
+        """
+        scores = scoring.score(["mo sa di"], ["mo sa da"])
+        self.assertEqual(scores["correct"], 0)
+        with self.assertRaises(ValueError):
+            scoring.score(["mme"], [])
+
+    def test_csv_fields(self):
+        """
+        Test whether the fields are formatted like bc does.
+        """
+        fields = scoring.csv_fields(scoring.score(self.GOLD, self.PREDICTED))
+        self.assertEqual(len(fields), len(scoring.COLUMNS))
+        self.assertEqual(fields[:4], ["4", "6", ".33333333333333333333",
+                                      ".57142857142857142857"])
+        self.assertEqual(scoring.format_accuracy(0, 5), "0")
+        self.assertEqual(scoring.format_accuracy(5, 5), "1.00000000000000000000")
+        self.assertEqual(scoring.format_accuracy(1, 0), "0")
+
+
+class TestCrossValidate(unittest.TestCase):
+    """
+    This class tests the helper functions of the cross validation.
+    """
+
+    def test_split_folds(self):
+        """
+        Test whether the data is split round robin.
+        """
+        self.assertEqual(cross_validate.split_folds(list(range(7)), 3),
+                         [[0, 3, 6], [1, 4], [2, 5]])
+
+    def test_diff_lines(self):
+        """
+        Test whether the differences are in the format of diff.
+        """
+        self.assertEqual(cross_validate.diff_lines(["a", "b", "c", "d"],
+                                                   ["a", "x", "y", "d"]),
+                         ["2,3c2,3\n", "< b\n", "< c\n", "---\n", "> x\n",
+                          "> y\n"])
+
+
+class TestCompare(unittest.TestCase):
+    """
+    This class tests the comparison of both systems.
+    """
+
+    def test_boundaries(self):
+        """
+        Test whether the boundaries are the letter indices of the
+        syllables.
+        """
+        self.assertEqual(compare.boundaries("n ta te"), {1, 3})
+        self.assertEqual(compare.boundaries("a"), set())
+
+    def test_summary(self):
+        """
+        Test whether the disagreements are flagged and counted.
+        """
+        summary = compare.new_summary()
+        words = ["ntate", "mang", "mang"]
+        flags = compare.add_to_summary(summary, words,
+            ["n ta te", "ma ng", "ma ng"], ["n ta te", "mang", "mang"])
+        self.assertEqual(flags, [compare.AGREE, compare.DISAGREE, compare.DISAGREE])
+        formatted = compare.format_summary(summary)
+        self.assertEqual((formatted["words"], formatted["agree"], formatted["disagree"]),
+                         (3, 1, 2))
+        self.assertEqual(formatted["distinct_disagreements"], 1)
+        self.assertEqual((formatted["rule_only_boundaries"],
+                          formatted["tex_only_boundaries"]), (2, 0))
+        self.assertEqual(formatted["most_frequent"][0]["count"], 2)
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    This class tests the helper functions of the benchmarks.
+    """
+
+    def test_percentile(self):
+        """
+        Test whether the nearest rank of the sorted values is returned.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.50), 51)
+        self.assertEqual(benchmark.percentile(values, 0.99), 100)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+
+def main():
+    """
+    This main function starts the unit test main function.
+    """
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
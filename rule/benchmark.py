@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""benchmark.py
+
+This program contains benchmarks for the rule-based syllabification
+system.  Each benchmark is selected with a subcommand and prints its
+timings to standard output.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import syllabifier
+
+RULE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RULE_DIR, os.pardir, "common"))
+import corpus
+import text
+
+
+def time_command(command, repeat):
+    """Run command (a list of arguments) repeat times in the rule
+    directory and return the list of wall clock times in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd = RULE_DIR, check = True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def words_per_second(function, words, repeat):
+    """Apply function to all words repeat times and return the best
+    throughput in words per second.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in words:
+            function(word)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return len(words) / best
+
+
+def load_words(args):
+    """Return the words from the input file, or a synthetic Sesotho word
+    list when no input file is given.
+    """
+    if args.input != None:
+        return corpus.read_words(args.input)
+    return corpus.generate_words(args.count)
+
+
+def bench_engines(args):
+    """Compare the words per second of the syllabification engines on a
+    word list.
+    """
+    words = load_words(args)
+    print("%d words" % len(words))
+    expected = [syllabifier.syllabify(word) for word in words]
+    for name in sorted(syllabifier.ENGINES):
+        engine = syllabifier.ENGINES[name]
+        if [engine(word) for word in words] != expected:
+            print("%-30s output differs from rules engine" % name)
+        print("%-30s %10.0f words/s" % (name,
+            words_per_second(engine, words, args.repeat)))
+
+
+def bench_blocks(args):
+    """Compare the words per second of the engines when syllabify_many
+    is applied to chunks of a large word list, as syllabifier.py does.
+    The regex engine handles every chunk as one block of text.
+    """
+    words = load_words(args)
+    size = sum(len(word.encode("utf-8")) + 1 for word in words)
+    chunks = [words[index:index + args.chunk_size]
+              for index in range(0, len(words), args.chunk_size)]
+    print("%d words, %.1f MB" % (len(words), size / 1e6))
+    expected = [syllabifier.syllabify_many(chunk, "rules") for chunk in chunks]
+    for name in sorted(syllabifier.ENGINES):
+        engine = lambda chunk: syllabifier.syllabify_many(chunk, name)
+        if [engine(chunk) for chunk in chunks] != expected:
+            print("%-30s output differs from rules engine" % name)
+        speed = words_per_second(engine, chunks, args.repeat) * len(words) / len(chunks)
+        print("%-30s %10.0f words/s %8.1f MB/s" % (name, speed,
+            speed * size / len(words) / 1e6))
+
+
+def bench_batches(args):
+    """Measure how the words per second of the engines that handle a
+    whole batch of words at once (such as numpy) scale with the batch
+    size, compared with the per-word loop of the compiled engine.
+    """
+    words = load_words(args)
+    names = ["compiled"] + sorted(syllabifier.BLOCK_ENGINES)
+    print("%d words" % len(words))
+    print("%10s" % "batch" + "".join("%15s" % name for name in names))
+    for batch_size in [int(value) for value in args.batch_sizes.split(",")]:
+        batches = [words[index:index + batch_size]
+                   for index in range(0, len(words), batch_size)]
+        speeds = []
+        for name in names:
+            engine = lambda batch: syllabifier.syllabify_many(batch, name)
+            speeds.append(words_per_second(engine, batches, args.repeat) *
+                          len(words) / len(batches))
+        print("%10d" % batch_size + "".join("%8.0f words/s" % speed for speed in speeds))
+
+
+def add_word_arguments(parser):
+    """Add the arguments that select the word list to parser."""
+    parser.add_argument("-i", "--input",
+        help = "name of text file containing words (default: synthetic Sesotho words)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-n", "--count",
+        help = "number of synthetic words",
+        action = "store",
+        type = int,
+        default = 100000,
+        metavar = "N")
+
+
+def job_counts(maximum):
+    """Return the numbers of jobs 1, 2, 4, ... up to and including
+    maximum.
+    """
+    counts = []
+    jobs = 1
+    while jobs < maximum:
+        counts.append(jobs)
+        jobs *= 2
+    counts.append(maximum)
+    return counts
+
+
+def bench_scaling(args):
+    """Measure the throughput of syllabifier.py for increasing numbers
+    of worker processes (--jobs).
+    """
+    words = load_words(args)
+    directory = tempfile.mkdtemp()
+    input_name = os.path.join(directory, "input.txt")
+    output_name = os.path.join(directory, "output.txt")
+    with open(input_name, "w") as fp:
+        fp.write("".join(word + "\n" for word in words))
+    print("%d words" % len(words))
+    for jobs in job_counts(args.max_jobs):
+        command = [sys.executable, "syllabifier.py", "-i", input_name,
+            "-o", output_name, "-j", str(jobs)]
+        elapsed = min(time_command(command, args.repeat))
+        print("%3d jobs %10.0f words/s" % (jobs, len(words) / elapsed))
+    os.remove(input_name)
+    os.remove(output_name)
+    os.rmdir(directory)
+
+
+def bench_text(args):
+    """Measure the throughput of syllabifying paragraphs of running
+    text (one paragraph per line).
+    """
+    paragraphs = corpus.generate_text(args.paragraphs)
+    characters = sum(len(paragraph) for paragraph in paragraphs)
+    words = sum(len(text.WORD.findall(paragraph)) for paragraph in paragraphs)
+    engine = lambda lines: syllabifier.syllabify_text(lines, args.engine)
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for index in range(0, len(paragraphs), args.chunk_size):
+            engine(paragraphs[index:index + args.chunk_size])
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    print("%d paragraphs, %d words, %d characters" % (len(paragraphs), words, characters))
+    print("%10.0f words/s %12.0f characters/s" % (words / best, characters / best))
+
+
+def main():
+    """Commandline arguments are parsed and the selected benchmark is
+    run.
+    """
+
+    parser = argparse.ArgumentParser(description="This program runs benchmarks for the rule-based syllabification system.")
+    parser.add_argument("-r", "--repeat",
+        help = "number of times each measurement is repeated",
+        action = "store",
+        type = int,
+        default = 5,
+        metavar = "N")
+    subparsers = parser.add_subparsers(dest = "benchmark")
+    subparsers.required = True
+    parser_engines = subparsers.add_parser("engines",
+        help = "words per second of the syllabification engines")
+    add_word_arguments(parser_engines)
+    parser_engines.set_defaults(func = bench_engines)
+    parser_blocks = subparsers.add_parser("blocks",
+        help = "words per second of the engines on chunks of a large word list")
+    add_word_arguments(parser_blocks)
+    parser_blocks.add_argument("--chunk-size",
+        help = "number of words syllabified at once",
+        action = "store",
+        type = int,
+        default = 10000,
+        metavar = "N")
+    parser_blocks.set_defaults(func = bench_blocks, count = 1000000)
+    parser_batches = subparsers.add_parser("batches",
+        help = "words per second of the batch engines for increasing batch sizes")
+    add_word_arguments(parser_batches)
+    parser_batches.add_argument("-b", "--batch-sizes",
+        help = "comma-separated batch sizes (default: 1,10,100,1000,10000,100000)",
+        action = "store",
+        default = "1,10,100,1000,10000,100000",
+        metavar = "N,...")
+    parser_batches.set_defaults(func = bench_batches, count = 200000)
+    parser_scaling = subparsers.add_parser("scaling",
+        help = "throughput of syllabifier.py for 1, 2, 4, ... jobs")
+    add_word_arguments(parser_scaling)
+    parser_scaling.add_argument("-j", "--max-jobs",
+        help = "largest number of jobs (default: number of CPUs)",
+        action = "store",
+        type = int,
+        default = os.cpu_count(),
+        metavar = "N")
+    parser_scaling.set_defaults(func = bench_scaling)
+    parser_text = subparsers.add_parser("text",
+        help = "throughput on paragraphs of running text")
+    parser_text.add_argument("-e", "--engine",
+        help = "syllabification engine to use (default: compiled)",
+        action = "store",
+        choices = sorted(syllabifier.ENGINES),
+        default = "compiled")
+    parser_text.add_argument("-n", "--paragraphs",
+        help = "number of synthetic paragraphs of 100 words",
+        action = "store",
+        type = int,
+        default = 2000,
+        metavar = "N")
+    parser_text.add_argument("--chunk-size",
+        help = "number of paragraphs syllabified at once",
+        action = "store",
+        type = int,
+        default = 100,
+        metavar = "N")
+    parser_text.set_defaults(func = bench_text)
+    args = parser.parse_args()
+
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
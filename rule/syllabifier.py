@@ -7,8 +7,31 @@ syllabification boundaries are indicated by spaces.
 """
 
 import argparse
+import functools
+import json
+import importlib.util
 import logging
+import os
 import re
+import sys
+
+# Only the numpy engine needs NumPy, which is imported (see load_numpy)
+# when the engine is first used, so other runs do not pay for the import
+HAVE_NUMPY = importlib.util.find_spec("numpy") != None
+np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "common"))
+import boundaries
+import cache
+import dedupe
+import lexicon
+import mapped
+import parallel
+import server
+import stats
+import streams
+import text
 
 # Functions for checking properties of letters (or combinations of
 # letters)
@@ -91,7 +114,10 @@ def syllabify(word):
     """Apply syllabification to the word and return the syllabified
     word (syllable boundaries indicated by a space).
     """
-    logging.debug("Syllabifying " + word)
+    # Only build the debug messages when they are actually shown
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    if debug:
+        logging.debug("Syllabifying %s", word)
     if len(word) <= 1:
         return word
     # For each index in between letters starting from position 1 until the place
@@ -106,19 +132,689 @@ def syllabify(word):
         v_res = V_rule(word, index)
         c_res = C_rule(word, index)
         cv_res = CV_rule(word, index)
-        logging.debug("Considering index " + str(index))
-        if v_res:
-            logging.debug("V rule matched")
-        if c_res:
-            logging.debug("C rule matched")
-        if cv_res:
-            logging.debug("CV rule matched")
+        if debug:
+            logging.debug("Considering index %d", index)
+            if v_res:
+                logging.debug("V rule matched")
+            if c_res:
+                logging.debug("C rule matched")
+            if cv_res:
+                logging.debug("CV rule matched")
         if v_res or c_res or cv_res:
             syllabified_word += " "
         syllabified_word += word[index]
     return syllabified_word
 
 
+# Compiled engine
+#
+# The rules above only look at the classes of the two letters before
+# an index and the letter after it.  The compiled engine classifies
+# every letter of a word once and looks the rule decisions up in a
+# table over (prev2, prev1, cur) classes, which is filled in advance by
+# running V_rule, C_rule and CV_rule on a representative letter of each
+# class.
+
+# Letter classes with a representative letter for each.  "w" and "W"
+# are different classes, because C_rule compares word[index] to "w"
+# without lowercasing it.
+CLASS_REPRESENTATIVES = "amnlgywWb-"
+VOWEL, M, N, L, G, Y, W, UPPER_W, CONSONANT, OTHER = range(len(CLASS_REPRESENTATIVES))
+NUM_CLASSES = len(CLASS_REPRESENTATIVES)
+START = NUM_CLASSES # prev2 class at index 1, where there is no letter
+
+# Bits that indicate which rules match in the rule table
+V_MATCH = 1
+C_MATCH = 2
+CV_MATCH = 4
+
+def letter_class(letter):
+    """This function returns the class of the letter, as used by the
+    compiled engine.
+    """
+    if letter == "w":
+        return W
+    if is_vowel(letter):
+        return VOWEL
+    if not is_consonant(letter):
+        return OTHER
+    lower = letter.lower()
+    if lower == "w":
+        return UPPER_W
+    if lower in "mnlgy":
+        return CLASS_REPRESENTATIVES.index(lower)
+    return CONSONANT
+
+def build_rule_table():
+    """This function returns the rule table of the compiled engine.
+    The entry for classes prev2, prev1 and cur is found at index
+    (prev2 * NUM_CLASSES + prev1) * NUM_CLASSES + cur and holds the
+    V_MATCH, C_MATCH and CV_MATCH bits of the rules that match.
+    """
+    table = []
+    for prev2 in range(NUM_CLASSES + 1):
+        for prev1 in range(NUM_CLASSES):
+            for cur in range(NUM_CLASSES):
+                word = CLASS_REPRESENTATIVES[prev1] + CLASS_REPRESENTATIVES[cur]
+                if prev2 != START:
+                    word = CLASS_REPRESENTATIVES[prev2] + word
+                index = len(word) - 1
+                table.append(V_MATCH * V_rule(word, index) +
+                             C_MATCH * C_rule(word, index) +
+                             CV_MATCH * CV_rule(word, index))
+    return table
+
+RULE_TABLE = build_rule_table()
+LETTER_CLASSES = dict((letter, letter_class(letter)) for letter in
+        "aeioubcdfghjklmnpqrstvwxyzAEIOUBCDFGHJKLMNPQRSTVWXYZ")
+
+def classify(word):
+    """Return the list of letter classes of the word."""
+    classes = []
+    for letter in word:
+        letter_cls = LETTER_CLASSES.get(letter)
+        if letter_cls == None:
+            letter_cls = LETTER_CLASSES[letter] = letter_class(letter)
+        classes.append(letter_cls)
+    return classes
+
+def syllabify_compiled(word):
+    """Apply syllabification to the word and return the syllabified
+    word (syllable boundaries indicated by a space).  This gives the
+    same result as syllabify, but classifies the letters only once and
+    decides on all boundaries in one pass using RULE_TABLE.
+    """
+    if len(word) <= 1:
+        return word
+    classes = classify(word)
+    pieces = []
+    start = 0
+    # state encodes the classes (prev2, prev1) as prev2 * NUM_CLASSES + prev1
+    state = START * NUM_CLASSES + classes[0]
+    for index in range(1, len(word)):
+        entry = state * NUM_CLASSES + classes[index]
+        if RULE_TABLE[entry]:
+            pieces.append(word[start:index])
+            start = index
+        state = entry % (NUM_CLASSES * NUM_CLASSES)
+    pieces.append(word[start:])
+    return " ".join(pieces)
+
+def find_boundaries(word):
+    """Return the list of indices at which syllable boundaries are
+    placed in the word (index i lies between letter i - 1 and letter
+    i), using the compiled rule table.
+    """
+    boundaries = []
+    if len(word) <= 1:
+        return boundaries
+    classes = classify(word)
+    state = START * NUM_CLASSES + classes[0]
+    for index in range(1, len(word)):
+        entry = state * NUM_CLASSES + classes[index]
+        if RULE_TABLE[entry]:
+            boundaries.append(index)
+        state = entry % (NUM_CLASSES * NUM_CLASSES)
+    return boundaries
+
+def split_at(word, boundaries):
+    """Return the word with spaces inserted at the boundaries (a list
+    of indices as returned by find_boundaries).
+    """
+    pieces = []
+    start = 0
+    for index in boundaries:
+        pieces.append(word[start:index])
+        start = index
+    pieces.append(word[start:])
+    return " ".join(pieces)
+
+RULE_NAMES = ((V_MATCH, "V"), (C_MATCH, "C"), (CV_MATCH, "CV"))
+
+def syllabify_traced(word):
+    """Apply syllabification to the word like syllabify_compiled, but
+    also return a trace of the rule decisions.  The trace is a list
+    containing, for each syllable boundary, the index of the boundary
+    and the names of the rules (V, C and/or CV) that matched there.
+    """
+    if len(word) <= 1:
+        return word, []
+    classes = classify(word)
+    pieces = []
+    trace = []
+    start = 0
+    state = START * NUM_CLASSES + classes[0]
+    for index in range(1, len(word)):
+        entry = state * NUM_CLASSES + classes[index]
+        matches = RULE_TABLE[entry]
+        if matches:
+            pieces.append(word[start:index])
+            start = index
+            trace.append((index, [name for bit, name in RULE_NAMES if matches & bit]))
+        state = entry % (NUM_CLASSES * NUM_CLASSES)
+    pieces.append(word[start:])
+    return " ".join(pieces), trace
+
+# Regex engine
+#
+# The rules only look at the two letters before an index and the letter
+# after it, so they can be written as one regular expression that
+# matches (with lookbehind and lookahead) exactly the positions of the
+# syllable boundaries.  The regex engine joins a block of words with
+# newlines and inserts all boundaries with a single call of re.sub, so
+# the search runs in the C code of the re module instead of in a Python
+# loop over the indices.  The lookarounds never cross a newline, which
+# keeps the words apart.  CV_rule does not need an alternative of its
+# own, since it only matches where V_rule matches as well.
+
+# The letters for which is_vowel and is_consonant return true, which are
+# also the letters of the words in running text (see text.py).
+VOWEL_LETTERS = text.VOWEL_LETTERS
+CONSONANT_LETTERS = text.CONSONANT_LETTERS
+
+def build_boundary_regex():
+    """This function returns the compiled regular expression that
+    matches the empty string at every syllable boundary of the words in
+    a block of newline-separated words.
+    """
+    vowel = "[%s]" % VOWEL_LETTERS
+    # C_rule: m or n followed by a consonant other than w, y and g
+    nasal_consonant = "[%s]" % "".join(letter for letter in CONSONANT_LETTERS
+                                       if letter.lower() not in "wyg")
+    # C_rule: ng or ny followed by a letter that is neither a (lowercase)
+    # w nor a vowel
+    not_w_or_vowel = "[^\\n%sw]" % VOWEL_LETTERS
+    alternatives = [
+        # V_rule (and CV_rule): after a vowel, if a letter follows
+        "(?<=%s)(?=[^\\n])" % vowel,
+        "(?<=[mnMN])(?=%s)" % nasal_consonant,
+        # C_rule: ll
+        "(?<=[lL])(?=[lL])",
+        "(?<=[nN][gGyY])(?=%s)" % not_w_or_vowel,
+    ]
+    # The first lookbehind quickly skips the positions after letters
+    # that no rule starts from
+    return re.compile("(?<=[%smnMNlLgGyY])(?:%s)" % (VOWEL_LETTERS,
+        "|".join(alternatives)))
+
+BOUNDARY_REGEX = build_boundary_regex()
+
+def syllabify_regex(word):
+    """Apply syllabification to the word using BOUNDARY_REGEX and return
+    the syllabified word (syllable boundaries indicated by a space).
+    """
+    return BOUNDARY_REGEX.sub(" ", word)
+
+def syllabify_block(words):
+    """Apply syllabification to a list of words (which do not contain
+    newlines) with one call of re.sub on the whole block and return the
+    list of syllabified words.
+    """
+    if not words:
+        return []
+    return BOUNDARY_REGEX.sub(" ", "\n".join(words)).split("\n")
+
+def block_boundaries(words):
+    """Return the list of syllable boundaries (see find_boundaries) of
+    every word in a list of words (which do not contain newlines),
+    searching the whole block with one call of re.finditer.
+    """
+    result = [[] for word in words]
+    if not words:
+        return result
+    row = 0
+    start = 0
+    end = len(words[0])
+    for match in BOUNDARY_REGEX.finditer("\n".join(words)):
+        position = match.start()
+        while position > end:
+            row += 1
+            start = end + 1
+            end = start + len(words[row])
+        result[row].append(position - start)
+    return result
+
+# NumPy engine
+#
+# The numpy engine encodes a batch of words into a two-dimensional
+# array of letter codes (one row per word, padded with zeros).  The
+# letter predicates become lookup tables indexed by the letter codes,
+# and the rules become boolean operations on the columns of the
+# predicate arrays, shifted by one or two letters, so the boundaries of
+# all words are decided by a few array operations.
+
+# Letter codes: ASCII characters keep their code, the Kelvin sign (the
+# only other letter, see CONSONANT_LETTERS) gets KELVIN_CODE and all
+# other characters OTHER_CODE.
+KELVIN_CODE = 128
+OTHER_CODE = 129
+CODE_LETTERS = [chr(code) for code in range(128)] + ["\u212a", "\u0100"]
+
+def regex_packed(words):
+    """Return the lengths of a list of words (which do not contain
+    newlines) and the bits of their syllable boundaries packed as in the
+    binary output format (see boundaries.pack), searching the whole
+    block with one call of re.finditer.  The bits are set as the
+    boundaries are found, without lists of boundaries per word.
+    """
+    lengths = [len(word) for word in words]
+    block = "\n".join(words)
+    packed = bytearray((sum(lengths) + 7) // 8)
+    row = 0
+    end = lengths[0] if words else 0
+    for match in BOUNDARY_REGEX.finditer(block):
+        position = match.start()
+        while position > end:
+            row += 1
+            end += lengths[row] + 1
+        # The index of the letter in the words without the newlines
+        position -= row
+        packed[position >> 3] |= 1 << (position & 7)
+    return lengths, bytes(packed)
+
+def build_lookup_table(predicate):
+    """This function returns a table that maps every letter code to the
+    result of predicate on the letter with that code.
+    """
+    table = np.zeros(256, dtype = bool)
+    table[:len(CODE_LETTERS)] = [bool(predicate(letter)) for letter in CODE_LETTERS]
+    return table
+
+def load_numpy():
+    """Import NumPy and build the lookup tables of the letter predicates,
+    the first time the numpy engine is used.
+    """
+    global np, VOWEL_TABLE, CONSONANT_TABLE, MN_TABLE, L_TABLE
+    global COMPLEX_FIRST_TABLE, COMPLEX_SECOND_TABLE, WYG_TABLE, LOWER_W_TABLE
+    if np != None:
+        return
+    import numpy
+    np = numpy
+    VOWEL_TABLE = build_lookup_table(is_vowel)
+    CONSONANT_TABLE = build_lookup_table(is_consonant)
+    MN_TABLE = build_lookup_table(lambda letter:
+        is_single_nasal_or_l(letter) and letter.lower() != "l")
+    L_TABLE = build_lookup_table(lambda letter:
+        is_single_nasal_or_l(letter) and letter.lower() == "l")
+    # First and second letter of ng and ny
+    COMPLEX_FIRST_TABLE = build_lookup_table(lambda letter:
+        is_complex_nasal(letter, "g"))
+    COMPLEX_SECOND_TABLE = build_lookup_table(lambda letter:
+        is_complex_nasal("n", letter))
+    WYG_TABLE = build_lookup_table(lambda letter: letter.lower() in "wyg")
+    LOWER_W_TABLE = build_lookup_table(lambda letter: letter == "w")
+
+def encode_letters(words):
+    """Encode the words (which do not contain newlines) and return the
+    code points of the words followed by newlines (a flat array), the
+    letter codes (one row per word, padded with zeros) and the number
+    of letters of every word.
+    """
+    load_numpy()
+    text = "".join(word + "\n" for word in words)
+    points = np.frombuffer(text.encode("utf-32-le", "surrogatepass"),
+                           dtype = np.uint32)
+    newline = points == ord("\n")
+    letter = ~newline
+    # The row of every letter, the newline belongs to the word before it
+    row = (np.cumsum(newline) - newline)[letter]
+    lengths = np.bincount(row, minlength = len(words))
+    starts = np.cumsum(lengths) - lengths
+    column = np.arange(len(row)) - starts[row]
+    width = max(1, int(lengths.max()))
+    letter_points = points[letter]
+    codes = np.zeros((len(words), width), dtype = np.uint8)
+    codes[row, column] = np.where(letter_points < 128, letter_points,
+        np.where(letter_points == 0x212a, KELVIN_CODE, OTHER_CODE))
+    return points, codes, lengths
+
+def boundary_mask(codes, inside):
+    """Return a boolean array of the shape of codes (see encode_letters)
+    in which element [w, i] is true when word w has a syllable boundary
+    before letter i (index i, as in the rule functions).  inside tells
+    which elements of codes are letters rather than padding.
+    """
+    vowel = VOWEL_TABLE[codes]
+    consonant = CONSONANT_TABLE[codes]
+    letter_l = L_TABLE[codes]
+    mask = np.zeros(codes.shape, dtype = bool)
+    # V_rule, and the m/n and ll clauses of C_rule, look at index - 1
+    # and index
+    mask[:, 1:] = (vowel[:, :-1] |
+        (MN_TABLE[codes[:, :-1]] & consonant[:, 1:] & ~WYG_TABLE[codes[:, 1:]]) |
+        (letter_l[:, :-1] & letter_l[:, 1:]))
+    # The ng/ny clause of C_rule and CV_rule also look at index - 2
+    mask[:, 2:] |= ((COMPLEX_FIRST_TABLE[codes[:, :-2]] &
+        COMPLEX_SECOND_TABLE[codes[:, 1:-1]] &
+        ~(LOWER_W_TABLE[codes[:, 2:]] | vowel[:, 2:])) |
+        (vowel[:, 1:-1] & consonant[:, :-2]))
+    # There is no boundary after the last letter
+    mask &= inside
+    return mask
+
+def syllabify_numpy(words):
+    """Apply syllabification to a list of words (which do not contain
+    newlines) using array operations on the whole batch and return the
+    list of syllabified words.
+    """
+    if not words:
+        return []
+    points, codes, lengths = encode_letters(words)
+    inside = np.arange(codes.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]
+    mask = boundary_mask(codes, inside)
+    # Insert a space before every letter with a boundary: every code
+    # point moves right by the number of boundaries up to it
+    before = np.zeros(len(points), dtype = bool)
+    before[points != ord("\n")] = mask[inside]
+    shift = np.cumsum(before)
+    result = np.full(len(points) + int(shift[-1]), ord(" "), dtype = np.uint32)
+    result[np.arange(len(points)) + shift] = points
+    return result.tobytes().decode("utf-32-le", "surrogatepass").split("\n")[:-1]
+
+def numpy_boundaries(words):
+    """Return the list of syllable boundaries (see find_boundaries) of
+    every word in a list of words (which do not contain newlines), using
+    array operations on the whole batch.
+    """
+    if not words:
+        return []
+    points, codes, lengths = encode_letters(words)
+    inside = np.arange(codes.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]
+    rows, columns = np.nonzero(boundary_mask(codes, inside))
+    columns = columns.tolist()
+    result = []
+    start = 0
+    for end in np.cumsum(np.bincount(rows, minlength = len(words))).tolist():
+        result.append(columns[start:end])
+        start = end
+    return result
+
+def numpy_packed(words):
+    """Return the lengths of a list of words (which do not contain
+    newlines) and the bits of their syllable boundaries packed as in the
+    binary output format (see boundaries.pack), using array operations
+    on the whole batch.
+    """
+    if not words:
+        return [], b""
+    points, codes, lengths = encode_letters(words)
+    inside = np.arange(codes.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]
+    mask = boundary_mask(codes, inside)
+    return lengths.tolist(), np.packbits(mask[inside], bitorder = "little").tobytes()
+
+def syllabify_numpy_word(word):
+    """Apply the numpy engine to a single word."""
+    return syllabify_numpy([word])[0]
+
+# The available syllabification engines, which all give the same results
+ENGINES = {
+    "rules": syllabify,
+    "compiled": syllabify_compiled,
+    "regex": syllabify_regex,
+}
+
+# Engines that syllabify a whole list of words at once, used by
+# syllabify_many when no cache, counts or exceptions are involved
+BLOCK_ENGINES = {
+    "regex": syllabify_block,
+}
+
+# Engines that find the syllable boundaries of a whole list of words at
+# once, used by boundaries_many in the same way
+BLOCK_BOUNDARY_ENGINES = {
+    "regex": block_boundaries,
+}
+
+# Engines that pack the syllable boundaries of a whole list of words at
+# once, used by boundaries_chunk in the same way
+PACKED_ENGINES = {
+    "regex": regex_packed,
+}
+
+if HAVE_NUMPY:
+    ENGINES["numpy"] = syllabify_numpy_word
+    BLOCK_ENGINES["numpy"] = syllabify_numpy
+    BLOCK_BOUNDARY_ENGINES["numpy"] = numpy_boundaries
+    PACKED_ENGINES["numpy"] = numpy_packed
+
+def cache_key(word):
+    """Return the key under which the syllable boundaries of the word
+    are cached.  This is the lowercased word, as the rules do not
+    depend on case, except that C_rule treats "W" differently from "w".
+    Words containing "W", or that change length when lowercased, are
+    therefore used as they are.
+    """
+    key = word.lower()
+    if "W" in word or len(key) != len(word):
+        return word
+    return key
+
+def count_rules(word, counts):
+    """Add the number of indices of the word at which V_rule, C_rule and
+    CV_rule match to counts (a collections.Counter, under "V", "C" and
+    "CV") and count the word under "syllabified".
+    """
+    counts["syllabified"] += 1
+    if len(word) <= 1:
+        return
+    classes = classify(word)
+    state = START * NUM_CLASSES + classes[0]
+    for index in range(1, len(word)):
+        entry = state * NUM_CLASSES + classes[index]
+        matches = RULE_TABLE[entry]
+        if matches:
+            for bit, name in RULE_NAMES:
+                if matches & bit:
+                    counts[name] += 1
+        state = entry % (NUM_CLASSES * NUM_CLASSES)
+
+def counted(function, counts):
+    """Return a function that applies function to a word after counting
+    the rules that match in it (see count_rules).  It is only used for
+    --stats, so the engines themselves do not count anything.
+    """
+    def counted_function(word):
+        count_rules(word, counts)
+        return function(word)
+    return counted_function
+
+def with_exceptions(function, exceptions):
+    """Return a function that syllabifies a word like function, except
+    that the words in exceptions (a lexicon, see lexicon.read_lexicon)
+    are looked up there first and function is not called for them.
+    """
+    def checked_function(word):
+        boundaries = exceptions.get(word.lower())
+        if boundaries == None:
+            return function(word)
+        return split_at(word, boundaries)
+    return checked_function
+
+def with_exception_boundaries(find, exceptions):
+    """Return a function that finds the syllable boundaries of a word
+    like find, except that the words in exceptions are looked up there
+    first (see with_exceptions).
+    """
+    def checked_find(word):
+        boundaries = exceptions.get(word.lower())
+        if boundaries == None:
+            return find(word)
+        return boundaries
+    return checked_find
+
+def cached_boundaries(word, cache, find = find_boundaries):
+    """Return the syllable boundaries of the word, looking them up in
+    cache (an LRUCache) first and storing them there when they are not
+    found (using find, which is find_boundaries unless the rules are
+    counted).
+    """
+    key = cache_key(word)
+    boundaries = cache.get(key)
+    if boundaries == None:
+        boundaries = find(word)
+        cache.put(key, boundaries)
+    return boundaries
+
+def syllabify_cached(word, cache, find = find_boundaries):
+    """Apply syllabification to the word like syllabify_compiled, but
+    look up the syllable boundaries in cache (an LRUCache) first (see
+    cached_boundaries).
+    """
+    return split_at(word, cached_boundaries(word, cache, find))
+
+
+def syllabify_many(words, engine = "compiled", cache = None, counts = None,
+        exceptions = None):
+    """Apply syllabification to all words (an iterable) using the named
+    engine and return the list of syllabified words in the same order.
+    Every distinct word is only syllabified once.  If a cache (an
+    LRUCache) is given, the syllable boundaries are taken from and
+    stored in the cache instead of running the engine.  If counts (a
+    collections.Counter) is given, the rules that match in the words
+    that are syllabified are counted in it (see count_rules).  Words in
+    exceptions (a lexicon, see lexicon.read_lexicon) are looked up
+    there before anything else.
+    """
+    if engine in BLOCK_ENGINES and cache == None and counts == None and not exceptions:
+        return BLOCK_ENGINES[engine](list(words))
+    function = ENGINES[engine]
+    find = find_boundaries
+    if counts != None:
+        function = counted(function, counts)
+        find = counted(find_boundaries, counts)
+    if cache != None:
+        function = functools.partial(syllabify_cached, cache = cache, find = find)
+    if exceptions:
+        function = with_exceptions(function, exceptions)
+    syllabified = {}
+    result = []
+    for word in words:
+        syl_word = syllabified.get(word)
+        if syl_word == None:
+            syl_word = function(word)
+            syllabified[word] = syl_word
+        result.append(syl_word)
+    return result
+
+
+def boundaries_many(words, engine = "compiled", cache = None,
+        exceptions = None):
+    """Return the list of syllable boundaries (see find_boundaries) of
+    all words (an iterable) in the same order, without building the
+    syllabified words.  The engine, cache and exceptions are used as in
+    syllabify_many; the engines that handle one word at a time all find
+    the same boundaries, so find_boundaries is used for them.
+    """
+    if engine in BLOCK_BOUNDARY_ENGINES and cache == None and not exceptions:
+        return BLOCK_BOUNDARY_ENGINES[engine](list(words))
+    find = find_boundaries
+    if cache != None:
+        find = functools.partial(cached_boundaries, cache = cache)
+    if exceptions:
+        find = with_exception_boundaries(find, exceptions)
+    found = {}
+    result = []
+    for word in words:
+        boundaries = found.get(word)
+        if boundaries == None:
+            boundaries = find(word)
+            found[word] = boundaries
+        result.append(boundaries)
+    return result
+
+
+def boundaries_chunk(words, engine = "compiled", cache = None,
+        exceptions = None):
+    """Return the lengths of a list of words and the bits of their
+    syllable boundaries (see boundaries_many), as written to the binary
+    output format by boundaries.BoundaryWriter.
+    """
+    if engine in PACKED_ENGINES and cache == None and not exceptions:
+        return PACKED_ENGINES[engine](words)
+    lengths = [len(word) for word in words]
+    return lengths, boundaries.pack(lengths,
+        boundaries_many(words, engine, cache, exceptions))
+
+
+def syllabify_text(lines, engine = "compiled", cache = None, counts = None,
+        exceptions = None):
+    """Syllabify the words in lines of running text (a list of lines
+    including their newlines) and return the resulting text as one
+    string.  Everything in between the words is kept as it is.  The
+    engine, cache, counts and exceptions are used as in syllabify_many.
+    """
+    return text.syllabify_lines(lines,
+        lambda words: syllabify_many(words, engine, cache, counts, exceptions))
+
+
+# Engine name, cache, exceptions, mode, output format and memory-mapped
+# input used in a worker process (see init_worker)
+worker_engine = None
+worker_cache = None
+worker_exceptions = None
+worker_text = False
+worker_format = "text"
+worker_input = None
+
+def init_worker(engine, args):
+    """Set up a worker process: remember the engine, whether the input
+    is running text and the output format, create its own cache and
+    read the exception lexicon as described by the commandline
+    arguments (if any), and map the input file when it is
+    memory-mapped.
+    """
+    global worker_engine, worker_cache, worker_exceptions, worker_text, worker_format, worker_input
+    worker_engine = engine
+    worker_cache = cache.from_arguments(args)
+    worker_exceptions = lexicon.load(args.exceptions)
+    worker_text = args.text
+    worker_format = args.format
+    if args.mmap:
+        worker_input = mapped.MappedFile(args.input)
+
+def syllabify_chunk(chunk):
+    """Apply syllabify_many (or syllabify_text for running text, or
+    boundaries_chunk when only the boundaries are written) to a chunk of
+    the input in a worker process.
+    """
+    if worker_format != "text":
+        return boundaries_chunk(chunk, worker_engine, worker_cache,
+            worker_exceptions)
+    if worker_text:
+        return syllabify_text(chunk, worker_engine, worker_cache,
+            exceptions = worker_exceptions)
+    return syllabify_many(chunk, worker_engine, worker_cache,
+        exceptions = worker_exceptions)
+
+def syllabify_range(byte_range):
+    """Apply syllabify_chunk to the words in a (start, end) byte range of
+    the memory-mapped input in a worker process.
+    """
+    return syllabify_chunk(worker_input.words(*byte_range))
+
+
+def syllabify_chunk_traced(words, fp_trace, exceptions = None):
+    """Apply syllabify_traced to a chunk of words, write the traces to
+    fp_trace (one JSON object per word) and return the syllabified
+    words.  The boundaries of words in exceptions (a lexicon) are traced
+    as placed by the rule "exception".
+    """
+    syl_words = []
+    for word in words:
+        boundaries = None
+        if exceptions:
+            boundaries = exceptions.get(word.lower())
+        if boundaries != None:
+            syl_word = split_at(word, boundaries)
+            trace = [(index, ["exception"]) for index in boundaries]
+        else:
+            syl_word, trace = syllabify_traced(word)
+        syl_words.append(syl_word)
+        fp_trace.write(json.dumps({"word": word,
+            "boundaries": [{"index": index, "rules": rules}
+                for index, rules in trace]}) + "\n")
+    return syl_words
+
 
 def main():
     """Commandline arguments are parsed and handled.  Next, the input
@@ -128,13 +824,34 @@ def main():
 
     parser = argparse.ArgumentParser(description="This program reads in a list of words, one per line and adds syllabification boundaries, which is then written to the output file.")
     parser.add_argument("-i", "--input",
-        help = "name of text file containing input words",
+        help = "name of text file containing input words (- for standard input)",
         action = "store",
         metavar = "FILE")
     parser.add_argument("-o", "--output",
-        help = "name of output file",
+        help = "name of output file (- for standard output)",
         action = "store",
         metavar = "FILE")
+    parser.add_argument("-e", "--engine",
+        help = "syllabification engine to use (default: compiled)",
+        action = "store",
+        choices = sorted(ENGINES),
+        default = "compiled")
+    parser.add_argument("-t", "--trace",
+        help = "name of file in which the rules that matched at each syllable boundary are stored (one JSON object per word)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("--text",
+        help = "the input is running text instead of one word per line; only the words are syllabified and everything else is kept",
+        action = "store_true")
+    lexicon.add_arguments(parser)
+    cache.add_arguments(parser)
+    parallel.add_arguments(parser)
+    streams.add_arguments(parser)
+    mapped.add_arguments(parser)
+    boundaries.add_arguments(parser)
+    stats.add_arguments(parser)
+    dedupe.add_arguments(parser)
+    server.add_arguments(parser)
     parser.add_argument("-d", "--debug",
         help = "provide debugging information",
         action = "store_const",
@@ -146,18 +863,140 @@ def main():
 
     logging.basicConfig(level = args.loglevel)
 
+    if args.serve != None:
+        if args.batch_size < 1:
+            parser.error("The batch size should be at least 1.")
+        try:
+            server.parse_address(args.serve)
+        except ValueError as error:
+            parser.error(str(error))
+        try:
+            exceptions = lexicon.load(args.exceptions)
+        except ValueError as error:
+            parser.error(str(error))
+        word_cache = cache.from_arguments(args)
+        server.serve(args, lambda words: syllabify_many(words, args.engine,
+            word_cache, exceptions = exceptions))
+        if word_cache != None:
+            cache.close(word_cache, args)
+        return
+
     if args.input == None:
         parser.error("An input filename is required.")
-    fp_input = open(args.input, "r")
+    mapped.check_arguments(parser, args)
+    streams.check_arguments(parser, args)
+    if args.mmap:
+        input_file = mapped.MappedFile(args.input)
+    else:
+        fp_input = streams.open_input(args.input, args.buffer_size)
 
     if args.output == None:
         parser.error("An output filename is required.")
-    fp_output = open(args.output, "w")
+    if args.format == "text":
+        fp_output = streams.open_output(args.output, args.buffer_size)
+    else:
+        fp_output = boundaries.open_output(args.output, args.buffer_size)
+
+    if args.jobs < 1:
+        parser.error("The number of jobs should be at least 1.")
+    if args.jobs > 1 and args.trace != None:
+        parser.error("Tracing is not possible with more than one job.")
+    if args.text and args.trace != None:
+        parser.error("Tracing is not possible on running text.")
+    if args.jobs > 1 and args.stats != None:
+        parser.error("Statistics are not available with more than one job.")
+    dedupe.check_arguments(parser, args)
+    boundaries.check_arguments(parser, args)
+    if args.format != "text" and args.trace != None:
+        parser.error("Tracing is only possible when writing text.")
+    if (args.types or args.type_counts) and (args.stats != None or args.trace != None):
+        parser.error("Statistics and tracing are not available in the type modes.")
+
+    if args.text:
+        chunks = streams.read_line_chunks(fp_input, args.chunk_size)
+    elif args.mmap:
+        chunks = input_file.chunks(args.chunk_size)
+    else:
+        chunks = streams.read_chunks(fp_input, args.chunk_size)
+
+    # The statistics are collected by wrapping the steps, so nothing
+    # changes when they are not requested
+    statistics = None
+    counts = None
+    if args.stats != None:
+        statistics = stats.Statistics()
+        counts = statistics.counts
+        chunks = statistics.timed("stats", statistics.count_words(
+            statistics.timed("read", chunks), args.text))
+
+    # Workers read the exception lexicon again themselves
+    try:
+        exceptions = lexicon.load(args.exceptions)
+    except ValueError as error:
+        parser.error(str(error))
+
+    fp_trace = None
+    if args.trace != None:
+        fp_trace = open(args.trace, "w")
+
+    if args.types or args.type_counts:
+        if args.jobs > 1:
+            syllabify_chunks = lambda chunks: parallel.map_chunks(
+                syllabify_chunk, chunks, args.jobs, init_worker,
+                (args.engine, args))
+        else:
+            syllabify_chunks = lambda chunks: (syllabify_many(words,
+                args.engine, exceptions = exceptions) for words in chunks)
+        dedupe.run(fp_input, fp_output, syllabify_chunks, args)
+        return
+
+    word_cache = None
+    if fp_trace != None:
+        results = (syllabify_chunk_traced(words, fp_trace, exceptions) for words in chunks)
+    elif args.jobs > 1:
+        # Every worker has its own cache, which is not saved afterwards.
+        # With a memory-mapped input, the workers read the words of the
+        # byte ranges they are given themselves.
+        if args.mmap:
+            results = parallel.map_chunks(syllabify_range,
+                input_file.ranges(args.chunk_size), args.jobs, init_worker,
+                (args.engine, args))
+        else:
+            results = parallel.map_chunks(syllabify_chunk, chunks, args.jobs,
+                init_worker, (args.engine, args))
+    elif args.text:
+        word_cache = cache.from_arguments(args)
+        results = (syllabify_text(lines, args.engine, word_cache, counts,
+            exceptions) for lines in chunks)
+    elif args.format != "text":
+        word_cache = cache.from_arguments(args)
+        results = (boundaries_chunk(words, args.engine, word_cache,
+            exceptions) for words in chunks)
+    else:
+        word_cache = cache.from_arguments(args)
+        results = (syllabify_many(words, args.engine, word_cache, counts,
+            exceptions) for words in chunks)
 
+    write = streams.write_chunk
+    if args.text:
+        write = streams.write_text
+    elif args.format != "text":
+        write = boundaries.write_chunk
+    if statistics != None:
+        statistics.cache = word_cache
+        results = statistics.timed("syllabify", results)
+        for result in results:
+            statistics.call("write", write, fp_output, result)
+    else:
+        for result in results:
+            write(fp_output, result)
+    if args.format != "text":
+        fp_output.close()
 
-    for word in fp_input:  # Simply read a line from fp_input
-        syl_word = syllabify(word.rstrip()) # Syllabify and remove newline
-        fp_output.write(syl_word + "\n")  # Write output to fp_output
+    if word_cache != None:
+        cache.close(word_cache, args)
+    if statistics != None:
+        stats.report(statistics, args.stats)
 
 
 if __name__ == '__main__':
@@ -4,8 +4,12 @@
 This program tests the syllabification system.
 """
 
+import collections
+import sys
 import unittest
 import syllabifier
+import cache
+import text
 
 class TestUtils(unittest.TestCase):
     """
@@ -172,6 +176,265 @@ class TestRules(unittest.TestCase):
         self.assertEqual(syllabifier.syllabify("nthatisisa"), "n tha ti si sa")
 
 
+class TestCompiledEngine(unittest.TestCase):
+    """
+    This class tests whether the compiled engine gives the same results
+    as the rule functions.
+    """
+
+    # Words used in the tests above
+    WORDS = ["o", "oe", "Nrate", "Nthate", "Leakaretsi", "mookotaba",
+             "nthate", "nrate", "nthatisisa", "abc", "aac", "aa", "bbc",
+             "aaac", "aaa", "aaaa", "nk", "cabc", "ccabc", "ccab", "caa",
+             "caaa", "aabc", "cca", "bac"]
+
+    def test_letter_class(self):
+        """
+        Test whether letters are put in the right classes.
+        """
+        self.assertEqual(syllabifier.letter_class("a"), syllabifier.VOWEL)
+        self.assertEqual(syllabifier.letter_class("E"), syllabifier.VOWEL)
+        self.assertEqual(syllabifier.letter_class("N"), syllabifier.N)
+        self.assertEqual(syllabifier.letter_class("w"), syllabifier.W)
+        self.assertEqual(syllabifier.letter_class("W"), syllabifier.UPPER_W)
+        self.assertEqual(syllabifier.letter_class("t"), syllabifier.CONSONANT)
+        self.assertEqual(syllabifier.letter_class("-"), syllabifier.OTHER)
+
+    def test_fixture_words(self):
+        """
+        Test the compiled engine on the words of the other tests.
+        """
+        for word in self.WORDS:
+            self.assertEqual(syllabifier.syllabify_compiled(word),
+                             syllabifier.syllabify(word))
+
+    def test_syllabify_traced(self):
+        """
+        Test whether the traced variant gives the same results and
+        reports the matching rules.
+        """
+        for word in self.WORDS:
+            self.assertEqual(syllabifier.syllabify_traced(word)[0],
+                             syllabifier.syllabify(word))
+        self.assertEqual(syllabifier.syllabify_traced("o"), ("o", []))
+        self.assertEqual(syllabifier.syllabify_traced("nthate"),
+                         ("n tha te", [(1, ["C"]), (4, ["V", "CV"])]))
+
+    def test_syllabify_many(self):
+        """
+        Test whether syllabify_many gives the same results as syllabify
+        for every engine.
+        """
+        words = self.WORDS + self.WORDS[::-1] + [""]
+        expected = [syllabifier.syllabify(word) for word in words]
+        for engine in syllabifier.ENGINES:
+            self.assertEqual(syllabifier.syllabify_many(words, engine), expected)
+            self.assertEqual(syllabifier.syllabify_many(iter(words), engine), expected)
+
+    def test_count_rules(self):
+        """
+        Test whether the rules that match are counted, also through
+        syllabify_many and the cache, without changing the results.
+        """
+        counts = collections.Counter()
+        syllabifier.count_rules("nthate", counts)
+        self.assertEqual(counts, {"syllabified": 1, "C": 1, "V": 1, "CV": 1})
+        words = self.WORDS + self.WORDS
+        expected = [syllabifier.syllabify(word) for word in words]
+        for engine in syllabifier.ENGINES:
+            counts = collections.Counter()
+            self.assertEqual(syllabifier.syllabify_many(words, engine,
+                counts = counts), expected)
+            self.assertEqual(counts["syllabified"], len(set(self.WORDS)))
+        # Through the cache, only the words that are missed are syllabified
+        word_cache = cache.LRUCache(100)
+        cached_counts = collections.Counter()
+        self.assertEqual(syllabifier.syllabify_many(words,
+            cache = word_cache, counts = cached_counts), expected)
+        self.assertEqual(cached_counts["syllabified"], word_cache.misses)
+
+    def test_exceptions(self):
+        """
+        Test whether the words in the exception lexicon are syllabified
+        as given there, keeping their case, without running the rules.
+        """
+        exceptions = {"mang": [2], "lesotho": [2, 4]}
+        words = ["Mang", "mang", "LESOTHO", "ntate"]
+        expected = ["Ma ng", "ma ng", "LE SO THO", "n ta te"]
+        for engine in syllabifier.ENGINES:
+            self.assertEqual(syllabifier.syllabify_many(words, engine,
+                exceptions = exceptions), expected)
+        counts = collections.Counter()
+        self.assertEqual(syllabifier.syllabify_many(words, cache = cache.LRUCache(10),
+            counts = counts, exceptions = exceptions), expected)
+        self.assertEqual(counts["syllabified"], 1)
+        self.assertEqual(syllabifier.syllabify_text(["Mang, ntate?"],
+            exceptions = exceptions), "Ma ng, n ta te?")
+
+    def test_boundaries_many(self):
+        """
+        Test whether boundaries_many gives the boundaries of the
+        syllabified words for every engine, also through the cache and
+        the exception lexicon.
+        """
+        words = self.WORDS + self.WORDS[::-1] + ["", "Mang"]
+        expected = [syllabifier.find_boundaries(word) for word in words]
+        for engine in syllabifier.ENGINES:
+            self.assertEqual(syllabifier.boundaries_many(words, engine), expected)
+            self.assertEqual(syllabifier.boundaries_many(iter(words), engine), expected)
+        self.assertEqual(syllabifier.boundaries_many(words,
+            cache = cache.LRUCache(10)), expected)
+        self.assertEqual(syllabifier.boundaries_many(["Mang", "ntate"],
+            exceptions = {"mang": [2]}), [[2], [1, 3]])
+        for engine in syllabifier.ENGINES:
+            self.assertEqual(syllabifier.boundaries_chunk(["Mang", "", "ntate"], engine),
+                             ([4, 0, 5], bytes([0b10100100, 0b00000000])))
+
+    def test_syllabify_cached(self):
+        """
+        Test whether syllabification through the cache gives the same
+        results, keeping the case of the words.
+        """
+        word_cache = cache.LRUCache(100)
+        words = self.WORDS + [word.upper() for word in self.WORDS] + ["ngWa", "ngwa"]
+        expected = [syllabifier.syllabify(word) for word in words]
+        self.assertEqual(syllabifier.syllabify_many(words, cache = word_cache), expected)
+        self.assertEqual(syllabifier.syllabify_many(words, cache = word_cache), expected)
+        self.assertGreater(word_cache.hits, 0)
+        self.assertEqual(syllabifier.cache_key("Nrate"), "nrate")
+        self.assertEqual(syllabifier.cache_key("ngWa"), "ngWa")
+
+    def test_syllabify_text(self):
+        """
+        Test whether the words in running text are syllabified and
+        everything else is kept.
+        """
+        self.assertEqual(syllabifier.syllabify_text(["Nthate, o kae?\n", "Leakaretsi."]),
+                         "N tha te, o ka e?\nLe a ka re tsi.")
+        # The letters of words in running text are the ones recognised by
+        # is_vowel and is_consonant
+        for code in range(sys.maxunicode + 1):
+            letter = chr(code)
+            self.assertEqual(letter in text.LETTERS,
+                syllabifier.is_vowel(letter) or syllabifier.is_consonant(letter))
+
+    def test_all_short_words(self):
+        """
+        Test the compiled engine on all words of up to four letters
+        over letters from every class.
+        """
+        letters = "aEmNlgYwWtK\u212a-"
+        words = [""]
+        for _ in range(4):
+            words = [word + letter for word in words for letter in letters]
+            for word in words:
+                self.assertEqual(syllabifier.syllabify_compiled(word),
+                                 syllabifier.syllabify(word))
+
+
+class TestRegexEngine(unittest.TestCase):
+    """
+    This class tests whether the regex engine gives the same results as
+    the rule functions.
+    """
+
+    def test_letters(self):
+        """
+        Test whether the letters of the regular expression are the ones
+        recognised by is_vowel and is_consonant.
+        """
+        for code in range(0x3000):
+            letter = chr(code)
+            self.assertEqual(letter in syllabifier.VOWEL_LETTERS,
+                             syllabifier.is_vowel(letter))
+            self.assertEqual(letter in syllabifier.CONSONANT_LETTERS,
+                             syllabifier.is_consonant(letter))
+        self.assertTrue(syllabifier.is_consonant("\u212a"))
+
+    def test_all_short_words(self):
+        """
+        Test the regex engine on all words of up to four letters over
+        letters from every class, syllabified as one block.
+        """
+        letters = "aEmNlgYwWtK\u212a- "
+        words = [""]
+        all_words = [""]
+        for _ in range(4):
+            words = [word + letter for word in words for letter in letters]
+            all_words.extend(words)
+        expected = [syllabifier.syllabify(word) for word in all_words]
+        self.assertEqual(syllabifier.syllabify_block(all_words), expected)
+        self.assertEqual([syllabifier.syllabify_regex(word) for word in all_words],
+                         expected)
+        self.assertEqual(syllabifier.syllabify_block([]), [])
+        self.assertEqual(syllabifier.block_boundaries(all_words),
+                         [syllabifier.find_boundaries(word) for word in all_words])
+        self.assertEqual(syllabifier.block_boundaries([]), [])
+        self.assertEqual(syllabifier.regex_packed(all_words),
+                         syllabifier.boundaries_chunk(all_words))
+        self.assertEqual(syllabifier.regex_packed([]), ([], b""))
+
+    def test_syllabify_text(self):
+        """
+        Test whether running text is syllabified like with the compiled
+        engine.
+        """
+        lines = ["Nthate, o kae?\n", "Leakaretsi.\n", "\n", "Ngwana o lla."]
+        self.assertEqual(syllabifier.syllabify_text(lines, "regex"),
+                         syllabifier.syllabify_text(lines))
+
+
+@unittest.skipIf(not syllabifier.HAVE_NUMPY, "NumPy is not installed")
+class TestNumpyEngine(unittest.TestCase):
+    """
+    This class tests whether the numpy engine gives the same results as
+    the rule functions.
+    """
+
+    def test_lookup_tables(self):
+        """
+        Test whether the lookup tables agree with the letter predicates.
+        """
+        codes = syllabifier.encode_letters(["aN\u212a-\u00e9"])[1][0]
+        self.assertEqual(list(codes), [ord("a"), ord("N"), syllabifier.KELVIN_CODE,
+                                       ord("-"), syllabifier.OTHER_CODE])
+        self.assertEqual(list(syllabifier.VOWEL_TABLE[codes]),
+                         [True, False, False, False, False])
+        self.assertEqual(list(syllabifier.CONSONANT_TABLE[codes]),
+                         [False, True, True, False, False])
+
+    def test_all_short_words(self):
+        """
+        Test the numpy engine on all words of up to four letters over
+        letters from every class, syllabified as one batch.
+        """
+        letters = "aEmNlgYwWtK\u212a- \u00e9"
+        words = [""]
+        all_words = [""]
+        for _ in range(4):
+            words = [word + letter for word in words for letter in letters]
+            all_words.extend(words)
+        expected = [syllabifier.syllabify(word) for word in all_words]
+        self.assertEqual(syllabifier.syllabify_numpy(all_words), expected)
+        self.assertEqual(syllabifier.syllabify_numpy([]), [])
+        self.assertEqual(syllabifier.numpy_boundaries(all_words),
+                         [syllabifier.find_boundaries(word) for word in all_words])
+        self.assertEqual(syllabifier.numpy_boundaries([]), [])
+        self.assertEqual(syllabifier.numpy_packed(all_words),
+                         syllabifier.boundaries_chunk(all_words))
+        self.assertEqual(syllabifier.numpy_packed([]), ([], b""))
+        self.assertEqual(syllabifier.syllabify_numpy_word("Leakaretsi"),
+                         "Le a ka re tsi")
+
+    def test_syllabify_text(self):
+        """
+        Test whether running text is syllabified like with the compiled
+        engine.
+        """
+        lines = ["Nthate, o kae?\n", "Leakaretsi.\n", "\n", "Ngwana o lla."]
+        self.assertEqual(syllabifier.syllabify_text(lines, "numpy"),
+                         syllabifier.syllabify_text(lines))
+
 
 def main():
     """
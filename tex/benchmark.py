@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""benchmark.py
+
+This program contains benchmarks for the TeX-based syllabification
+system.  Each benchmark is selected with a subcommand and prints its
+timings to standard output.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import hyphenate
+import syllabifier
+import trie
+
+TEX_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEX_DIR, os.pardir, "common"))
+import corpus
+import text
+
+
+def time_command(command, repeat):
+    """Run command (a list of arguments) repeat times in the tex
+    directory and return the list of wall clock times in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd = TEX_DIR, check = True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    """Print the minimum and median of the times (in milliseconds)."""
+    print("%-30s min %8.2f ms   median %8.2f ms" % (name,
+        1000 * min(times), 1000 * statistics.median(times)))
+
+
+def bench_startup(args):
+    """Measure how long a fresh interpreter takes to import hyphenate.
+    The "eager" case also builds the English hyphenator, which is what
+    every import used to do.
+    """
+    cases = [
+        ("python (baseline)", "pass"),
+        ("import hyphenate", "import hyphenate"),
+        ("import hyphenate (eager)", "import hyphenate; hyphenate.hyphenator"),
+    ]
+    for name, code in cases:
+        report(name, time_command([sys.executable, "-c", code], args.repeat))
+
+
+def words_per_second(function, words, repeat):
+    """Apply function to all words repeat times and return the best
+    throughput in words per second.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in words:
+            function(word)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return len(words) / best
+
+
+def load_words(args):
+    """Return the words from the input file, or a synthetic Sesotho word
+    list when no input file is given.
+    """
+    if args.input != None:
+        return corpus.read_words(args.input)
+    return corpus.generate_words(args.count)
+
+
+def bench_backends(args):
+    """Compare the words per second of the pattern trie backends of the
+    Hyphenator on a word list.
+    """
+    words = load_words(args)
+    patterns = syllabifier.read_patterns(open(args.patterns, "r"))
+    alphabet = trie.read_alphabet(args.alphabet)
+    hyphenators = []
+    for backend in hyphenate.BACKENDS:
+        hyphenators.append((backend,
+            hyphenate.Hyphenator(patterns, backend = backend, alphabet = alphabet)))
+    fd, filename = tempfile.mkstemp(suffix = ".trie")
+    os.close(fd)
+    hyphenators[0][1].save(filename)
+    hyphenators.append(("flat (memory-mapped)", hyphenate.Hyphenator.load(filename)))
+
+    print("%d words, %d patterns" % (len(words), len(patterns.split())))
+    expected = [hyphenators[0][1].hyphenate_word(word) for word in words]
+    for name, hyphenator in hyphenators:
+        if [hyphenator.hyphenate_word(word) for word in words] != expected:
+            print("%-30s output differs from dict backend" % name)
+        print("%-30s %10.0f words/s" % (name,
+            words_per_second(hyphenator.hyphenate_word, words, args.repeat)))
+    del hyphenators
+    os.remove(filename)
+
+
+def bench_automaton(args):
+    """Compare the words per second of the restart-per-position walk of
+    the dict backend with the single pass of the Aho-Corasick backend,
+    for words of increasing length (in syllables) and random subsets of
+    the patterns of increasing size.
+    """
+    patterns = syllabifier.read_patterns(open(args.patterns, "r")).split()
+    rnd = random.Random(0)
+    for fraction in [float(value) for value in args.fractions.split(",")]:
+        subset = " ".join(rnd.sample(patterns, max(1, int(fraction * len(patterns)))))
+        restart = hyphenate.Hyphenator(subset)
+        automaton = hyphenate.Hyphenator(subset, backend = "aho")
+        print("%d patterns" % len(subset.split()))
+        for syllables in [int(value) for value in args.syllables.split(",")]:
+            words = corpus.generate_words(args.count, lengths = {syllables: 1})
+            if [automaton.hyphenate_word(word) for word in words] != \
+               [restart.hyphenate_word(word) for word in words]:
+                print("%4d syllables: output differs from dict backend" % syllables)
+            restart_speed = words_per_second(restart.hyphenate_word, words, args.repeat)
+            automaton_speed = words_per_second(automaton.hyphenate_word, words, args.repeat)
+            print("%4d syllables  restart %10.0f words/s   aho %10.0f words/s   speed-up %5.2f" %
+                (syllables, restart_speed, automaton_speed, automaton_speed / restart_speed))
+
+
+def job_counts(maximum):
+    """Return the numbers of jobs 1, 2, 4, ... up to and including
+    maximum.
+    """
+    counts = []
+    jobs = 1
+    while jobs < maximum:
+        counts.append(jobs)
+        jobs *= 2
+    counts.append(maximum)
+    return counts
+
+
+def bench_scaling(args):
+    """Measure the throughput of syllabifier.py for increasing numbers
+    of worker processes (--jobs).
+    """
+    words = load_words(args)
+    directory = tempfile.mkdtemp()
+    input_name = os.path.join(directory, "input.txt")
+    output_name = os.path.join(directory, "output.txt")
+    with open(input_name, "w") as fp:
+        fp.write("".join(word + "\n" for word in words))
+    print("%d words" % len(words))
+    for jobs in job_counts(args.max_jobs):
+        command = [sys.executable, "syllabifier.py", "-p", os.path.abspath(args.patterns), "-i", input_name,
+            "-o", output_name, "-j", str(jobs)]
+        elapsed = min(time_command(command, args.repeat))
+        print("%3d jobs %10.0f words/s" % (jobs, len(words) / elapsed))
+    os.remove(input_name)
+    os.remove(output_name)
+    os.rmdir(directory)
+
+
+def bench_text(args):
+    """Measure the throughput of syllabifying paragraphs of running
+    text (one paragraph per line).
+    """
+    paragraphs = corpus.generate_text(args.paragraphs)
+    characters = sum(len(paragraph) for paragraph in paragraphs)
+    words = sum(len(text.WORD.findall(paragraph)) for paragraph in paragraphs)
+    patterns = syllabifier.read_patterns(open(args.patterns, "r"))
+    hyphenator = hyphenate.Hyphenator(patterns)
+    engine = lambda lines: syllabifier.syllabify_text(lines, hyphenator)
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for index in range(0, len(paragraphs), args.chunk_size):
+            engine(paragraphs[index:index + args.chunk_size])
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    print("%d paragraphs, %d words, %d characters" % (len(paragraphs), words, characters))
+    print("%10.0f words/s %12.0f characters/s" % (words / best, characters / best))
+
+
+def main():
+    """Commandline arguments are parsed and the selected benchmark is
+    run.
+    """
+
+    parser = argparse.ArgumentParser(description="This program runs benchmarks for the TeX-based syllabification system.")
+    parser.add_argument("-r", "--repeat",
+        help = "number of times each measurement is repeated",
+        action = "store",
+        type = int,
+        default = 10,
+        metavar = "N")
+    subparsers = parser.add_subparsers(dest = "benchmark")
+    subparsers.required = True
+    parser_startup = subparsers.add_parser("startup",
+        help = "time taken by a fresh interpreter to import hyphenate")
+    parser_startup.set_defaults(func = bench_startup)
+    parser_backends = subparsers.add_parser("backends",
+        help = "words per second of the Hyphenator backends")
+    parser_backends.add_argument("-p", "--patterns",
+        help = "name of patterns file",
+        action = "store",
+        required = True,
+        metavar = "FILE")
+    parser_backends.add_argument("-a", "--alphabet",
+        help = "name of patgen translate file defining the letters",
+        action = "store",
+        default = os.path.join(TEX_DIR, "sesotho.tr"),
+        metavar = "FILE")
+    parser_backends.add_argument("-i", "--input",
+        help = "name of text file containing words (default: synthetic Sesotho words)",
+        action = "store",
+        metavar = "FILE")
+    parser_backends.add_argument("-n", "--count",
+        help = "number of synthetic words",
+        action = "store",
+        type = int,
+        default = 100000,
+        metavar = "N")
+    parser_backends.set_defaults(func = bench_backends)
+    parser_automaton = subparsers.add_parser("automaton",
+        help = "words per second of the Aho-Corasick backend against the dict backend for long words and large pattern sets")
+    parser_automaton.add_argument("-p", "--patterns",
+        help = "name of patterns file",
+        action = "store",
+        required = True,
+        metavar = "FILE")
+    parser_automaton.add_argument("-s", "--syllables",
+        help = "comma-separated numbers of syllables of the synthetic words (default: 2,8,32,128)",
+        action = "store",
+        default = "2,8,32,128",
+        metavar = "N,...")
+    parser_automaton.add_argument("-f", "--fractions",
+        help = "comma-separated fractions of the patterns to use (default: 0.1,0.5,1)",
+        action = "store",
+        default = "0.1,0.5,1",
+        metavar = "F,...")
+    parser_automaton.add_argument("-n", "--count",
+        help = "number of synthetic words of every length",
+        action = "store",
+        type = int,
+        default = 1000,
+        metavar = "N")
+    parser_automaton.set_defaults(func = bench_automaton)
+    parser_scaling = subparsers.add_parser("scaling",
+        help = "throughput of syllabifier.py for 1, 2, 4, ... jobs")
+    parser_scaling.add_argument("-p", "--patterns",
+        help = "name of patterns file",
+        action = "store",
+        required = True,
+        metavar = "FILE")
+    parser_scaling.add_argument("-i", "--input",
+        help = "name of text file containing words (default: synthetic Sesotho words)",
+        action = "store",
+        metavar = "FILE")
+    parser_scaling.add_argument("-n", "--count",
+        help = "number of synthetic words",
+        action = "store",
+        type = int,
+        default = 1000000,
+        metavar = "N")
+    parser_scaling.add_argument("-j", "--max-jobs",
+        help = "largest number of jobs (default: number of CPUs)",
+        action = "store",
+        type = int,
+        default = os.cpu_count(),
+        metavar = "N")
+    parser_scaling.set_defaults(func = bench_scaling)
+    parser_text = subparsers.add_parser("text",
+        help = "throughput on paragraphs of running text")
+    parser_text.add_argument("-p", "--patterns",
+        help = "name of patterns file",
+        action = "store",
+        required = True,
+        metavar = "FILE")
+    parser_text.add_argument("-n", "--paragraphs",
+        help = "number of synthetic paragraphs of 100 words",
+        action = "store",
+        type = int,
+        default = 2000,
+        metavar = "N")
+    parser_text.add_argument("--chunk-size",
+        help = "number of paragraphs syllabified at once",
+        action = "store",
+        type = int,
+        default = 100,
+        metavar = "N")
+    parser_text.set_defaults(func = bench_text)
+    args = parser.parse_args()
+
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""compile_patterns.py
+
+This program takes a patterns file (as created by patgen, see
+make_full_patterns.sh) as input.  It writes the patterns in a compiled
+binary format that syllabifier.py can memory-map using its -t
+argument, which avoids parsing the patterns on every start-up.
+"""
+
+import argparse
+import logging
+import hyphenate
+import syllabifier
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the
+    patterns are read, compiled and written to output.
+    """
+
+    parser = argparse.ArgumentParser(description="This program reads in a patterns file and writes it in a compiled format that can be memory-mapped by syllabifier.py.")
+    parser.add_argument("-p", "--patterns",
+        help = "name of patterns file",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-o", "--output",
+        help = "name of compiled patterns file",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.patterns == None:
+        parser.error("A patterns filename is required.")
+    fp_patterns = open(args.patterns, "r")
+
+    if args.output == None:
+        parser.error("An output filename is required.")
+
+    patterns = syllabifier.read_patterns(fp_patterns)
+    logging.debug("Compiling " + str(len(patterns.split())) + " patterns")
+    hyphenate.Hyphenator(patterns).save(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,18 +16,51 @@
 
 import re
 
+import trie
+
 __version__ = '1.0.20070709'
 
+# Ways of storing and matching the patterns.  'dict' walks the tree of
+# nested dicts, 'flat' uses the flat node/edge arrays of a compiled
+# pattern file, 'array' a dense transition table over the alphabet and
+# 'aho' an Aho-Corasick automaton that finds all patterns in one pass.
+BACKENDS = ('dict', 'flat', 'array', 'aho')
+
 class Hyphenator:
-    def __init__(self, patterns, exceptions=''):
+    def __init__(self, patterns, exceptions='', backend='dict', alphabet='',
+                 cache=None):
+        # cache is an optional object with get(key) and put(key, value)
+        # methods (such as an LRUCache) that remembers the points of words.
+        self.cache = cache
         self.tree = {}
         for pattern in patterns.split():
             self._insert_pattern(pattern)
+        if backend == 'dict':
+            self._match = self._match_tree
+        else:
+            if backend == 'flat':
+                self._trie = trie.FlatTrie.from_tree(self.tree)
+            elif backend == 'array':
+                self._trie = trie.ArrayTrie.from_tree(self.tree, alphabet)
+            elif backend == 'aho':
+                self._trie = trie.AhoCorasickTrie.from_tree(self.tree)
+            else:
+                raise ValueError("unknown backend %r" % backend)
+            self._match = self._trie.match
 
         self.exceptions = {}
         for ex in exceptions.split():
-            # Convert the hyphenated pattern into a point array for use later.
-            self.exceptions[ex.replace('-', '')] = [0] + [ int(h == '-') for h in re.split(r"[a-z]", ex) ]
+            # Convert the hyphenated word into a point array for use later,
+            # with the same layout as the points of _points: a point
+            # before the '.', one before every letter and one after the
+            # last letter.  Any letter is allowed, not only a-z.
+            points = [0, 0]
+            for c in ex:
+                if c == '-':
+                    points[-1] = 1
+                else:
+                    points.append(0)
+            self.exceptions[ex.replace('-', '')] = points
 
     def _insert_pattern(self, pattern):
         # Convert the a pattern like 'a1bc3d4' into a string of chars 'abcd'
@@ -45,32 +78,118 @@ class Hyphenator:
             t = t[c]
         t[None] = points
 
+    @classmethod
+    def load(cls, filename, exceptions='', cache=None):
+        """ Create a Hyphenator from a pattern file written by save.  The
+            file is memory-mapped, so no patterns need to be parsed.
+        """
+        hyphenator = cls('', exceptions, cache=cache)
+        hyphenator._trie = trie.FlatTrie.load(filename)
+        hyphenator._match = hyphenator._trie.match
+        return hyphenator
+
+    def save(self, filename):
+        """ Write the patterns to filename in the compiled format that load
+            reads.
+        """
+        trie.write_tree(filename, self.tree)
+
+    def _match_tree(self, work):
+        points = [0] * (len(work)+1)
+        for i in range(len(work)):
+            t = self.tree
+            for c in work[i:]:
+                if c in t:
+                    t = t[c]
+                    if None in t:
+                        p = t[None]
+                        for j in range(len(p)):
+                            points[i+j] = max(points[i+j], p[j])
+                else:
+                    break
+        return points
+
+    def _match_tree_counted(self, work, counts):
+        # Like _match_tree, but counts the trie nodes visited and the
+        # patterns found.
+        counts['matched'] += 1
+        points = [0] * (len(work)+1)
+        for i in range(len(work)):
+            t = self.tree
+            for c in work[i:]:
+                if c in t:
+                    t = t[c]
+                    counts['nodes'] += 1
+                    if None in t:
+                        counts['patterns'] += 1
+                        p = t[None]
+                        for j in range(len(p)):
+                            points[i+j] = max(points[i+j], p[j])
+                else:
+                    break
+        return points
+
+    def instrument(self, counts):
+        """ Count the words matched against the patterns ('matched'), the
+            trie nodes visited ('nodes') and the patterns found
+            ('patterns') in counts (a collections.Counter) from now on,
+            with the backend that is used.  The words and patterns are
+            the same for every backend, and so are the nodes, except
+            for the 'aho' backend, which counts the states it enters
+            (including those reached through failure links).  Without
+            this, the matching does not count anything.
+        """
+        if hasattr(self, '_trie'):
+            match = self._trie.match_counted
+        else:
+            match = self._match_tree_counted
+        self._match = lambda work: match(work, counts)
+
+    def _points(self, word):
+        work = '.' + word + '.'
+        points = self._match(work)
+        # No hyphens in the first two chars or the last two.
+        points[1] = points[2] = points[-2] = points[-3] = 0
+        return points
+
+    def _word_points(self, word):
+        """ Returns the points of a word, or None for a short word that
+            isn't hyphenated.
+        """
+        key = word.lower()
+        # If the word is an exception, get the stored points (also for
+        # short words).
+        points = self.exceptions.get(key)
+        if points is None:
+            # Short words aren't hyphenated.
+            if len(word) <= 4:
+                return None
+            if self.cache is not None:
+                points = self.cache.get(key)
+                if points is None:
+                    points = self._points(key)
+                    self.cache.put(key, points)
+            else:
+                points = self._points(key)
+        return points
+
+    def boundaries(self, word):
+        """ Given a word, returns the list of indices of its hyphenation
+            points (index i lies between letter i - 1 and letter i),
+            without building the pieces.
+        """
+        points = self._word_points(word)
+        if points is None:
+            return []
+        return [i for i in range(1, len(word)) if points[i + 1] % 2]
+
     def hyphenate_word(self, word):
         """ Given a word, returns a list of pieces, broken at the possible
             hyphenation points.
         """
-        # Short words aren't hyphenated.
-        if len(word) <= 4:
+        points = self._word_points(word)
+        if points is None:
             return [word]
-        # If the word is an exception, get the stored points.
-        if word.lower() in self.exceptions:
-            points = self.exceptions[word.lower()]
-        else:
-            work = '.' + word.lower() + '.'
-            points = [0] * (len(work)+1)
-            for i in range(len(work)):
-                t = self.tree
-                for c in work[i:]:
-                    if c in t:
-                        t = t[c]
-                        if None in t:
-                            p = t[None]
-                            for j in range(len(p)):
-                                points[i+j] = max(points[i+j], p[j])
-                    else:
-                        break
-            # No hyphens in the first two chars or the last two.
-            points[1] = points[2] = points[-2] = points[-3] = 0
 
         # Examine the points to build the pieces list.
         pieces = ['']
@@ -507,11 +626,29 @@ presents project projects reci-procity re-cog-ni-zance ref-or-ma-tion
 ret-ri-bu-tion ta-ble
 """
 
-hyphenator = Hyphenator(patterns, exceptions)
-hyphenate_word = hyphenator.hyphenate_word
+# The English hyphenator is only built when it is actually used, so
+# that importing this module (for the Hyphenator class) stays cheap.
+_hyphenator = None
+
+def _english_hyphenator():
+    """ Return the Hyphenator for the built-in English patterns, building
+        it on first use.
+    """
+    global _hyphenator
+    if _hyphenator is None:
+        _hyphenator = Hyphenator(patterns, exceptions)
+    return _hyphenator
+
+def hyphenate_word(word):
+    """ Hyphenate word using the built-in English patterns.
+    """
+    return _english_hyphenator().hyphenate_word(word)
 
-del patterns
-del exceptions
+def __getattr__(name):
+    # Keep the old module attribute "hyphenator" working (built lazily).
+    if name == 'hyphenator':
+        return _english_hyphenator()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 if __name__ == '__main__':
     import sys
@@ -9,19 +9,171 @@ hyphenation system.
 
 import argparse
 import logging
+import os
 import hyphenate
 import re
+import sys
+import trie
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "common"))
+import boundaries
+import cache
+import dedupe
+import lexicon
+import mapped
+import parallel
+import server
+import stats
+import streams
+import text
 
 def syllabify(word, syllabifier):
     """Apply syllabification to the word and return the syllabified
     word (syllable boundaries indicated by a space).
     """
-    logging.debug("Syllabifying " + word)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Syllabifying %s", word)
     if len(word) <= 1:
         return word
     return " ".join(syllabifier.hyphenate_word(word))
 
 
+def syllabify_many(words, syllabifier):
+    """Apply syllabification to all words (an iterable) and return the
+    list of syllabified words in the same order.  Every distinct word is
+    only syllabified once.
+    """
+    hyphenate_word = syllabifier.hyphenate_word
+    syllabified = {}
+    result = []
+    for word in words:
+        syl_word = syllabified.get(word)
+        if syl_word == None:
+            # hyphenate_word leaves short words (including those of at
+            # most one letter) as they are
+            syl_word = syllabified[word] = " ".join(hyphenate_word(word))
+        result.append(syl_word)
+    return result
+
+
+def boundaries_many(words, syllabifier):
+    """Return the list of syllable boundaries (the indices of the
+    hyphenation points, see Hyphenator.boundaries) of all words (an
+    iterable) in the same order, without building the syllabified
+    words.  Every distinct word is only looked at once.
+    """
+    find = syllabifier.boundaries
+    found = {}
+    result = []
+    for word in words:
+        boundaries = found.get(word)
+        if boundaries == None:
+            boundaries = found[word] = find(word)
+        result.append(boundaries)
+    return result
+
+
+def boundaries_chunk(words, syllabifier):
+    """Return the lengths of a list of words and the bits of their
+    syllable boundaries (see boundaries_many), as written to the binary
+    output format by boundaries.BoundaryWriter.
+    """
+    lengths = [len(word) for word in words]
+    return lengths, boundaries.pack(lengths, boundaries_many(words, syllabifier))
+
+
+def syllabify_text(lines, syllabifier):
+    """Syllabify the words in lines of running text (a list of lines
+    including their newlines) and return the resulting text as one
+    string.  Everything in between the words is kept as it is.
+    """
+    return text.syllabify_lines(lines,
+        lambda words: syllabify_many(words, syllabifier))
+
+
+def make_syllabifier(args, word_cache):
+    """Create the Hyphenator described by the commandline arguments,
+    either by loading a compiled patterns file or by reading a patterns
+    file.  The words in the exception lexicon (if any) are given to the
+    Hyphenator as exceptions.
+    """
+    exceptions = lexicon.hyphenated(lexicon.load(args.exceptions))
+    if args.trie != None:
+        return hyphenate.Hyphenator.load(args.trie, exceptions,
+            cache = word_cache)
+    fp_patterns = open(args.patterns, "r")
+    patterns = read_patterns(fp_patterns)
+    backend = "dict"
+    if args.backend != None:
+        backend = args.backend
+    alphabet = ""
+    if args.alphabet != None:
+        alphabet = trie.read_alphabet(args.alphabet)
+    return hyphenate.Hyphenator(patterns, exceptions,
+        backend = backend, alphabet = alphabet, cache = word_cache)
+
+def check_patterns_arguments(parser, args):
+    """Report an error through parser if args do not describe the
+    patterns (see make_syllabifier).  A compiled patterns file is always
+    matched with the flat backend, so no other backend or alphabet can
+    be chosen for it.
+    """
+    if args.trie == None and args.patterns == None:
+        parser.error("A patterns filename is required.")
+    if args.trie != None and (args.backend != None or args.alphabet != None):
+        parser.error("The backend and alphabet cannot be chosen for a compiled patterns file.")
+
+# Syllabifier, mode, output format and memory-mapped input used in a
+# worker process (see init_worker)
+worker_syllabifier = None
+worker_text = False
+worker_format = "text"
+worker_input = None
+
+def init_worker(args):
+    """Set up a worker process: create its syllabifier (once per
+    worker) and cache as described by the commandline arguments,
+    remember whether the input is running text and the output format,
+    and map the input file when it is memory-mapped.
+    """
+    global worker_syllabifier, worker_text, worker_format, worker_input
+    worker_syllabifier = make_syllabifier(args, cache.from_arguments(args))
+    worker_text = args.text
+    worker_format = args.format
+    if args.mmap:
+        worker_input = mapped.MappedFile(args.input)
+
+def syllabify_chunk(chunk):
+    """Apply syllabify_many (or syllabify_text for running text, or
+    boundaries_chunk when only the boundaries are written) to a chunk of
+    the input in a worker process.
+    """
+    if worker_format != "text":
+        return boundaries_chunk(chunk, worker_syllabifier)
+    if worker_text:
+        return syllabify_text(chunk, worker_syllabifier)
+    return syllabify_many(chunk, worker_syllabifier)
+
+def syllabify_range(byte_range):
+    """Apply syllabify_chunk to the words in a (start, end) byte range of
+    the memory-mapped input in a worker process.
+    """
+    return syllabify_chunk(worker_input.words(*byte_range))
+
+
+def read_patterns(fp_patterns):
+    """Read a patgen patterns file (with the patterns between
+    \\patterns{ and }) and return the patterns as one string separated
+    by whitespace.
+    """
+    patterns = []
+    for pat in fp_patterns:  # Simply read a line from fp_patterns
+        new_pat = pat.rstrip()
+        if new_pat != "}":
+            patterns.append(re.sub(r'\\patterns{', "", new_pat))
+    return " ".join(patterns)
+
 
 def main():
     """Commandline arguments are parsed and handled.  Next, the input
@@ -31,17 +183,41 @@ def main():
 
     parser = argparse.ArgumentParser(description="This program reads in a list of words, one per line and adds syllabification boundaries, which is then written to the output file.")
     parser.add_argument("-i", "--input",
-        help = "name of text file containing input words",
+        help = "name of text file containing input words (- for standard input)",
         action = "store",
         metavar = "FILE")
     parser.add_argument("-o", "--output",
-        help = "name of output file",
+        help = "name of output file (- for standard output)",
         action = "store",
         metavar = "FILE")
     parser.add_argument("-p", "--patterns",
         help = "name of patterns file",
         action = "store",
         metavar = "FILE")
+    parser.add_argument("-t", "--trie",
+        help = "name of compiled patterns file (see compile_patterns.py), used instead of --patterns",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-b", "--backend",
+        help = "pattern trie backend to use, not with --trie (default: dict)",
+        action = "store",
+        choices = hyphenate.BACKENDS)
+    parser.add_argument("-a", "--alphabet",
+        help = "name of patgen translate file (e.g., sesotho.tr) defining the letter codes of the array backend, not with --trie",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("--text",
+        help = "the input is running text instead of one word per line; only the words are syllabified and everything else is kept",
+        action = "store_true")
+    lexicon.add_arguments(parser)
+    cache.add_arguments(parser)
+    parallel.add_arguments(parser)
+    streams.add_arguments(parser)
+    mapped.add_arguments(parser)
+    boundaries.add_arguments(parser)
+    stats.add_arguments(parser)
+    dedupe.add_arguments(parser)
+    server.add_arguments(parser)
     parser.add_argument("-d", "--debug",
         help = "provide debugging information",
         action = "store_const",
@@ -53,32 +229,129 @@ def main():
 
     logging.basicConfig(level = args.loglevel)
 
+    if args.serve != None:
+        check_patterns_arguments(parser, args)
+        if args.batch_size < 1:
+            parser.error("The batch size should be at least 1.")
+        try:
+            server.parse_address(args.serve)
+        except ValueError as error:
+            parser.error(str(error))
+        try:
+            lexicon.load(args.exceptions)
+        except ValueError as error:
+            parser.error(str(error))
+        word_cache = cache.from_arguments(args)
+        syllabifier = make_syllabifier(args, word_cache)
+        server.serve(args, lambda words: syllabify_many(words, syllabifier))
+        if word_cache != None:
+            cache.close(word_cache, args)
+        return
+
     if args.input == None:
         parser.error("An input filename is required.")
-    fp_input = open(args.input, "r")
+    mapped.check_arguments(parser, args)
+    streams.check_arguments(parser, args)
+    if args.mmap:
+        input_file = mapped.MappedFile(args.input)
+    else:
+        fp_input = streams.open_input(args.input, args.buffer_size)
 
     if args.output == None:
         parser.error("An output filename is required.")
-    fp_output = open(args.output, "w")
+    if args.format == "text":
+        fp_output = streams.open_output(args.output, args.buffer_size)
+    else:
+        fp_output = boundaries.open_output(args.output, args.buffer_size)
 
-    if args.patterns == None:
-        parser.error("A patterns filename is required.")
-    fp_patterns = open(args.patterns, "r")
-    
-    # Read in patterns from pattern file
-    patterns = ""
-    for pat in fp_patterns:  # Simply read a line from fp_patterns
-        new_pat = pat.rstrip()
-        if new_pat != "}":
-            patterns += re.sub(r'\\patterns{', "", new_pat) + " "
-    exceptions = ""
-    
-    # Create syllabifier
-    syllabifier = hyphenate.Hyphenator(patterns, exceptions)
-
-    for word in fp_input:  # Simply read a line from fp_input
-        syl_word = syllabify(word.rstrip(), syllabifier) # Syllabify and remove newline
-        fp_output.write(syl_word + "\n")  # Write output to fp_output
+    check_patterns_arguments(parser, args)
+
+    if args.jobs < 1:
+        parser.error("The number of jobs should be at least 1.")
+
+    # Check the exception lexicon before the syllabifiers are created
+    # (possibly in worker processes)
+    try:
+        lexicon.load(args.exceptions)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.jobs > 1 and args.stats != None:
+        parser.error("Statistics are not available with more than one job.")
+    dedupe.check_arguments(parser, args)
+    boundaries.check_arguments(parser, args)
+    if (args.types or args.type_counts) and args.stats != None:
+        parser.error("Statistics are not available in the type modes.")
+
+    if args.types or args.type_counts:
+        if args.jobs > 1:
+            syllabify_chunks = lambda chunks: parallel.map_chunks(
+                syllabify_chunk, chunks, args.jobs, init_worker, (args,))
+        else:
+            syllabifier = make_syllabifier(args, None)
+            syllabify_chunks = lambda chunks: (syllabify_many(words,
+                syllabifier) for words in chunks)
+        dedupe.run(fp_input, fp_output, syllabify_chunks, args)
+        return
+
+    if args.text:
+        chunks = streams.read_line_chunks(fp_input, args.chunk_size)
+    elif args.mmap:
+        chunks = input_file.chunks(args.chunk_size)
+    else:
+        chunks = streams.read_chunks(fp_input, args.chunk_size)
+
+    # The statistics are collected by wrapping the steps, so nothing
+    # changes when they are not requested
+    statistics = None
+    if args.stats != None:
+        statistics = stats.Statistics()
+        chunks = statistics.timed("stats", statistics.count_words(
+            statistics.timed("read", chunks), args.text))
+
+    word_cache = None
+    if args.jobs > 1:
+        # Every worker creates its own syllabifier and cache (which is
+        # not saved afterwards).  With a memory-mapped input, the workers
+        # read the words of the byte ranges they are given themselves.
+        if args.mmap:
+            results = parallel.map_chunks(syllabify_range,
+                input_file.ranges(args.chunk_size), args.jobs, init_worker,
+                (args,))
+        else:
+            results = parallel.map_chunks(syllabify_chunk, chunks, args.jobs,
+                init_worker, (args,))
+    else:
+        word_cache = cache.from_arguments(args)
+        syllabifier = make_syllabifier(args, word_cache)
+        if statistics != None:
+            syllabifier.instrument(statistics.counts)
+        if args.text:
+            results = (syllabify_text(lines, syllabifier) for lines in chunks)
+        elif args.format != "text":
+            results = (boundaries_chunk(words, syllabifier) for words in chunks)
+        else:
+            results = (syllabify_many(words, syllabifier) for words in chunks)
+
+    write = streams.write_chunk
+    if args.text:
+        write = streams.write_text
+    elif args.format != "text":
+        write = boundaries.write_chunk
+    if statistics != None:
+        statistics.cache = word_cache
+        results = statistics.timed("syllabify", results)
+        for result in results:
+            statistics.call("write", write, fp_output, result)
+    else:
+        for result in results:
+            write(fp_output, result)
+    if args.format != "text":
+        fp_output.close()
+
+    if word_cache != None:
+        cache.close(word_cache, args)
+    if statistics != None:
+        stats.report(statistics, args.stats)
 
 
 if __name__ == '__main__':
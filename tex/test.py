@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""test.py
+
+This program tests the TeX-based syllabification system.
+"""
+
+import collections
+import io
+import os
+import tempfile
+import unittest
+import hyphenate
+import syllabifier
+import train_patterns
+import trie
+import cache
+
+# A few words to compare the different pattern tries on.
+WORDS = ["hyphenation", "supercalifragilisticexpialidocious", "project",
+         "associate", "table", "algorithm", "mookotaba", "nthatisisa",
+         "leakaretsi", "ngwana", "nwanywetswa", "naïve", "ho", "a"]
+
+
+class TestCompiledTrie(unittest.TestCase):
+    """
+    This class tests saving and loading compiled pattern files.
+    """
+
+    def setUp(self):
+        self.hyphenator = hyphenate.Hyphenator(hyphenate.patterns)
+        fd, self.filename = tempfile.mkstemp(suffix = ".trie")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_round_trip(self):
+        """
+        Test whether a loaded compiled file hyphenates like the patterns
+        it was created from.
+        """
+        self.hyphenator.save(self.filename)
+        loaded = hyphenate.Hyphenator.load(self.filename)
+        for word in WORDS:
+            self.assertEqual(loaded.hyphenate_word(word),
+                             self.hyphenator.hyphenate_word(word))
+
+    def test_not_compiled(self):
+        """
+        Test whether loading a file that is not a compiled pattern file
+        is refused.
+        """
+        with open(self.filename, "w") as fp:
+            fp.write("\\patterns{a1b\n}\n" * 4)
+        self.assertRaises(ValueError, hyphenate.Hyphenator.load, self.filename)
+
+
+class TestBackends(unittest.TestCase):
+    """
+    This class tests whether all pattern trie backends give the same
+    results.
+    """
+
+    def test_backends(self):
+        """
+        Test whether every backend hyphenates like the dict backend.
+        """
+        alphabet = trie.read_alphabet("sesotho.tr")
+        expected = hyphenate.Hyphenator(hyphenate.patterns)
+        for backend in hyphenate.BACKENDS:
+            hyphenator = hyphenate.Hyphenator(hyphenate.patterns,
+                backend = backend, alphabet = alphabet)
+            for word in WORDS:
+                self.assertEqual(hyphenator.hyphenate_word(word),
+                                 expected.hyphenate_word(word))
+
+    def test_instrument(self):
+        """
+        Test whether every backend (and a loaded compiled file) counts
+        the same words and patterns, and all but the Aho-Corasick
+        automaton the same trie nodes, without changing the results.
+        """
+        alphabet = trie.read_alphabet("sesotho.tr")
+        expected = hyphenate.Hyphenator(hyphenate.patterns)
+        hyphenators = [hyphenate.Hyphenator(hyphenate.patterns,
+            backend = backend, alphabet = alphabet)
+            for backend in hyphenate.BACKENDS]
+        fd, filename = tempfile.mkstemp(suffix = ".trie")
+        os.close(fd)
+        try:
+            expected.save(filename)
+            hyphenators.append(hyphenate.Hyphenator.load(filename))
+            all_counts = []
+            for hyphenator in hyphenators:
+                counts = collections.Counter()
+                hyphenator.instrument(counts)
+                for word in WORDS:
+                    self.assertEqual(hyphenator.hyphenate_word(word),
+                                     expected.hyphenate_word(word))
+                all_counts.append(counts)
+        finally:
+            os.remove(filename)
+        self.assertEqual(all_counts[0]["matched"], 12)
+        self.assertGreater(all_counts[0]["patterns"], 0)
+        for backend, counts in zip(hyphenate.BACKENDS + ("load",), all_counts):
+            if backend == "aho":
+                self.assertEqual(counts["matched"], all_counts[0]["matched"])
+                self.assertEqual(counts["patterns"], all_counts[0]["patterns"])
+                # The automaton is used, not the walk of the dict backend
+                self.assertNotEqual(counts["nodes"], all_counts[0]["nodes"])
+            else:
+                self.assertEqual(counts, all_counts[0])
+
+    def test_aho_long_words(self):
+        """
+        Test whether the Aho-Corasick backend finds the same points as
+        the dict backend in long words, in which many patterns overlap.
+        """
+        expected = hyphenate.Hyphenator(hyphenate.patterns)
+        automaton = hyphenate.Hyphenator(hyphenate.patterns, backend = "aho")
+        for length in range(1, len(WORDS)):
+            word = "".join(WORDS[:length]).lower()
+            self.assertEqual(automaton._points(word), expected._points(word))
+
+    def test_unknown_backend(self):
+        """
+        Test whether an unknown backend is refused.
+        """
+        self.assertRaises(ValueError, hyphenate.Hyphenator, "a1b",
+                          backend = "unknown")
+
+    def test_read_alphabet(self):
+        """
+        Test whether the letters are read from the translate file.
+        """
+        self.assertEqual(trie.read_alphabet("sesotho.tr"),
+                         "abcdefghijklmnopqrstuvwxyz'")
+
+
+class TestExceptions(unittest.TestCase):
+    """
+    This class tests the exceptions of the Hyphenator.
+    """
+
+    def test_exceptions(self):
+        """
+        Test whether exceptions are used instead of the patterns, also
+        for short words and letters outside a-z, keeping the case.
+        """
+        hyphenator = hyphenate.Hyphenator(hyphenate.patterns,
+                                          "ma-ng mo-s'a na-ï-ve")
+        self.assertEqual(hyphenator.hyphenate_word("MANG"), ["MA", "NG"])
+        self.assertEqual(hyphenator.hyphenate_word("mos'a"), ["mo", "s'a"])
+        self.assertEqual(hyphenator.hyphenate_word("naïve"), ["na", "ï", "ve"])
+        self.assertEqual(hyphenator.hyphenate_word("mong"), ["mong"])
+        self.assertEqual(hyphenate.hyphenate_word("table"), ["ta", "ble"])
+        self.assertEqual(hyphenator.boundaries("MANG"), [2])
+        self.assertEqual(hyphenator.boundaries("naïve"), [2, 3])
+        self.assertEqual(hyphenator.boundaries("mong"), [])
+
+
+class TestCache(unittest.TestCase):
+    """
+    This class tests the Hyphenator with a cache.
+    """
+
+    def test_cache(self):
+        """
+        Test whether a cached Hyphenator gives the same results and
+        uses the cache for repeated words.
+        """
+        word_cache = cache.LRUCache(100)
+        cached = hyphenate.Hyphenator(hyphenate.patterns, cache = word_cache)
+        expected = hyphenate.Hyphenator(hyphenate.patterns)
+        for word in WORDS + [word.upper() for word in WORDS]:
+            self.assertEqual(cached.hyphenate_word(word),
+                             expected.hyphenate_word(word))
+        self.assertGreater(word_cache.hits, 0)
+
+
+class TestSyllabify(unittest.TestCase):
+    """
+    This class tests the syllabify function of the TeX-based system.
+    """
+
+    def test_read_patterns(self):
+        """
+        Test whether read_patterns strips the patgen markup.
+        """
+        lines = ["\\patterns{a1b\n", "1ba\n", "}\n"]
+        self.assertEqual(syllabifier.read_patterns(lines), "a1b 1ba")
+
+    def test_syllabify(self):
+        """
+        Test whether the syllabify function works correctly.
+        """
+        hyphenator = hyphenate.Hyphenator("a1b 1ba")
+        self.assertEqual(syllabifier.syllabify("a", hyphenator), "a")
+        self.assertEqual(syllabifier.syllabify("ababa", hyphenator), "aba ba")
+
+    def test_syllabify_many(self):
+        """
+        Test whether syllabify_many gives the same results as syllabify.
+        """
+        hyphenator = hyphenate.Hyphenator(hyphenate.patterns)
+        words = WORDS + WORDS[::-1] + [""]
+        self.assertEqual(syllabifier.syllabify_many(words, hyphenator),
+            [syllabifier.syllabify(word, hyphenator) for word in words])
+        self.assertEqual(syllabifier.syllabify_many(iter(words), hyphenator),
+            [syllabifier.syllabify(word, hyphenator) for word in words])
+
+    def test_boundaries_many(self):
+        """
+        Test whether boundaries_many gives the boundaries of the
+        syllabified words.
+        """
+        hyphenator = hyphenate.Hyphenator(hyphenate.patterns)
+        words = WORDS + WORDS[::-1] + [""]
+        found = syllabifier.boundaries_many(words, hyphenator)
+        for word, boundaries in zip(words, found):
+            pieces = [word[start:end] for start, end in
+                      zip([0] + boundaries, boundaries + [len(word)])]
+            self.assertEqual(" ".join(pieces), syllabifier.syllabify(word, hyphenator))
+        self.assertEqual(syllabifier.boundaries_chunk(["project", "a", "hyphenation"],
+                                                      hyphenator),
+                         ([7, 1, 11], bytes([0b00001000, 0b01000100, 0b00000000])))
+
+
+class TestTrainPatterns(unittest.TestCase):
+    """
+    This class tests creating patterns without patgen.
+    """
+
+    DICTIONARY = ["mo*ko*ta*ba", "ntha*ti*si*sa", "le*a*ka*re*tsi",
+                  "ngwa*na", "nwa*nywe*tswa", "Ma*ru*po", "ba*tho",
+                  "se*ko*lo", "ho*ba*ne", "di*ko*bo"]
+
+    def setUp(self):
+        self.left_min, self.right_min, self.forms, self.alphabet = \
+            train_patterns.read_translate("sesotho.tr")
+        self.words = train_patterns.read_dictionary(self.DICTIONARY, self.forms)
+
+    def train(self, jobs = 1):
+        """
+        Return the patterns created from DICTIONARY as a string.
+        """
+        patterns = train_patterns.train(self.words, train_patterns.SCHEDULE,
+            self.left_min + 1, self.right_min + 1, jobs)
+        fp = io.StringIO()
+        train_patterns.write_patterns(fp, patterns, self.alphabet)
+        return fp.getvalue()
+
+    def test_read(self):
+        """
+        Test whether the translate file and dictionary are read.
+        """
+        self.assertEqual((self.left_min, self.right_min), (2, 2))
+        self.assertEqual(self.forms["M"], "m")
+        self.assertEqual(self.words[5], (".marupo.", bytes([0, 0, 0, 1, 0, 1, 0, 0, 0])))
+        with self.assertRaises(ValueError):
+            train_patterns.read_dictionary(["se*ko*lo!"], self.forms)
+
+    def test_read_schedule(self):
+        """
+        Test whether a schedule in the format of make_full_patterns.sh
+        is read.
+        """
+        self.assertEqual(train_patterns.read_schedule(
+                             ["%   1 1 | 2 5 | 1 1 1\n", "2 2 | 2 5 | 1 2 1\n"]),
+                         train_patterns.SCHEDULE[:2])
+
+    def test_dot_order(self):
+        """
+        Test whether the dots are handled from the middle outwards.
+        """
+        self.assertEqual(train_patterns.dot_order(2), [1, 0, 2])
+        self.assertEqual(train_patterns.dot_order(4), [2, 1, 3, 0, 4])
+
+    def test_train(self):
+        """
+        Test whether the created patterns syllabify the dictionary and
+        whether counting in worker processes gives the same patterns.
+        """
+        patterns = self.train()
+        self.assertTrue(patterns.startswith("\\patterns{"))
+        self.assertTrue(patterns.endswith("}\n"))
+        hyphenator = hyphenate.Hyphenator(
+            syllabifier.read_patterns(io.StringIO(patterns)))
+        for word in self.DICTIONARY:
+            if len(word.replace("*", "")) > 4:
+                self.assertEqual("*".join(hyphenator.hyphenate_word(word.replace("*", ""))),
+                                 word)
+        self.assertEqual(self.train(jobs = 2), patterns)
+
+    def test_train_backends(self):
+        """
+        Test whether every backend finds the same points with the
+        created patterns.
+        """
+        patterns = syllabifier.read_patterns(io.StringIO(self.train()))
+        alphabet = trie.read_alphabet("sesotho.tr")
+        expected = hyphenate.Hyphenator(patterns)
+        words = [word.replace("*", "").lower() for word in self.DICTIONARY]
+        words.append("".join(words))
+        for backend in hyphenate.BACKENDS:
+            hyphenator = hyphenate.Hyphenator(patterns, backend = backend,
+                alphabet = alphabet)
+            for word in words:
+                self.assertEqual(hyphenator._points(word), expected._points(word))
+
+    def test_train_folds(self):
+        """
+        Test whether creating the patterns of all folds at once gives
+        the same patterns as creating them for each fold separately.
+        """
+        segments = [self.words[fold::3] for fold in range(3)]
+        fold_patterns = train_patterns.train_folds(segments,
+            train_patterns.SCHEDULE, self.left_min + 1, self.right_min + 1)
+        for fold in range(3):
+            words = [word for other in range(3) if other != fold
+                     for word in segments[other]]
+            self.assertEqual(fold_patterns[fold], train_patterns.train(words,
+                train_patterns.SCHEDULE, self.left_min + 1, self.right_min + 1))
+
+
+def main():
+    """
+    This main function starts the unit test main function.
+    """
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
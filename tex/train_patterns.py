@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""train_patterns.py
+
+This program creates TeX hyphenation patterns from a dictionary of
+syllabified words (one word per line, syllable boundaries indicated by
+"*" or "-"), like make_full_patterns.sh does, but without the external
+patgen program.  It follows the algorithm of patgen (Liang's method):
+the patterns are created level by level, where the odd levels add
+patterns that allow hyphens and the even levels add patterns that
+inhibit them.  For every pattern length and hyphen position within the
+pattern, the candidate patterns are counted in one pass over the
+dictionary, after which the candidates that are good enough (given the
+good weight, bad weight and threshold of the level) are added.  The
+dictionary and the patterns are kept in memory during all levels and
+the counting can be split over several processes.
+
+For cross validation, the patterns of all folds can be created at once
+(see train_folds): the candidates of every fold segment are counted
+once and shared by all folds that are trained on that segment.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "common"))
+import parallel
+import streams
+
+# The patgen parameters of make_full_patterns.sh.  Every entry holds
+# the first and last level (hyph_start_finish), the shortest and
+# longest pattern length (pat_start_finish) and the good weight, bad
+# weight and threshold (good_bad_thres).
+SCHEDULE = [
+    (1, 1, 2, 5, 1, 1, 1),
+    (2, 2, 2, 5, 1, 2, 1),
+    (3, 3, 2, 6, 1, 1, 1),
+    (4, 4, 2, 6, 1, 4, 1),
+    (5, 5, 2, 7, 1, 1, 1),
+    (6, 6, 2, 7, 1, 6, 1),
+    (7, 7, 2, 13, 1, 4, 1),
+    (8, 8, 2, 13, 1, 8, 1),
+]
+
+# Value of the patterns that can never become good enough.  They are
+# only kept during a level, so their extensions are not counted, and
+# they do not influence the hyphenation.
+MAX_VALUE = 10
+
+# Characters marking the edges of the words in the patterns
+EDGE = "."
+# Characters marking a hyphen in the dictionary ("." marks a wrong
+# hyphen in the output of patgen, so it is not a hyphen)
+HYPHENS = "*-"
+NO_HYPHENS = "."
+
+# Words of the dictionary (kept by every worker process)
+worker_words = None
+
+
+def read_translate(filename):
+    """Read a patgen translate file (such as sesotho.tr) and return the
+    left and right hyphenation minima, a dictionary mapping every form
+    of a letter to the letter (its first form) and the letters in the
+    order of the file.
+    """
+    forms = {}
+    letters = []
+    with open(filename, "r") as fp:
+        minima = next(fp, "").split()
+        left_min, right_min = int(minima[0]), int(minima[1])
+        for line in fp:
+            if line.startswith("%") or not line.split():
+                continue
+            letter = line.split()[0]
+            letters.append(letter)
+            for form in line.split():
+                forms[form] = letter
+    return left_min, right_min, forms, "".join(letters)
+
+
+def read_schedule(fp):
+    """Read a schedule from fp in the format of the .info files written
+    by make_full_patterns.sh (e.g., "%   1 1 | 2 5 | 1 1 1" per line)
+    and return it as a list like SCHEDULE.
+    """
+    schedule = []
+    for line in fp:
+        line = line.strip().lstrip("%")
+        if not line.strip():
+            continue
+        fields = [int(value) for part in line.split("|")
+                  for value in part.split()]
+        if len(fields) != 7:
+            raise ValueError("Wrong schedule line: " + line.strip())
+        schedule.append(tuple(fields))
+    return schedule
+
+
+def read_dictionary(fp, forms):
+    """Read the syllabified words from fp and return them as a list of
+    (word, hyphens) pairs.  The word consists of the letters (as given
+    by forms) with an EDGE at both ends; hyphens holds a 1 at every dot
+    position (dot d lies between word[d - 1] and word[d]) that has a
+    hyphen and a 0 elsewhere.
+    """
+    words = []
+    for number, line in enumerate(fp, 1):
+        line = line.strip()
+        if not line:
+            continue
+        letters = [EDGE]
+        positions = set()
+        for char in line:
+            if char in HYPHENS:
+                positions.add(len(letters))
+            elif char in NO_HYPHENS:
+                continue
+            elif char in forms:
+                letters.append(forms[char])
+            else:
+                raise ValueError("Unknown character %r on line %d" % (char, number))
+        letters.append(EDGE)
+        word = "".join(letters)
+        words.append((word, bytes(1 if dot in positions else 0
+                                  for dot in range(len(word) + 1))))
+    return words
+
+
+def levels(schedule):
+    """Yield the level, shortest and longest pattern length, good
+    weight, bad weight and threshold of every level in schedule.
+    """
+    for hyph_start, hyph_finish, pat_start, pat_finish, good_weight, bad_weight, threshold in schedule:
+        for level in range(hyph_start, hyph_finish + 1):
+            yield level, pat_start, pat_finish, good_weight, bad_weight, threshold
+
+
+def dot_order(pat_len):
+    """Return the hyphen positions (dots) of patterns of length pat_len
+    in the order in which patgen handles them: from the middle of the
+    pattern outwards.
+    """
+    dots = []
+    pat_dot = pat_len // 2
+    dot1 = pat_dot * 2
+    while True:
+        pat_dot = dot1 - pat_dot
+        dot1 = pat_len * 2 - dot1 - 1
+        dots.append(pat_dot)
+        if pat_dot == pat_len:
+            return dots
+
+
+def insert_pattern(patterns, letters, dot, value):
+    """Add the value at dot to the pattern with letters.  patterns maps
+    the letters of every pattern to a list of (dot, value) pairs, like
+    the output chains of patgen, so adding a value never removes the
+    value of an earlier level.  All prefixes of the patterns are in
+    there as well (with an empty list), so matching can stop at the
+    first unknown prefix.
+    """
+    for end in range(1, len(letters)):
+        patterns.setdefault(letters[:end], [])
+    patterns.setdefault(letters, []).append((dot, value))
+
+
+def pattern_values(values):
+    """Return the highest value at every dot of a pattern (given as a
+    list of (dot, value) pairs) as a dictionary, leaving out MAX_VALUE.
+    """
+    result = {}
+    for dot, value in values:
+        if value != MAX_VALUE and result.get(dot, 0) < value:
+            result[dot] = value
+    return result
+
+
+def delete_bad_patterns(patterns):
+    """Return patterns without the values of MAX_VALUE (and without the
+    patterns and prefixes that are no longer needed), keeping only the
+    highest value at every dot.
+    """
+    result = {}
+    for letters, values in patterns.items():
+        for dot, value in sorted(pattern_values(values).items()):
+            insert_pattern(result, letters, dot, value)
+    return result
+
+
+def hyphenate(word, patterns, level = MAX_VALUE + 1, pat_len = 0, pat_dot = 0):
+    """Return the hyphenation values of word (including the EDGEs) at
+    every dot according to patterns and, for candidate patterns of
+    length pat_len with the hyphen at pat_dot, at which dots an
+    existing pattern of at least level lies within the candidate.  The
+    candidates at those dots do not need to be counted.
+    """
+    values = [0] * (len(word) + 1)
+    no_more = [False] * (len(word) + 1)
+    for start in range(len(word)):
+        end = start + 1
+        while end <= len(word):
+            pattern = patterns.get(word[start:end])
+            if pattern == None:
+                break
+            for dot, value in pattern:
+                position = start + dot
+                if value < MAX_VALUE and values[position] < value:
+                    values[position] = value
+                if value >= level and end - pat_len <= position - pat_dot <= start:
+                    no_more[position] = True
+            end += 1
+    return values, no_more
+
+
+def count_candidates(words, patterns, level, pat_len, pat_dot, hyf_min, hyf_max):
+    """Count the candidate patterns of length pat_len with the hyphen
+    at pat_dot in words and return a dictionary mapping the letters of
+    every candidate to its good and bad counts.  On odd levels a
+    candidate is good at a missed hyphen and bad at a position without
+    hyphen, on even levels it is good at a wrong hyphen and bad at a
+    found hyphen.  hyf_min and hyf_max are the hyphenation minima plus
+    one.
+    """
+    counts = {}
+    for word, hyphens in words:
+        values, no_more = hyphenate(word, patterns, level, pat_len, pat_dot)
+        add_candidates(counts, word, hyphens, values, no_more, level,
+            pat_len, pat_dot, hyf_min, hyf_max)
+    return counts
+
+
+def add_candidates(counts, word, hyphens, values, no_more, level, pat_len, pat_dot, hyf_min, hyf_max, weight = 1):
+    """Add weight to the good or bad counts in counts of the candidates
+    in word, given its hyphenation values and no_more (as returned by
+    hyphenate).
+    """
+    parity = level % 2
+    first = max(hyf_min, pat_dot)
+    last = len(word) - max(hyf_max, pat_len - pat_dot)
+    for position in range(first, last + 1):
+        if no_more[position] or values[position] % 2 == parity:
+            continue
+        start = position - pat_dot
+        candidate = word[start:start + pat_len]
+        count = counts.get(candidate)
+        if count == None:
+            count = counts[candidate] = [0, 0]
+        if hyphens[position] == parity:
+            count[0] += weight
+        else:
+            count[1] += weight
+
+
+def add_counts(counts, other):
+    """Add the good and bad counts of other to counts."""
+    for candidate, (good, bad) in other.items():
+        count = counts.get(candidate)
+        if count == None:
+            counts[candidate] = [good, bad]
+        else:
+            count[0] += good
+            count[1] += bad
+
+
+def init_worker(words):
+    """Keep the words of the dictionary in the worker process."""
+    global worker_words
+    worker_words = words
+
+
+def count_slice(task):
+    """Count the candidates in a slice of the words of the worker
+    process; task holds the bounds of the slice and the other arguments
+    of count_candidates.
+    """
+    start, end, arguments = task
+    return count_candidates(worker_words[start:end], *arguments)
+
+
+def select_patterns(patterns, counts, level, pat_dot, good_weight, bad_weight, threshold):
+    """Add the good candidates in counts to patterns and mark those
+    that can never become good enough.  Return the number of good
+    candidates and whether there are candidates that may become good
+    enough when they are extended.
+    """
+    selected, more_to_come = judge_candidates(counts, level, good_weight,
+        bad_weight, threshold)
+    for candidate, value in selected:
+        insert_pattern(patterns, candidate, pat_dot, value)
+    return sum(1 for candidate, value in selected if value == level), more_to_come
+
+
+def judge_candidates(counts, level, good_weight, bad_weight, threshold):
+    """Return the candidates in counts that are good (with value level)
+    or can never become good enough (with value MAX_VALUE) as a list of
+    (candidate, value) pairs, and whether there are other candidates.
+    """
+    selected = []
+    more_to_come = False
+    for candidate, (good, bad) in counts.items():
+        if good_weight * good < threshold:
+            selected.append((candidate, MAX_VALUE))
+        elif good_weight * good - bad_weight * bad >= threshold:
+            selected.append((candidate, level))
+        else:
+            more_to_come = True
+    return selected, more_to_come
+
+
+def evaluate(words, patterns, hyf_min, hyf_max):
+    """Return the number of found, wrong and missed hyphens when words
+    are hyphenated using patterns.
+    """
+    found = wrong = missed = 0
+    for word, hyphens in words:
+        values = hyphenate(word, patterns)[0]
+        for position in range(hyf_min, len(word) - hyf_max + 1):
+            if values[position] % 2 == 1:
+                if hyphens[position]:
+                    found += 1
+                else:
+                    wrong += 1
+            elif hyphens[position]:
+                missed += 1
+    return found, wrong, missed
+
+
+def train(words, schedule, hyf_min, hyf_max, jobs = 1):
+    """Create the patterns for words (as returned by read_dictionary)
+    following schedule and return them in the format of insert_pattern.
+    With more than one job, the candidates are counted in a pool of
+    jobs worker processes that each handle a slice of the words.
+    """
+    patterns = {}
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, init_worker, (words,))
+        size = (len(words) + jobs - 1) // jobs
+    try:
+        for level, pat_start, pat_finish, good_weight, bad_weight, threshold in levels(schedule):
+            more_this_level = [True] * (pat_finish + 1)
+            for pat_len in range(pat_start, pat_finish + 1):
+                for pat_dot in dot_order(pat_len):
+                    if not more_this_level[pat_dot]:
+                        continue
+                    arguments = (patterns, level, pat_len, pat_dot, hyf_min, hyf_max)
+                    if pool == None:
+                        counts = count_candidates(words, *arguments)
+                    else:
+                        counts = {}
+                        for other in pool.map(count_slice,
+                                [(start, start + size, arguments)
+                                 for start in range(0, len(words), size)]):
+                            add_counts(counts, other)
+                    good_patterns, more_this_level[pat_dot] = select_patterns(
+                        patterns, counts, level, pat_dot, good_weight,
+                        bad_weight, threshold)
+                    logging.debug("Level %d, length %d, dot %d: %d candidates, %d good",
+                        level, pat_len, pat_dot, len(counts), good_patterns)
+                # Longer patterns are only needed when both shorter
+                # patterns they contain may still become good enough
+                for dot in range(pat_finish, 0, -1):
+                    if not more_this_level[dot - 1]:
+                        more_this_level[dot] = False
+            patterns = delete_bad_patterns(patterns)
+            if logging.getLogger().isEnabledFor(logging.INFO):
+                logging.info("Level %d: %d found, %d wrong, %d missed hyphens",
+                    level, *evaluate(words, patterns, hyf_min, hyf_max))
+    finally:
+        if pool != None:
+            pool.terminate()
+    return patterns
+
+
+def merge_patterns(fold_patterns):
+    """Return the patterns of all folds (a list of patterns in the
+    format of insert_pattern) merged into one dictionary, mapping the
+    letters of every pattern (and prefix) to a dictionary from (dot,
+    value) pairs to a bit mask of the folds that have that value.
+    """
+    merged = {}
+    for fold, patterns in enumerate(fold_patterns):
+        for letters, values in patterns.items():
+            merge_pattern(merged, letters, values, fold)
+    return merged
+
+
+def merge_pattern(merged, letters, values, fold):
+    """Add the values (a list of (dot, value) pairs) of the pattern with
+    letters of fold to merged (see merge_patterns).
+    """
+    merged_values = merged.setdefault(letters, {})
+    for dot_value in values:
+        merged_values[dot_value] = merged_values.get(dot_value, 0) | (1 << fold)
+
+
+def compile_merged(merged, letters_list, compiled):
+    """Store the patterns with letters in letters_list of merged in
+    compiled, mapping the letters to a tuple of (dot, value, mask)
+    triples and the folds (a bit mask) that have all of them.
+    """
+    for letters in letters_list:
+        common = -1
+        ops = []
+        for (dot, value), mask in merged[letters].items():
+            ops.append((dot, value, mask))
+            common &= mask
+        compiled[letters] = (tuple(ops), common)
+
+
+def match_folds(word, compiled, folds, values, no_more, level, pat_len, pat_dot):
+    """Apply the matches of the compiled patterns (see compile_merged)
+    in word that all folds (a bit mask) have to values and no_more, like
+    hyphenate does.  Return the other matches as a list of (start, end,
+    position, value, mask) tuples, where mask holds the folds having
+    the match.
+    """
+    partial = []
+    for start in range(len(word)):
+        end = start + 1
+        while end <= len(word):
+            pattern = compiled.get(word[start:end])
+            if pattern == None:
+                break
+            ops, common = pattern
+            for dot, value, mask in ops:
+                if common & folds != folds and mask & folds != folds:
+                    if mask & folds:
+                        partial.append((start, end, start + dot, value, mask & folds))
+                    continue
+                position = start + dot
+                if value < MAX_VALUE and values[position] < value:
+                    values[position] = value
+                if value >= level and end - pat_len <= position - pat_dot <= start:
+                    no_more[position] = True
+            end += 1
+    return partial
+
+
+def apply_matches(values, no_more, matches, level, pat_len, pat_dot):
+    """Apply the matches (as returned by match_folds) to the hyphenation
+    values and no_more of a word, like hyphenate does.
+    """
+    for start, end, position, value, mask in matches:
+        if value < MAX_VALUE and values[position] < value:
+            values[position] = value
+        if value >= level and end - pat_len <= position - pat_dot <= start:
+            no_more[position] = True
+
+
+def count_folds(segments, compiled, active, level, pat_len, pat_dot, hyf_min, hyf_max):
+    """Count the candidates for every fold in the bit mask active, where
+    fold f is trained on all segments except segment f, and return the
+    counts per fold (None for the inactive folds).
+
+    The words of a segment are matched once for all folds using the
+    merged patterns.  When the folds differ in none of the matches that
+    change the hyphenation values or no_more of a word, its candidates
+    are counted once for its segment; fold f then gets the counts of
+    all segments minus those of segment f.  Otherwise, the counts of
+    the largest group of folds with the same matches are used for the
+    segment and the differences are counted for the other folds.
+    """
+    shared = [{} for segment in segments]
+    private = [{} for segment in segments]
+    arguments = (level, pat_len, pat_dot, hyf_min, hyf_max)
+    for segment, words in enumerate(segments):
+        folds = active & ~(1 << segment)
+        if not folds:
+            continue
+        members = [fold for fold in range(len(segments)) if folds & (1 << fold)]
+        for word, hyphens in words:
+            values = [0] * (len(word) + 1)
+            no_more = [False] * (len(word) + 1)
+            partial = match_folds(word, compiled, folds, values, no_more,
+                level, pat_len, pat_dot)
+            # Only the matches of some folds that change the values or
+            # no_more at the counted positions matter
+            first = max(hyf_min, pat_dot)
+            last = len(word) - max(hyf_max, pat_len - pat_dot)
+            differences = [(start, end, position, value, mask)
+                           for start, end, position, value, mask in partial
+                           if first <= position <= last and
+                           ((value < MAX_VALUE and values[position] < value) or
+                            (value >= level and not no_more[position] and
+                             end - pat_len <= position - pat_dot <= start))]
+            if not differences:
+                add_candidates(shared[segment], word, hyphens, values, no_more,
+                    *arguments)
+                continue
+            groups = {}
+            for fold in members:
+                groups.setdefault(tuple(match for match in differences
+                                        if match[4] & (1 << fold)), []).append(fold)
+            groups = sorted(groups.items(), key = lambda group: len(group[1]),
+                            reverse = True)
+            results = []
+            for group_matches, group in groups:
+                group_values = list(values)
+                group_no_more = list(no_more)
+                apply_matches(group_values, group_no_more, group_matches,
+                    level, pat_len, pat_dot)
+                results.append((group_values, group_no_more))
+            add_candidates(shared[segment], word, hyphens, results[0][0],
+                results[0][1], *arguments)
+            for (group_matches, group), (group_values, group_no_more) in zip(groups[1:], results[1:]):
+                for fold in group:
+                    add_candidates(private[fold], word, hyphens, group_values,
+                        group_no_more, *arguments)
+                    add_candidates(private[fold], word, hyphens, results[0][0],
+                        results[0][1], *arguments, weight = -1)
+    total = {}
+    for counts in shared:
+        add_counts(total, counts)
+    fold_counts = []
+    for fold in range(len(segments)):
+        if not active & (1 << fold):
+            fold_counts.append(None)
+            continue
+        counts = dict((candidate, list(count)) for candidate, count in total.items())
+        add_counts(counts, dict((candidate, [-good, -bad])
+                                for candidate, (good, bad) in shared[fold].items()))
+        add_counts(counts, private[fold])
+        fold_counts.append(dict((candidate, count)
+                                for candidate, count in counts.items() if count != [0, 0]))
+    return fold_counts
+
+
+def train_folds(segments, schedule, hyf_min, hyf_max):
+    """Create the patterns for every fold of a cross validation, where
+    fold f is trained on the words of all segments (lists of words as
+    returned by read_dictionary) except segment f, and return the list
+    of patterns per fold.  The patterns are the same as those returned
+    by train for the training words of each fold, but the candidates are
+    counted for all folds at once (see count_folds).
+    """
+    fold_patterns = [{} for segment in segments]
+    for level, pat_start, pat_finish, good_weight, bad_weight, threshold in levels(schedule):
+        merged = merge_patterns(fold_patterns)
+        compiled = {}
+        compile_merged(merged, merged, compiled)
+        more_this_level = [[True] * (pat_finish + 1) for segment in segments]
+        for pat_len in range(pat_start, pat_finish + 1):
+            for pat_dot in dot_order(pat_len):
+                active = sum(1 << fold for fold in range(len(segments))
+                             if more_this_level[fold][pat_dot])
+                if not active:
+                    continue
+                fold_counts = count_folds(segments, compiled, active, level,
+                    pat_len, pat_dot, hyf_min, hyf_max)
+                changed = set()
+                for fold, counts in enumerate(fold_counts):
+                    if counts == None:
+                        continue
+                    selected, more_this_level[fold][pat_dot] = judge_candidates(
+                        counts, level, good_weight, bad_weight, threshold)
+                    for candidate, value in selected:
+                        insert_pattern(fold_patterns[fold], candidate, pat_dot, value)
+                        for end in range(1, len(candidate)):
+                            merge_pattern(merged, candidate[:end], [], fold)
+                        merge_pattern(merged, candidate, [(pat_dot, value)], fold)
+                        changed.update(candidate[:end] for end in range(1, len(candidate) + 1))
+                compile_merged(merged, changed, compiled)
+                logging.debug("Level %d, length %d, dot %d: counted for %d folds",
+                    level, pat_len, pat_dot, bin(active).count("1"))
+            for more in more_this_level:
+                for dot in range(pat_finish, 0, -1):
+                    if not more[dot - 1]:
+                        more[dot] = False
+        fold_patterns = [delete_bad_patterns(patterns) for patterns in fold_patterns]
+    return fold_patterns
+
+
+def format_pattern(letters, values):
+    """Return the pattern with letters and values (a list of (dot,
+    value) pairs) as a string, e.g., ".ab1c".
+    """
+    values = pattern_values(values)
+    pattern = []
+    for dot in range(len(letters) + 1):
+        if dot in values:
+            pattern.append(str(values[dot]))
+        if dot < len(letters):
+            pattern.append(letters[dot])
+    return "".join(pattern)
+
+
+def write_patterns(fp, patterns, alphabet):
+    """Write patterns to fp between \\patterns{ and }, like
+    make_full_patterns.sh, one pattern per line in the order of the
+    letters in alphabet (as patgen does).
+    """
+    codes = dict((letter, code) for code, letter in enumerate(EDGE + alphabet))
+    fp.write("\\patterns{")
+    for letters in sorted(patterns, key = lambda letters: [codes[letter] for letter in letters]):
+        if patterns[letters]:
+            fp.write(format_pattern(letters, patterns[letters]) + "\n")
+    fp.write("}\n")
+
+
+def main():
+    """Commandline arguments are parsed and handled.  Next, the
+    dictionary is read, the patterns are created and written to output.
+    """
+
+    parser = argparse.ArgumentParser(description="This program reads in a dictionary of syllabified words (syllables separated by *), one per line, and creates TeX hyphenation patterns, which are then written to the output file.")
+    parser.add_argument("-i", "--input",
+        help = "name of dictionary file (- for standard input)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-o", "--output",
+        help = "name of patterns file (- for standard output)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-t", "--translate",
+        help = "name of patgen translate file (default: sesotho.tr)",
+        action = "store",
+        default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sesotho.tr"),
+        metavar = "FILE")
+    parser.add_argument("-s", "--schedule",
+        help = "name of file with the patgen parameters per level, in the format of the .info file of make_full_patterns.sh (default: those of make_full_patterns.sh)",
+        action = "store",
+        metavar = "FILE")
+    parser.add_argument("-f", "--folds",
+        help = "name of directory with the folds created by do_all.sh (files 000, 001, ...); the patterns of every fold are created at once and written to DIR/data000/train.pat, DIR/data001/train.pat, ... (used instead of --input and --output)",
+        action = "store",
+        metavar = "DIR")
+    parallel.add_arguments(parser)
+    parser.add_argument("-d", "--debug",
+        help = "provide debugging information",
+        action = "store_const",
+        dest = "loglevel",
+        const = logging.DEBUG,
+        default = logging.WARNING,
+)
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.loglevel)
+
+    if args.folds == None:
+        if args.input == None:
+            parser.error("An input filename is required.")
+        if args.output == None:
+            parser.error("An output filename is required.")
+    if args.jobs < 1:
+        parser.error("The number of jobs should be at least 1.")
+    if args.folds != None and args.jobs > 1:
+        parser.error("The folds are created in one process, --jobs cannot be used with --folds.")
+
+    schedule = SCHEDULE
+    if args.schedule != None:
+        with open(args.schedule, "r") as fp:
+            schedule = read_schedule(fp)
+
+    left_min, right_min, forms, alphabet = read_translate(args.translate)
+    if args.folds != None:
+        names = sorted(name for name in os.listdir(args.folds) if name.isdigit())
+        segments = []
+        for name in names:
+            with open(os.path.join(args.folds, name), "r") as fp:
+                segments.append(read_dictionary(fp, forms))
+        logging.debug("Read %d folds", len(segments))
+        fold_patterns = train_folds(segments, schedule, left_min + 1, right_min + 1)
+        for name, patterns in zip(names, fold_patterns):
+            directory = os.path.join(args.folds, "data" + name)
+            os.makedirs(directory, exist_ok = True)
+            with open(os.path.join(directory, "train.pat"), "w") as fp:
+                write_patterns(fp, patterns, alphabet)
+        return
+
+    with streams.open_input(args.input) as fp:
+        words = read_dictionary(fp, forms)
+    logging.debug("Read %d words", len(words))
+
+    patterns = train(words, schedule, left_min + 1, right_min + 1, args.jobs)
+
+    with streams.open_output(args.output) as fp:
+        write_patterns(fp, patterns, alphabet)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,433 @@
+""" Compact pattern tries for the Hyphenator.
+
+    The Hyphenator stores its patterns in a tree of nested dicts.  This
+    module flattens such a tree into a handful of integer arrays that
+    can be written to disk and memory-mapped again later, so that a
+    large pattern set does not have to be parsed on every start-up and
+    several processes can share one copy of the pages.
+
+    File layout (all integers little-endian):
+
+        header        magic, node count, edge count, points count
+        edge_start    int32[nodes + 1]   edges of node k are
+                                         edge_start[k]:edge_start[k+1]
+        point_start   int32[nodes + 1]   points of node k are
+                                         points[point_start[k]:point_start[k+1]]
+        edge_char     int32[edges]       character code, sorted per node
+        edge_target   int32[edges]       child node
+        points        uint8[points]      shared pool of pattern points
+
+    Node 0 is the root of the trie.
+
+    ArrayTrie is a second in-memory layout for fast matching: a dense
+    transition table indexed by a letter code (taken from a patgen
+    translate file such as sesotho.tr) and an offset into a shared
+    points pool.
+"""
+
+import array
+import bisect
+import mmap
+import struct
+import sys
+
+MAGIC = b'SESTRIE1'
+HEADER = struct.Struct('<8sIII4x')
+
+
+def flatten_tree(tree):
+    """ Flatten a Hyphenator tree (nested dicts, points stored under the
+        key None) into the arrays described in the module docstring.
+        Nodes are numbered in breadth-first order.
+    """
+    edge_start = array.array('i')
+    point_start = array.array('i')
+    edge_char = array.array('i')
+    edge_target = array.array('i')
+    points = array.array('B')
+    order = [tree]
+    for node in order:      # order grows while the children are added
+        edge_start.append(len(edge_char))
+        point_start.append(len(points))
+        points.extend(node.get(None, ()))
+        for c in sorted(c for c in node if c is not None):
+            edge_char.append(ord(c))
+            edge_target.append(len(order))
+            order.append(node[c])
+    edge_start.append(len(edge_char))
+    point_start.append(len(points))
+    return edge_start, point_start, edge_char, edge_target, points
+
+
+def write_tree(filename, tree):
+    """ Write the Hyphenator tree to filename in the compiled format.
+    """
+    arrays = flatten_tree(tree)
+    edge_start, point_start, edge_char, edge_target, points = arrays
+    if sys.byteorder != 'little':
+        for a in arrays[:4]:
+            a.byteswap()
+    with open(filename, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, len(edge_start) - 1, len(edge_char),
+            len(points)))
+        for a in arrays:
+            a.tofile(fp)
+
+
+class FlatTrie:
+    """ A pattern trie stored in flat arrays, usually memory-mapped from a
+        file written by write_tree.
+    """
+
+    def __init__(self, edge_start, point_start, edge_char, edge_target, points):
+        self.edge_start = edge_start
+        self.point_start = point_start
+        self.edge_char = edge_char
+        self.edge_target = edge_target
+        self.points = points
+
+    @classmethod
+    def from_tree(cls, tree):
+        """ Build a FlatTrie in memory from a Hyphenator tree.
+        """
+        return cls(*flatten_tree(tree))
+
+    @classmethod
+    def load(cls, filename):
+        """ Memory-map a file written by write_tree.  The arrays are views
+            on the mapped pages; nothing is parsed or copied.
+        """
+        with open(filename, 'rb') as fp:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < HEADER.size:
+            raise ValueError("%s is not a compiled pattern file" % filename)
+        magic, nodes, edges, npoints = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise ValueError("%s is not a compiled pattern file" % filename)
+        if len(mm) != HEADER.size + 4 * (2 * (nodes + 1) + 2 * edges) + npoints:
+            raise ValueError("%s is truncated" % filename)
+        view = memoryview(mm)
+        offset = HEADER.size
+        arrays = []
+        for count in (nodes + 1, nodes + 1, edges, edges):
+            a = view[offset:offset + 4 * count].cast('i')
+            if sys.byteorder != 'little':
+                a = array.array('i', a)
+                a.byteswap()
+            arrays.append(a)
+            offset += 4 * count
+        arrays.append(view[offset:offset + npoints])
+        trie = cls(*arrays)
+        trie._mmap = mm
+        return trie
+
+    def match(self, work):
+        """ Return the points list for work ('.' + word + '.'), taking the
+            maximum over all patterns found at every position, exactly like
+            Hyphenator.hyphenate_word does with its dict tree.
+        """
+        edge_start = self.edge_start
+        point_start = self.point_start
+        edge_char = self.edge_char
+        edge_target = self.edge_target
+        pool = self.points
+        codes = [ord(c) for c in work]
+        points = [0] * (len(work)+1)
+        for i in range(len(work)):
+            node = 0
+            for code in codes[i:]:
+                lo = edge_start[node]
+                hi = edge_start[node+1]
+                k = bisect.bisect_left(edge_char, code, lo, hi)
+                if k == hi or edge_char[k] != code:
+                    break
+                node = edge_target[k]
+                start = point_start[node]
+                end = point_start[node+1]
+                for j in range(end - start):
+                    if pool[start+j] > points[i+j]:
+                        points[i+j] = pool[start+j]
+        return points
+
+
+    def match_counted(self, work, counts):
+        """ Like match, but also count the words matched ('matched'), the
+            trie nodes visited ('nodes') and the patterns found
+            ('patterns') in counts (a collections.Counter).
+        """
+        edge_start = self.edge_start
+        point_start = self.point_start
+        edge_char = self.edge_char
+        edge_target = self.edge_target
+        pool = self.points
+        codes = [ord(c) for c in work]
+        points = [0] * (len(work)+1)
+        counts['matched'] += 1
+        for i in range(len(work)):
+            node = 0
+            for code in codes[i:]:
+                lo = edge_start[node]
+                hi = edge_start[node+1]
+                k = bisect.bisect_left(edge_char, code, lo, hi)
+                if k == hi or edge_char[k] != code:
+                    break
+                node = edge_target[k]
+                counts['nodes'] += 1
+                start = point_start[node]
+                end = point_start[node+1]
+                if end > start:
+                    counts['patterns'] += 1
+                for j in range(end - start):
+                    if pool[start+j] > points[i+j]:
+                        points[i+j] = pool[start+j]
+        return points
+
+
+def read_alphabet(filename):
+    """ Read the letters from a patgen translate file (such as sesotho.tr).
+        The first line holds the hyphenation minima, lines starting with
+        '%' are comments, and every other line lists the forms of one
+        letter, the first of which is used in the patterns.
+    """
+    letters = []
+    with open(filename, 'r') as fp:
+        next(fp, None)
+        for line in fp:
+            forms = line.split()
+            if forms and not line.startswith('%'):
+                letters.append(forms[0])
+    return ''.join(letters)
+
+
+class ArrayTrie:
+    """ A pattern trie stored as a dense transition table with one row of
+        size entries per node.  Every letter of the alphabet gets a code;
+        the last code is used for all other characters and never has a
+        transition.  transitions[row + code] is the row offset of the child
+        (node * size), negated when the child has points, or 0 when there
+        is no child (the root is never a child).
+    """
+
+    def __init__(self, letters, transitions, point_start, points):
+        self.letters = letters
+        self.codes = dict((c, i) for i, c in enumerate(letters))
+        self.size = len(letters) + 1
+        self.transitions = transitions
+        self.point_start = point_start
+        self.points = points
+
+    @classmethod
+    def from_tree(cls, tree, alphabet=''):
+        """ Build an ArrayTrie from a Hyphenator tree.  Letters of the
+            patterns that are missing from alphabet are added to it, so the
+            result always matches the tree.
+        """
+        letters = ['.']
+        for c in alphabet:
+            if c not in letters:
+                letters.append(c)
+        seen = set(letters)
+        order = [tree]
+        for node in order:      # order grows while the children are added
+            for c in node:
+                if c is not None:
+                    if c not in seen:
+                        seen.add(c)
+                        letters.append(c)
+                    order.append(node[c])
+        codes = dict((c, i) for i, c in enumerate(letters))
+        size = len(letters) + 1
+
+        transitions = array.array('i', [0]) * (len(order) * size)
+        point_start = array.array('i')
+        points = array.array('B')
+        index = dict((id(node), i) for i, node in enumerate(order))
+        for i, node in enumerate(order):
+            point_start.append(len(points))
+            points.extend(node.get(None, ()))
+            for c in node:
+                if c is not None:
+                    child = node[c]
+                    row = index[id(child)] * size
+                    transitions[i * size + codes[c]] = -row if None in child else row
+        point_start.append(len(points))
+        return cls(''.join(letters), transitions, point_start, points)
+
+    def match(self, work):
+        """ Return the points list for work ('.' + word + '.'), like
+            FlatTrie.match.
+        """
+        transitions = self.transitions
+        size = self.size
+        point_start = self.point_start
+        pool = self.points
+        codes = self.codes
+        unknown = size - 1
+        letters = [codes.get(c, unknown) for c in work]
+        points = [0] * (len(work)+1)
+        for i in range(len(work)):
+            row = 0
+            for code in letters[i:]:
+                row = transitions[row + code]
+                if row > 0:
+                    continue
+                if not row:
+                    break
+                row = -row
+                node = row // size
+                k = i - point_start[node]
+                for p in range(point_start[node], point_start[node+1]):
+                    if pool[p] > points[k+p]:
+                        points[k+p] = pool[p]
+        return points
+
+    def match_counted(self, work, counts):
+        """ Like match, but also count the words matched, trie nodes
+            visited and patterns found, like FlatTrie.match_counted.
+        """
+        transitions = self.transitions
+        size = self.size
+        point_start = self.point_start
+        pool = self.points
+        codes = self.codes
+        unknown = size - 1
+        letters = [codes.get(c, unknown) for c in work]
+        points = [0] * (len(work)+1)
+        counts['matched'] += 1
+        for i in range(len(work)):
+            row = 0
+            for code in letters[i:]:
+                row = transitions[row + code]
+                if not row:
+                    break
+                counts['nodes'] += 1
+                if row > 0:
+                    continue
+                counts['patterns'] += 1
+                row = -row
+                node = row // size
+                k = i - point_start[node]
+                for p in range(point_start[node], point_start[node+1]):
+                    if pool[p] > points[k+p]:
+                        points[k+p] = pool[p]
+        return points
+
+
+class AhoCorasickTrie:
+    """ The patterns compiled into an Aho-Corasick automaton, which finds
+        every pattern occurring in a word in a single pass instead of
+        restarting the walk through the trie at every position.  State 0
+        is the root; goto[s] maps a character to the next state, fail[s]
+        is the state of the longest proper suffix of state s that is also
+        a pattern prefix and output[s] is the nearest state on the failure
+        chain of s that ends a pattern (0 if there is none).
+
+        The point vectors of all patterns that end in a state (the
+        pattern of the state itself and those reached through the output
+        links) are folded together with max when the automaton is built,
+        as (offset, point) pairs relative to the position of the last
+        character.  Only the points above 0 are kept, since the points of
+        a word start at 0.  found[s] is the number of patterns that end
+        in state s, which is only used for counting.
+    """
+
+    def __init__(self, goto, fail, output, folded, found):
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+        self.folded = folded
+        self.found = found
+
+    @classmethod
+    def from_tree(cls, tree):
+        """ Build the automaton from a Hyphenator tree.  The states are
+            numbered in breadth-first order, so the failure state of a state
+            is always built before the state itself.
+        """
+        goto = []
+        nodes = [tree]
+        for node in nodes:      # nodes grows while the children are added
+            children = {}
+            for c in sorted(c for c in node if c is not None):
+                children[c] = len(nodes)
+                nodes.append(node[c])
+            goto.append(children)
+        depth = [0] * len(nodes)
+        fail = [0] * len(nodes)
+        output = [0] * len(nodes)
+        folded = [()] * len(nodes)
+        found = [0] * len(nodes)
+        for state, children in enumerate(goto):
+            for c, child in children.items():
+                depth[child] = depth[state] + 1
+                if state:
+                    f = fail[state]
+                    while f and c not in goto[f]:
+                        f = fail[f]
+                    fail[child] = goto[f].get(c, 0)
+                f = fail[child]
+                output[child] = f if None in nodes[f] else output[f]
+                found[child] = (None in nodes[child]) + found[output[child]]
+                points = {}
+                for offset, p in folded[output[child]]:
+                    points[offset] = p
+                # The last point of a pattern lies after its last character
+                for j, p in enumerate(nodes[child].get(None, ())):
+                    offset = j - depth[child] + 1
+                    if p > points.get(offset, 0):
+                        points[offset] = p
+                folded[child] = tuple(sorted(points.items()))
+        return cls(goto, fail, output, folded, found)
+
+    def match(self, work):
+        """ Return the points list for work ('.' + word + '.'), like
+            FlatTrie.match.
+        """
+        goto = self.goto
+        fail = self.fail
+        folded = self.folded
+        points = [0] * (len(work)+1)
+        state = 0
+        for end, c in enumerate(work):
+            while True:
+                next_state = goto[state].get(c)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            for offset, p in folded[state]:
+                if p > points[end+offset]:
+                    points[end+offset] = p
+        return points
+
+    def match_counted(self, work, counts):
+        """ Like match, but also count the words matched ('matched'), the
+            states entered ('nodes', through goto or failure links) and
+            the patterns found ('patterns') in counts (a
+            collections.Counter).
+        """
+        goto = self.goto
+        fail = self.fail
+        folded = self.folded
+        found = self.found
+        points = [0] * (len(work)+1)
+        counts['matched'] += 1
+        state = 0
+        for end, c in enumerate(work):
+            while True:
+                next_state = goto[state].get(c)
+                if next_state is not None:
+                    state = next_state
+                    counts['nodes'] += 1
+                    break
+                if not state:
+                    break
+                state = fail[state]
+                counts['nodes'] += 1
+            counts['patterns'] += found[state]
+            for offset, p in folded[state]:
+                if p > points[end+offset]:
+                    points[end+offset] = p
+        return points